@@ -1,12 +1,21 @@
-import json
-from json import JSONDecoder
-from typing import List, Dict, Callable, Any
+from __future__ import annotations
 
-from openai.types.chat import ChatCompletionMessageParam
+import asyncio
+from contextlib import aclosing
+from typing import TYPE_CHECKING, Awaitable, List, Dict, Callable, Optional, Tuple, TypeVar
 
-from llm_client import ask_llm
+from config import get_settings
+from command_parser import parse_command
+from history import HistoryManager
+from llm_cache import ResponseCache, is_context_free
+from llm_client import ask_llm, ask_llm_stream, ask_llm_stream_async
+from streaming import SentenceSplitter, ToolCallStreamParser
+from tools.executor import PlanExecutor
 from tools.registry import get_tools_map, build_system_tools_description
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
+
 
 TOOLS: Dict[str, Callable[..., str]] = get_tools_map()
 
@@ -16,6 +25,7 @@ RULES FOR PATH REQUESTS:
 - For any request to delete/remove a file/folder ("delete/remove", "удали/удалить"), call delete_path.
 - For "move/перемести/переместить/rename/переименуй/переименовать/copy/скопируй/скопировать", use move_path/rename_path/copy_path.
 - For "replace/замени/заменить", use replace_text. For "insert/вставь/вставить/добавь ... после/перед", use insert_text.
+- For several replacements/insertions in the same file, use one edit_file call instead of repeated replace_text/insert_text.
 - Treat "current directory/current folder/project root/корень проекта/здесь" as the project root directory.
 - Treat paths starting with "documents/", "документы/", "docs/" as under ~/Documents.
 - If the user says "in it/в ней/в нём", apply it to the most recently mentioned directory in the SAME request.
@@ -39,76 +49,251 @@ If no tool is needed, answer the user normally as text.
 SYSTEM_TOOLS_DESCRIPTION = build_system_tools_description(extra_rules=_EXTRA_RULES)
 
 
-def make_system_message() -> ChatCompletionMessageParam:
-    return {
-        "role": "system",
-        "content": (
-            "You are a local voice assistant running on the user's machine. "
-            "Use tools when they can help execute user commands or fetch data.\n\n"
-            + SYSTEM_TOOLS_DESCRIPTION
-        ),
-    }
+_SYSTEM_PREAMBLE = (
+    "You are a local voice assistant running on the user's machine. "
+    "Use tools when they can help execute user commands or fetch data.\n\n"
+)
+
+
+def make_system_message(user_text: Optional[str] = None) -> ChatCompletionMessageParam:
+    """
+    Without `user_text` every tool is described. With it, only the tools most
+    relevant to that request are (see `tool_top_k`), which keeps the prompt short.
+    """
+    tools_description = SYSTEM_TOOLS_DESCRIPTION
+    top_k = get_settings().tool_top_k
+    if user_text and top_k > 0:
+        tools_description = build_system_tools_description(
+            extra_rules=_EXTRA_RULES,
+            query=user_text,
+            top_k=top_k,
+        )
+    return {"role": "system", "content": _SYSTEM_PREAMBLE + tools_description}
+
+
+def _request_messages(
+    history: List[ChatCompletionMessageParam],
+    user_text: str,
+) -> List[ChatCompletionMessageParam]:
+    # swap the full system message for one scoped to this request; the history
+    # itself keeps the full one
+    if history and history[0].get("role") == "system" and history[0].get("content") == _SYSTEM_PREAMBLE + SYSTEM_TOOLS_DESCRIPTION:
+        return [make_system_message(user_text)] + list(history[1:])
+    return history
+
+
+def _run_tool_call(call: dict) -> str:
+    tool_name = call.get("tool")
+    args = call.get("args", {}) or {}
+
+    if tool_name not in TOOLS:
+        return f"Unknown tool: {tool_name}"
+
+    try:
+        return TOOLS[tool_name](**args)
+    except Exception as e:
+        return f"Tool '{tool_name}' failed: {type(e).__name__}: {e}"
+
+
+class _Turn:
+    """
+    Consumes one model reply (whole or streamed): tool calls are handed to the
+    plan executor as soon as they are parsed, plain text is forwarded sentence
+    by sentence.
+    """
+
+    def __init__(self, on_sentence: Optional[Callable[[str], None]] = None) -> None:
+        self.on_sentence = on_sentence
+        self._executor = PlanExecutor(_run_tool_call, max_workers=get_settings().tool_workers)
+        self._raw: list[str] = []
+        self._splitter = SentenceSplitter(on_sentence) if on_sentence else None
+        self._calls = 0
+        self.cache_entry: Optional[Tuple[ResponseCache, str, str]] = None
+        self._parser = ToolCallStreamParser(on_tool=self.submit_call, on_text=self._on_text)
+
+    def submit_call(self, call: dict) -> None:
+        self._calls += 1
+        self._executor.submit(call)
+
+    def _on_text(self, text: str) -> None:
+        # once the reply turned out to be a tool plan, trailing chatter is not spoken
+        if self._splitter and not self._calls:
+            self._splitter.feed(text)
+
+    @property
+    def raw(self) -> str:
+        return "".join(self._raw)
+
+    @property
+    def has_tool_calls(self) -> bool:
+        return self._calls > 0
+
+    def feed(self, chunk: str) -> None:
+        self._raw.append(chunk)
+        self._parser.feed(chunk)
+
+    def _results(self) -> str:
+        results = self._executor.results()
+        return results[0] if len(results) == 1 else "\n".join(f"{i+1}) {r}" for i, r in enumerate(results))
+
+    def interrupt(self) -> str:
+        """
+        What the history keeps of a turn cut short: the results of the calls
+        that ran (queued ones are skipped, running ones are waited for), or
+        the text so far.
+        """
+        self._executor.cancel()
+        return (self._results() if self._calls else self.raw) + " [interrupted]"
+
+    def finish(self) -> str:
+        self._parser.finish()
+        if self._calls:
+            out = self._results()
+            if self.on_sentence:
+                self.on_sentence(out)
+            return out
+        if self._splitter:
+            self._splitter.flush()
+        return self.raw
+
+
+def _start_turn(
+    history: List[ChatCompletionMessageParam],
+    user_text: str,
+    on_sentence: Optional[Callable[[str], None]],
+    history_manager: Optional[HistoryManager],
+    response_cache: Optional[ResponseCache],
+) -> Tuple[_Turn, Optional[List[ChatCompletionMessageParam]]]:
+    # records the user turn and answers it locally or from the cache when
+    # possible; otherwise returns the messages to send to the model
+    history.append({"role": "user", "content": user_text})
+    if history_manager:
+        history_manager.compact(history)
+
+    turn = _Turn(on_sentence)
+
+    # plain file-management commands are parsed locally, without a round trip
+    local_calls = parse_command(user_text) if get_settings().local_command_parser else None
+    if local_calls:
+        for call in local_calls:
+            turn.submit_call(call)
+        return turn, None
+
+    messages = _request_messages(history, user_text)
+
+    # only requests that do not refer back to earlier turns may use the cache
+    if response_cache is not None and is_context_free(user_text):
+        system_prompt = str(messages[0].get("content") or "") if messages[0].get("role") == "system" else ""
+        cached = response_cache.get(system_prompt, user_text)
+        if cached is not None:
+            turn.feed(cached)
+            return turn, None
+        turn.cache_entry = (response_cache, system_prompt, user_text)
+
+    return turn, messages
+
+
+def _end_turn(history: List[ChatCompletionMessageParam], turn: _Turn) -> str:
+    out = turn.finish()
+    # tool plans are re-executed on every hit, so they never go stale; free-form
+    # answers might (time, news, ...) and are not cached
+    if turn.cache_entry and turn.has_tool_calls:
+        cache, system_prompt, user_text = turn.cache_entry
+        cache.put(system_prompt, user_text, turn.raw)
+    history.append({"role": "assistant", "content": out})
+    return out
+
+
+def _interrupt_turn(history: List[ChatCompletionMessageParam], turn: _Turn) -> None:
+    history.append({"role": "assistant", "content": turn.interrupt()})
 
 
 def handle_user_text(
     history: List[ChatCompletionMessageParam],
     user_text: str,
+    stream: bool = False,
+    on_sentence: Optional[Callable[[str], None]] = None,
+    history_manager: Optional[HistoryManager] = None,
+    response_cache: Optional[ResponseCache] = None,
 ) -> str:
-    def _extract_tool_calls(raw: str) -> list[dict]:
-        dec = JSONDecoder()
-        s = raw.strip()
+    """
+    Sends the user turn to the model and executes any tool calls in the reply.
+    With `stream=True` tools start while the reply is still being generated and
+    `on_sentence` receives everything meant to be spoken, as soon as it is ready.
+    A `history_manager` keeps the history within its token budget; a
+    `response_cache` answers repeated, self-contained requests without the model.
+    """
+    turn, messages = _start_turn(history, user_text, on_sentence, history_manager, response_cache)
+    if messages is not None:
+        if stream:
+            for chunk in ask_llm_stream(messages):
+                turn.feed(chunk)
+        else:
+            turn.feed(ask_llm(messages))
+    return _end_turn(history, turn)
 
-        try:
-            data: Any = json.loads(s)
-        except json.JSONDecodeError:
-            data = None
-        if isinstance(data, dict) and "tool" in data:
-            return [data]
-        if isinstance(data, list):
-            tool_items = [x for x in data if isinstance(x, dict) and "tool" in x]
-            if tool_items:
-                return tool_items
-
-        # robust path: find the first json object/array anywhere in the response 
-        for i, ch in enumerate(raw):
-            if ch not in "{[":
-                continue
-            try:
-                obj, _end = dec.raw_decode(raw[i:])
-            except Exception:
-                continue
-            if isinstance(obj, dict) and "tool" in obj:
-                return [obj]
-            if isinstance(obj, list):
-                tool_items = [x for x in obj if isinstance(x, dict) and "tool" in x]
-                if tool_items:
-                    return tool_items
-        return []
 
-    history.append({"role": "user", "content": user_text})
+T = TypeVar("T")
 
-    raw = ask_llm(history)
 
-    tool_calls = _extract_tool_calls(raw)
-    if tool_calls:
-        results: list[str] = []
-        for call in tool_calls:
-            tool_name = call.get("tool")
-            args = call.get("args", {}) or {}
+async def _uninterruptible(work: Awaitable[T]) -> Tuple[T, bool]:
+    """Awaits `work` to the end even through cancellation; returns (result, was_cancelled)."""
+    inner = asyncio.ensure_future(work)
+    cancelled = False
+    while not inner.done():
+        try:
+            await asyncio.shield(inner)
+        except asyncio.CancelledError:
+            if inner.cancelled():
+                raise
+            cancelled = True
+    return inner.result(), cancelled
 
-            if tool_name not in TOOLS:
-                results.append(f"Unknown tool: {tool_name}")
-                continue
 
-            try:
-                results.append(TOOLS[tool_name](**args))
-            except Exception as e:
-                results.append(f"Tool '{tool_name}' failed: {type(e).__name__}: {e}")
+async def handle_user_text_async(
+    history: List[ChatCompletionMessageParam],
+    user_text: str,
+    on_sentence: Optional[Callable[[str], Awaitable[None]]] = None,
+    history_manager: Optional[HistoryManager] = None,
+    response_cache: Optional[ResponseCache] = None,
+) -> str:
+    """
+    Streaming counterpart of handle_user_text for the asyncio pipeline.
+    Awaiting `on_sentence` lets a slow speech stage push back on the model
+    stream. Cancelling the task closes the model stream right away.
+    """
+    pending: List[str] = []
 
-        out = results[0] if len(results) == 1 else "\n".join(f"{i+1}) {r}" for i, r in enumerate(results))
-        history.append({"role": "assistant", "content": out})
-        return out
+    async def drain() -> None:
+        while pending and on_sentence:
+            await on_sentence(pending.pop(0))
+
+    # the history is only changed in worker threads that are always awaited to
+    # the end: a cancelled turn finishes its writes before the task ends, so
+    # the next turn (started once the pipeline has awaited this one) can't
+    # interleave with them
+    (turn, messages), cancelled = await _uninterruptible(asyncio.to_thread(
+        _start_turn, history, user_text, pending.append if on_sentence else None, history_manager, response_cache
+    ))
+    if messages is not None:
+        if not cancelled:
+            try:
+                async with aclosing(ask_llm_stream_async(messages)) as chunks:
+                    async for chunk in chunks:
+                        turn.feed(chunk)
+                        await drain()
+            except asyncio.CancelledError:
+                cancelled = True
+        if cancelled:
+            # calls already streamed may be running; they end (and land in the
+            # history) before the task does
+            await _uninterruptible(asyncio.to_thread(_interrupt_turn, history, turn))
+            raise asyncio.CancelledError
 
-    reply = raw
-    history.append({"role": "assistant", "content": reply})
-    return reply
+    # tools may still be running; let them finish (and land in the history)
+    # even if this turn gets cancelled meanwhile
+    out, cancelled_end = await _uninterruptible(asyncio.to_thread(_end_turn, history, turn))
+    if cancelled or cancelled_end:
+        raise asyncio.CancelledError
+    await drain()
+    return out
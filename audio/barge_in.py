@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import math
+import statistics
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from .player import PCMSink, current_sink
+
+if TYPE_CHECKING:
+    import numpy as np
+
+log = logging.getLogger("jarvis.barge_in")
+
+
+def _db(rms: float) -> float:
+    return 20.0 * math.log10(max(rms, 1e-5))
+
+
+class BargeInMonitor:
+    """
+    Listens to the microphone while speech plays and stops it as soon as the
+    user talks over it. The sink's record of what it played (block levels,
+    timestamped for when they reach the speaker) is the echo reference: the
+    playback level, scaled by the learned speaker-to-mic coupling, is
+    subtracted from the mic power, and what remains has to clear the noise
+    floor by `margin_db` for `onset_ms` to count as the user.
+    """
+
+    def __init__(
+        self,
+        on_barge_in: Optional[Callable[[], None]] = None,
+        stop: Optional[Callable[[], None]] = None,
+        sink: Optional[Callable[[], Optional[PCMSink]]] = None,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        onset_ms: int = 60,
+        margin_db: float = 10.0,
+        min_dbfs: float = -45.0,
+        max_delay_ms: int = 250,
+        settle_ms: int = 200,
+    ) -> None:
+        if stop is None:
+            from .texttospeech import stop_speaking as stop
+        self.on_barge_in = on_barge_in
+        self.stop_playback = stop
+        self.sink = sink or current_sink
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.onset = max(1, onset_ms // frame_ms)
+        self.margin_db = margin_db
+        self.min_dbfs = min_dbfs
+        self.max_delay = max_delay_ms / 1000
+        self.settle = max(1, settle_ms // frame_ms)
+        # audio kept from before the detection for recording the command
+        self.preroll_ms = onset_ms + 250
+
+        self.noise_db = min_dbfs - margin_db
+        # starts pessimistic and is learned from playback the user doesn't talk over
+        self.coupling_db = 10.0
+        self.latencies: List[float] = []
+        self._frames = 0
+        self._run = 0
+        self._onset_at = 0.0
+        self._fired = False
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def reset(self) -> None:
+        self._frames = 0
+        self._run = 0
+        self._fired = False
+
+    def _reference_db(self, sink: PCMSink, at: float) -> float:
+        window = [rms for t, rms in list(sink.levels) if at - self.max_delay - self.frame_ms / 1000 <= t <= at]
+        return _db(max(window)) if window else -100.0
+
+    def process(self, frame: np.ndarray, at: float, sink: PCMSink) -> bool:
+        """Checks one mic frame captured at `at`; True when the user starts talking."""
+        if self._fired:
+            return False
+        import numpy as np
+
+        self._frames += 1
+        x = frame.astype(np.float32) / 32768.0
+        mic_db = _db(float(np.sqrt(np.mean(x * x))) if x.size else 0.0)
+        ref_db = self._reference_db(sink, at)
+
+        # power left after taking out the expected echo (+3 dB of headroom)
+        echo_db = ref_db + self.coupling_db + 3.0
+        residual = 10 ** (mic_db / 10) - (10 ** (echo_db / 10) if ref_db > -100 else 0.0)
+        residual_db = 10 * math.log10(max(residual, 1e-10))
+
+        threshold = max(self.min_dbfs, self.noise_db + self.margin_db)
+        speech = self._frames > self.settle and residual_db >= threshold
+        if not speech:
+            if ref_db > -60:
+                # learned quickly while a reply starts, then it rises quickly and
+                # falls slowly so it stays on the loud side of the real echo
+                coupling = mic_db - ref_db
+                rate = 0.3 if coupling > self.coupling_db or self._frames <= self.settle else 0.02
+                self.coupling_db += rate * (coupling - self.coupling_db)
+            else:
+                rate = 0.3 if mic_db < self.noise_db else 0.05
+                self.noise_db += rate * (mic_db - self.noise_db)
+            self._run = 0
+            return False
+
+        if self._run == 0:
+            self._onset_at = at
+        self._run += 1
+        if self._run < self.onset:
+            return False
+        self._fired = True
+        return True
+
+    def barge_in(self, sink: PCMSink) -> float:
+        """Stops playback; returns the time from speech onset to silence."""
+        self.stop_playback()
+        # whatever the device had buffered still plays out
+        latency = time.monotonic() + sink.latency - self._onset_at
+        self.latencies.append(latency)
+        print(f"[BARGE] Interrupted after {latency * 1000:.0f} ms.")
+        if self.on_barge_in:
+            self.on_barge_in()
+        return latency
+
+    def stats(self) -> dict:
+        if not self.latencies:
+            return {"count": 0}
+        ms = sorted(x * 1000 for x in self.latencies)
+        return {
+            "count": len(ms),
+            "median_ms": round(statistics.median(ms), 1),
+            "max_ms": round(ms[-1], 1),
+        }
+
+    def start(self) -> bool:
+        if self._thread and self._thread.is_alive():
+            return True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="jarvis-barge-in", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        log.info("barge-in: %s", self.stats())
+
+    def _run_loop(self) -> None:
+        from .capture import get_capture
+
+        try:
+            reader = get_capture(self.sample_rate).reader()
+        except Exception as e:
+            print(f"[BARGE] Microphone unavailable ({e}); barge-in disabled.")
+            return
+        while not self._stop_event.is_set():
+            frame = reader.read(self.frame_len, timeout=0.5)
+            if frame is None:
+                if reader.ring.closed:
+                    return
+                continue
+            sink = self.sink()
+            if sink is None or not sink.playing:
+                self.reset()
+                continue
+            # when this frame was captured, if we are behind the live position
+            at = time.monotonic() - reader.available() / self.sample_rate
+            if self.process(frame, at, sink):
+                self.barge_in(sink)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class RingBuffer:
+    """
+    Single-writer, multi-reader ring of int16 samples. Positions are absolute
+    sample counts, so every reader keeps its own cursor. The writer never
+    waits for readers: it announces the region it is about to overwrite
+    (`_reserved`), copies, then publishes `write_pos`; a reader re-checks
+    `_reserved` after copying and retries if its slice was overwritten
+    meanwhile. The condition is only used to wake up blocked readers.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        # numpy is imported on first use, not with the module: `import main`
+        # stays cheap for text-only sessions
+        import numpy as np
+
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self.write_pos = 0
+        self._reserved = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def write(self, samples: np.ndarray) -> None:
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+        end = self.write_pos + n
+        start = end - len(samples)
+        self._reserved = end
+        i = start % self.capacity
+        first = min(len(samples), self.capacity - i)
+        self._buf[i:i + first] = samples[:first]
+        self._buf[:len(samples) - first] = samples[first:]
+        self.write_pos = end
+        with self._cond:
+            self._cond.notify_all()
+
+    def oldest(self) -> int:
+        return max(self._reserved - self.capacity, 0)
+
+    def copy(self, pos: int, n: int) -> tuple[np.ndarray, int]:
+        """Up to n samples from `pos`, clamped to what is still buffered; returns (samples, start)."""
+        while True:
+            start = max(pos, self.oldest())
+            end = min(start + n, self.write_pos)
+            if end <= start:
+                return self._buf[:0].copy(), start
+            i = start % self.capacity
+            j = i + (end - start)
+            if j <= self.capacity:
+                out = self._buf[i:j].copy()
+            else:
+                import numpy as np
+
+                out = np.concatenate((self._buf[i:], self._buf[:j - self.capacity]))
+            if start >= self.oldest():
+                return out, start
+
+    def wait_for(self, pos: int, timeout: Optional[float]) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.write_pos >= pos or self.closed, timeout)
+
+    def close(self) -> None:
+        self.closed = True
+        with self._cond:
+            self._cond.notify_all()
+
+
+class RingReader:
+    """One consumer's cursor into a RingBuffer."""
+
+    def __init__(self, ring: RingBuffer, pos: int) -> None:
+        self.ring = ring
+        self.pos = max(pos, ring.oldest())
+        self.dropped = 0
+
+    def available(self) -> int:
+        return self.ring.write_pos - self.pos
+
+    def read(self, n: int, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """Exactly n samples, blocking until they are captured; None on timeout or close."""
+        if not self.ring.wait_for(self.pos + n, timeout) or self.ring.write_pos < self.pos + n:
+            return None
+        out, start = self.ring.copy(self.pos, n)
+        if start > self.pos:
+            # fell more than a buffer behind; the oldest audio is gone
+            self.dropped += start - self.pos
+            self.pos = start
+            if len(out) < n:
+                return self.read(n, timeout)
+        self.pos = start + len(out)
+        return out
+
+    def skip_to_live(self) -> None:
+        self.pos = self.ring.write_pos
+
+
+class MicCapture:
+    """
+    Keeps one input stream open for the whole session and writes it into a
+    RingBuffer; wake word detection, VAD and STT each read it through their
+    own RingReader instead of reopening the device.
+    """
+
+    def __init__(self, sample_rate: int = 16000, seconds: float = 10.0, block_ms: int = 20) -> None:
+        self.sample_rate = sample_rate
+        self.block = sample_rate * block_ms // 1000
+        self.ring = RingBuffer(int(sample_rate * seconds))
+        self._stream = None
+
+    def start(self) -> None:
+        if self._stream is not None:
+            return
+        import sounddevice as sd
+
+        self._stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.block,
+            callback=self._callback,
+        )
+        self._stream.start()
+        print(f"[MIC] Capturing at {self.sample_rate} Hz.")
+
+    def _callback(self, indata, frames, time_info, status) -> None:
+        self.ring.write(indata[:, 0])
+
+    def reader(self, preroll_ms: int = 0) -> RingReader:
+        """A cursor at the live position, or `preroll_ms` before it."""
+        return RingReader(self.ring, self.ring.write_pos - self.sample_rate * preroll_ms // 1000)
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            finally:
+                self._stream = None
+        self.ring.close()
+
+
+_capture: Optional[MicCapture] = None
+_capture_lock = threading.Lock()
+
+
+def get_capture(sample_rate: int = 16000) -> MicCapture:
+    """The shared, already running microphone capture."""
+    global _capture
+    with _capture_lock:
+        if _capture is None:
+            _capture = MicCapture(sample_rate)
+        elif _capture.sample_rate != sample_rate:
+            raise RuntimeError(f"microphone is captured at {_capture.sample_rate} Hz, not {sample_rate} Hz")
+        _capture.start()
+        return _capture
+
+
+def stop_capture() -> None:
+    global _capture
+    with _capture_lock:
+        if _capture is not None:
+            _capture.stop()
+            _capture = None
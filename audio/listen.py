@@ -1,33 +1,55 @@
-import tempfile
-import wave
-from typing import Optional
+from __future__ import annotations
 
-import sounddevice as sd
-from openai import OpenAI
+import logging
+import threading
+from typing import Callable, List, Optional
 
-from config import load_settings
+import numpy as np
 
-_settings = load_settings()
-client = OpenAI(api_key=_settings.openai_key)
+from config import get_settings
+
+from .capture import get_capture
+from .stt_backends import STTBackend, get_backend
+from .vad import FRAME_MS, EnergyVAD
+from .wav import archive_recording, encode_wav
 
 HOTWORDS = ["джарвис", "jarvis", "эй джарвис", "hey jarvis" , "алло" , "nigga"]
 
+log = logging.getLogger("jarvis.listen")
+
+
+def record_chunk(duration_sec: float = 3.0, sample_rate: int = 16000) -> Optional[np.ndarray]:
+    reader = get_capture(sample_rate).reader()
+    return reader.read(int(duration_sec * sample_rate), timeout=duration_sec + 1.0)
+
+
+def speech_frames(audio: np.ndarray, sample_rate: int, vad: EnergyVAD) -> List[bool]:
+    n = sample_rate * FRAME_MS // 1000
+    return [vad.is_speech(audio[i:i + n]) for i in range(0, len(audio) - n + 1, n)]
+
 
-def record_chunk(duration_sec: float = 3.0, sample_rate: int = 16000) -> str:
-    frames = int(duration_sec * sample_rate)
-    audio = sd.rec(frames, samplerate=sample_rate, channels=1, dtype="int16")
-    sd.wait()
+def find_hotword(text: str) -> Optional[str]:
+    """The text after the first hotword in `text`, or None if there is none."""
+    lower = text.lower()
+    for hot in HOTWORDS:
+        idx = lower.find(hot)
+        if idx != -1:
+            return text[idx + len(hot):].strip(" ,.!?;:")
+    return None
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        path = tmp.name
 
-    with wave.open(path, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        wf.writeframes(audio.tobytes())
+def _norm(word: str) -> str:
+    return word.strip(" ,.!?;:\"'").lower()
 
-    return path
+
+def merge_transcripts(prev: List[str], new: List[str]) -> int:
+    """How many leading words of `new` repeat the end of `prev` (overlapping windows)."""
+    a = [_norm(w) for w in prev]
+    b = [_norm(w) for w in new]
+    for k in range(min(len(a), len(b)), 0, -1):
+        if a[-k:] == b[:k]:
+            return k
+    return 0
 
 
 def listen_for_command() -> Optional[str]:
@@ -36,27 +58,168 @@ def listen_for_command() -> Optional[str]:
     if a hotword is present, returns the text AFTER the hotword.
     Otherwise returns None.
     """
-    path = record_chunk(duration_sec=3.0, sample_rate=_settings.stt_sample_rate)
+    settings = get_settings()
+    audio = record_chunk(duration_sec=3.0, sample_rate=settings.stt_sample_rate)
+    if audio is None:
+        return None
+    # don't upload silence
+    speech = speech_frames(audio, settings.stt_sample_rate, EnergyVAD(min_dbfs=settings.vad_min_dbfs))
+    if sum(speech) * FRAME_MS < settings.listen_min_speech_ms:
+        return None
 
     try:
-        with open(path, "rb") as f:
-            result = client.audio.transcriptions.create(
-                model=_settings.stt_model,  # whisper-1
-                file=f,
-            )
+        text = get_backend().transcribe(audio, settings.stt_sample_rate).strip()
     except Exception:
         return None
+    if settings.audio_archive_dir:
+        wav = encode_wav(audio, settings.stt_sample_rate, name="chunk.wav")
+        archive_recording(wav, settings.audio_archive_dir, settings.audio_archive_max_files)
 
-    text = (result.text or "").strip()
     if not text:
         return None
+    return find_hotword(text)
 
-    lower = text.lower()
 
-    for hot in HOTWORDS:
-        idx = lower.find(hot)
-        if idx != -1:
-            cmd = text[idx + len(hot):].strip(" ,.!?;:")
-            return cmd or ""
+class HotwordListener:
+    """
+    Continuous hotword spotting through STT, for when no wake word engine is
+    available. The microphone is cut into windows of `window_sec` that advance
+    by `hop_sec`, so a hotword cut by one window boundary is whole in the
+    next. A window is only uploaded when its newest hop contains speech (an
+    energy gate); any speech before that was in the previous upload already.
+    Transcripts of consecutive uploads are joined on their overlapping words,
+    so a command is reported once, and is held back while the speaker is
+    still talking at the end of the window.
+    """
 
-    return None
+    def __init__(
+        self,
+        on_command: Optional[Callable[[str], None]] = None,
+        window_sec: Optional[float] = None,
+        hop_sec: Optional[float] = None,
+        min_speech_ms: Optional[int] = None,
+        sample_rate: Optional[int] = None,
+        backend: Optional[STTBackend] = None,
+    ) -> None:
+        settings = get_settings()
+        self.on_command = on_command
+        self.sample_rate = sample_rate or settings.stt_sample_rate
+        self.window_sec = window_sec or settings.listen_window_sec
+        self.hop_sec = min(hop_sec or settings.listen_hop_sec, self.window_sec)
+        self.min_speech_ms = settings.listen_min_speech_ms if min_speech_ms is None else min_speech_ms
+        self.backend = backend
+        self.vad = EnergyVAD(min_dbfs=settings.vad_min_dbfs)
+        self.window = int(self.window_sec * self.sample_rate)
+        self.hop = int(self.hop_sec * self.sample_rate)
+        self.max_hold = max(1, round(self.window_sec / self.hop_sec))
+
+        self._audio = np.zeros(0, dtype=np.int16)
+        self._pos = 0
+        self._last_upload: Optional[int] = None
+        self._words: List[str] = []
+        self._handled = 0
+        self._held = 0
+
+        self.listened = 0.0
+        self.uploaded = 0.0
+        self.uploads = 0
+        self.duplicates = 0
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def stats(self) -> dict:
+        hours = self.listened / 3600
+        return {
+            "listened_s": round(self.listened, 1),
+            "uploaded_s": round(self.uploaded, 1),
+            "uploads": self.uploads,
+            "duplicates": self.duplicates,
+            "uploaded_s_per_hour": round(self.uploaded / hours, 1) if hours else 0.0,
+        }
+
+    def step(self, hop: np.ndarray) -> Optional[str]:
+        """Feeds the next hop of audio; returns a command once one is complete."""
+        self._pos += len(hop)
+        self.listened += len(hop) / self.sample_rate
+        self._audio = np.concatenate((self._audio, hop))[-self.window:]
+
+        speech = speech_frames(hop, self.sample_rate, self.vad)
+        if sum(speech) * FRAME_MS < self.min_speech_ms:
+            # nothing new was said: a command waiting for more words is done
+            command = self._command() if self._held else None
+            self._reset()
+            return command
+
+        contiguous = self._last_upload is not None and self._pos - self._last_upload < self.window
+        if not contiguous:
+            self._reset()
+        self._last_upload = self._pos
+        self.uploads += 1
+        self.uploaded += len(self._audio) / self.sample_rate
+        try:
+            text = self._transcribe(self._audio)
+        except Exception as e:
+            log.warning("hotword transcription failed: %s", e)
+            return None
+
+        words = text.split()
+        overlap = merge_transcripts(self._words, words)
+        if words and overlap == len(words):
+            self.duplicates += 1
+        self._words += words[overlap:]
+
+        if find_hotword(" ".join(self._words[self._handled:])) is None:
+            return None
+        # still talking at the end of the window: the command may go on
+        trailing = max(1, 300 // FRAME_MS)
+        if any(speech[-trailing:]) and self._held < self.max_hold:
+            self._held += 1
+            return None
+        return self._command()
+
+    def _command(self) -> Optional[str]:
+        command = find_hotword(" ".join(self._words[self._handled:]))
+        self._handled = len(self._words)
+        self._held = 0
+        return command
+
+    def _reset(self) -> None:
+        self._words = []
+        self._handled = 0
+        self._held = 0
+
+    def _transcribe(self, audio: np.ndarray) -> str:
+        settings = get_settings()
+        text = (self.backend or get_backend()).transcribe(audio, self.sample_rate).strip()
+        if settings.audio_archive_dir:
+            wav = encode_wav(audio, self.sample_rate, name="chunk.wav")
+            archive_recording(wav, settings.audio_archive_dir, settings.audio_archive_max_files)
+        return text
+
+    def start(self) -> bool:
+        if self._thread and self._thread.is_alive():
+            return True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="jarvis-hotword", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        log.info("hotword listener: %s", self.stats())
+
+    def _run_loop(self) -> None:
+        reader = get_capture(self.sample_rate).reader()
+        print(f"[LISTEN] Listening for {', '.join(HOTWORDS[:2])}...")
+        while not self._stop_event.is_set():
+            hop = reader.read(self.hop, timeout=self.hop_sec + 1.0)
+            if hop is None:
+                if reader.ring.closed:
+                    return
+                continue
+            command = self.step(hop)
+            if command is not None and self.on_command:
+                self.on_command(command)
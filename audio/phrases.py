@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# (reply, any of these in the command, and any of these too if given);
+# checked in order, so "unmute" wins over "mute"
+_ACKS: List[Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = [
+    ("Unmuted system audio.", ("unmute", "turn on sound"), ()),
+    ("Muted system audio.", ("mute",), ("sound", "audio", "volume")),
+    ("Volume increased.", ("volume up", "turn up", "louder"), ()),
+    ("Volume decreased.", ("volume down", "turn down", "quieter", "softer"), ()),
+    ("Brightness increased.", ("brightness up", "brighter"), ()),
+    ("Brightness decreased.", ("brightness down", "dim", "dimmer"), ()),
+    ("Wi-Fi turned off.", ("wifi off", "turn off wifi"), ()),
+    ("Wi-Fi turned on.", ("wifi on", "turn on wifi"), ()),
+    ("Bluetooth turned off.", ("bluetooth off", "turn off bluetooth"), ()),
+    ("Bluetooth turned on.", ("bluetooth on", "turn on bluetooth"), ()),
+]
+
+GOODBYE = "Goodbye."
+
+FIXED_PHRASES: Tuple[str, ...] = tuple(reply for reply, _any, _also in _ACKS) + (GOODBYE,)
+
+
+def local_ack(text: str) -> Optional[str]:
+    """The fixed reply for commands the C++ side handles on its own, if any."""
+    t = text.lower()
+    for reply, triggers, also in _ACKS:
+        if any(k in t for k in triggers) and (not also or any(k in t for k in also)):
+            return reply
+    return None
+
+
+class PhraseBank:
+    """
+    Short phrases kept synthesized in memory so they play without a network
+    round trip: the fixed acknowledgements plus the replies spoken most often
+    lately. Usage is a score that halves every `half_life_days`, persisted as
+    JSON so the bank survives restarts.
+    """
+
+    def __init__(self, path: str | Path, top: int = 20, max_chars: int = 80, half_life_days: float = 7.0) -> None:
+        self.path = Path(path)
+        self.top = top
+        self.max_chars = max_chars
+        self.half_life = half_life_days * 86400
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._clips: Dict[Tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._scores = {text: (float(v[0]), float(v[1])) for text, v in data.items()}
+        except (OSError, ValueError, TypeError, IndexError, AttributeError):
+            pass
+
+    def _decayed(self, score: float, last: float, now: float) -> float:
+        return score * 0.5 ** ((now - last) / self.half_life)
+
+    def note(self, text: str) -> None:
+        """Counts one spoken reply."""
+        text = text.strip()
+        if not text or len(text) > self.max_chars:
+            return
+        now = time.time()
+        with self._lock:
+            score, last = self._scores.get(text, (0.0, now))
+            self._scores[text] = (self._decayed(score, last, now) + 1.0, now)
+            self._dirty = True
+
+    def frequent(self, min_score: float = 1.5) -> List[str]:
+        """Replies worth keeping ready, most used first."""
+        now = time.time()
+        with self._lock:
+            ranked = sorted(
+                ((self._decayed(score, last, now), text) for text, (score, last) in self._scores.items()),
+                reverse=True,
+            )
+        return [text for score, text in ranked[:self.top] if score >= min_score]
+
+    def get(self, fmt: str, text: str) -> Optional[bytes]:
+        return self._clips.get((fmt, text.strip()))
+
+    def warm(self, fmt: str, synthesize: Callable[[str], Optional[bytes]], phrases: Iterable[str]) -> int:
+        """Loads or synthesizes each phrase in `fmt`; returns how many are ready."""
+        for text in phrases:
+            key = (fmt, text.strip())
+            if key in self._clips:
+                continue
+            try:
+                data = synthesize(text)
+            except Exception as e:
+                print(f"[TTS] Could not prepare {text!r}: {e}")
+                continue
+            if data:
+                self._clips[key] = data
+        return sum(1 for f, _text in self._clips if f == fmt)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            # forget replies whose score has decayed to nothing
+            scores = {t: v for t, v in self._scores.items() if self._decayed(v[0], v[1], now) >= 0.05}
+            self._scores = scores
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(scores), encoding="utf-8")
+        os.replace(tmp, self.path)
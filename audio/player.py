@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# OpenAI's "pcm" speech format: 24 kHz, 16-bit little-endian, mono
+PCM_SAMPLE_RATE = 24000
+
+
+class PCMSink:
+    """
+    One output stream kept open for the whole session. Speech is queued as
+    raw PCM and pulled by the device callback, so playback starts with the
+    first chunk instead of after a player process and decoder have started,
+    and flush() silences it within one block.
+    """
+
+    def __init__(self, sample_rate: int = PCM_SAMPLE_RATE, block_ms: int = 20) -> None:
+        self.sample_rate = sample_rate
+        self.block = sample_rate * block_ms // 1000
+        self.played = 0
+        # (when the block reaches the speaker, its RMS) for echo suppression
+        self.levels: Deque[Tuple[float, float]] = deque(maxlen=max(1, 2000 // block_ms))
+        self._chunks: Deque[np.ndarray] = deque()
+        self._offset = 0
+        self._queued = 0
+        self._odd = b""
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stream = None
+
+    def start(self) -> None:
+        if self._stream is not None:
+            return
+        import sounddevice as sd
+
+        self._stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.block,
+            latency="low",
+            callback=self._callback,
+        )
+        self._stream.start()
+
+    def write(self, data: bytes) -> None:
+        # numpy comes with the first playback, not with `import main`
+        import numpy as np
+
+        with self._lock:
+            data = self._odd + data
+            # chunks from the network don't respect sample boundaries
+            cut = len(data) - len(data) % 2
+            self._odd = data[cut:]
+            if cut == 0:
+                return
+            samples = np.frombuffer(data[:cut], dtype="<i2")
+            self._chunks.append(samples)
+            self._queued += len(samples)
+            self._idle.clear()
+
+    def _callback(self, outdata, frames, time_info, status) -> None:
+        import numpy as np
+
+        out = outdata[:, 0]
+        filled = 0
+        with self._lock:
+            while filled < frames and self._chunks:
+                chunk = self._chunks[0]
+                n = min(frames - filled, len(chunk) - self._offset)
+                out[filled:filled + n] = chunk[self._offset:self._offset + n]
+                filled += n
+                self._offset += n
+                if self._offset == len(chunk):
+                    self._chunks.popleft()
+                    self._offset = 0
+            self._queued -= filled
+            self.played += filled
+            if not self._chunks:
+                self._idle.set()
+        out[filled:] = 0
+        rms = float(np.sqrt(np.mean(out[:filled].astype(np.float32) ** 2))) / 32768.0 if filled else 0.0
+        latency = self._stream.latency if self._stream is not None else 0.0
+        self.levels.append((time.monotonic() + latency, rms))
+
+    @property
+    def playing(self) -> bool:
+        return not self._idle.is_set()
+
+    @property
+    def latency(self) -> float:
+        return self._stream.latency if self._stream is not None else 0.0
+
+    def pending(self) -> float:
+        """Seconds of audio queued but not yet played."""
+        return self._queued / self.sample_rate
+
+    def flush(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+            self._offset = 0
+            self._queued = 0
+            self._odd = b""
+            self._idle.set()
+
+    def drain(self, cancelled: Optional[Callable[[], bool]] = None, timeout: Optional[float] = None) -> bool:
+        """Waits until everything queued has played; False if cancelled or timed out."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._idle.wait(0.02):
+            if cancelled and cancelled():
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        # the last block is still in the device buffer
+        time.sleep(self.latency)
+        return not (cancelled and cancelled())
+
+    def stop(self) -> None:
+        self.flush()
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            finally:
+                self._stream = None
+
+
+_sink: Optional[PCMSink] = None
+_sink_failed = False
+_sink_lock = threading.Lock()
+
+
+def get_sink(mode: str = "auto") -> Optional[PCMSink]:
+    """
+    The shared, running sink; None when `mode` is "ffplay" or, with "auto",
+    when no output device can be opened (callers then fall back to ffplay).
+    """
+    global _sink, _sink_failed
+    if mode == "ffplay":
+        return None
+    with _sink_lock:
+        if _sink is None and not _sink_failed:
+            sink = PCMSink()
+            try:
+                sink.start()
+            except Exception as e:
+                if mode == "device":
+                    raise
+                print(f"[TTS] No audio output stream ({e}); playing through ffplay.")
+                _sink_failed = True
+            else:
+                _sink = sink
+        return _sink
+
+
+def stop_sink() -> None:
+    global _sink
+    with _sink_lock:
+        if _sink is not None:
+            _sink.stop()
+            _sink = None
+
+
+def current_sink() -> Optional[PCMSink]:
+    """The sink if one is already open; never opens the device."""
+    with _sink_lock:
+        return _sink
+
+
+def flush_sink() -> None:
+    """Silences the sink, if one is open, without waiting for the device."""
+    sink = current_sink()
+    if sink is not None:
+        sink.flush()
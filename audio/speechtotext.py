@@ -1,59 +1,86 @@
-import tempfile
-import wave
-from typing import Optional
+from typing import Callable, Optional
 
-import sounddevice as sd
-import numpy as np
-from openai import OpenAI
+from config import get_settings
 
-from config import load_settings
+from .capture import RingReader, get_capture
+from .stt_backends import Transcript, get_backend
+from .wav import archive_recording, encode_wav
 
-_settings = load_settings()
-_client = OpenAI(api_key=_settings.openai_key)
 
-
-def _record_audio_to_wav_file(path: str, duration_sec: float, sample_rate: int) -> None:
+def _record_fixed(reader: RingReader, duration_sec: float, sample_rate: int):
     print(f"[STT] Listening for {duration_sec:.1f} seconds...")
+    return reader.read(int(duration_sec * sample_rate), timeout=duration_sec + 1.0)
+
+
+def _record_until_silence(reader: RingReader, settings, on_frame=None):
+    from .vad import record_until_silence
 
-    frames = int(duration_sec * sample_rate)
-    audio = sd.rec(frames, samplerate=sample_rate, channels=1, dtype="int16")
-    sd.wait()
+    print("[STT] Listening...")
+    audio = record_until_silence(
+        sample_rate=settings.stt_sample_rate,
+        trailing_silence_ms=settings.vad_trailing_silence_ms,
+        max_seconds=settings.vad_max_seconds,
+        start_timeout=settings.vad_start_timeout,
+        min_dbfs=settings.vad_min_dbfs,
+        reader=reader,
+        on_frame=on_frame,
+    )
+    if audio is not None:
+        print(f"[STT] Captured {len(audio) / settings.stt_sample_rate:.1f} s of speech.")
+    return audio
 
-    with wave.open(path, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)  # 16-bit
-        wf.setframerate(sample_rate)
-        wf.writeframes(audio.tobytes())
 
+def _print_partial(partial: Transcript) -> None:
+    print(f"[STT] ... {partial.text}")
 
-def transcribe_once() -> Optional[str]:
+
+def transcribe_once(
+    preroll_ms: int = 0,
+    on_partial: Optional[Callable[[Transcript], None]] = _print_partial,
+) -> Optional[str]:
+    """
+    Records one command from the shared microphone capture and transcribes
+    it with the configured backend. `preroll_ms` starts the recording slightly
+    in the past, e.g. right after a wake word so the first words are not cut
+    off. Streaming backends report partial transcripts to `on_partial`.
+    """
+    session = None
     try:
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            wav_path = tmp.name
-
-        _record_audio_to_wav_file(
-            path=wav_path,
-            duration_sec=_settings.recording_duration,
-            sample_rate=_settings.stt_sample_rate,
-        )
-
-        print("[STT] Sending audio for transcription...")
-
-        with open(wav_path, "rb") as audio_file:
-            result = _client.audio.transcriptions.create(
-                model="whisper-1", 
-                file=audio_file,
-                response_format="json",
+        settings = get_settings()
+        backend = get_backend()
+        session = backend.session(settings.stt_sample_rate, on_partial)
+        reader = get_capture(settings.stt_sample_rate).reader(preroll_ms)
+        if settings.vad_enabled:
+            # stops as soon as the speaker does instead of after recording_duration
+            audio = _record_until_silence(reader, settings, session.feed if backend.streaming else None)
+        else:
+            audio = _record_fixed(reader, settings.recording_duration, settings.stt_sample_rate)
+            if audio is not None and backend.streaming:
+                session.feed(audio)
+        if audio is None:
+            print("[STT] No speech detected.")
+            session.cancel()
+            return None
+
+        if not backend.streaming:
+            print("[STT] Sending audio for transcription...")
+        result = session.finish(audio)
+        if settings.audio_archive_dir:
+            archive_recording(
+                encode_wav(audio, settings.stt_sample_rate),
+                settings.audio_archive_dir,
+                settings.audio_archive_max_files,
             )
 
     except Exception as e:
         print(f"Speech-to-text error: {e}")
+        if session is not None:
+            session.cancel()
         return None
 
-    text = getattr(result, "text", None)
-    if not text:
+    if not result.text:
         print("[STT] Empty transcription result.")
         return None
 
-    print(f"[STT] You said: {text!r}")
-    return text.strip()
+    print(f"[STT] You said: {result.text!r} ({backend.name}, {result.latency * 1000:.0f} ms after the end of speech)")
+    return result.text
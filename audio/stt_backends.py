@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import get_settings
+
+# Speech-to-text engines behind one interface. A backend transcribes a whole
+# utterance (`transcribe`) and opens per-utterance sessions that receive audio
+# while it is being captured; streaming backends report partial transcripts
+# through `on_partial` before the final one.
+
+
+@dataclass
+class Transcript:
+    text: str
+    final: bool
+    latency: float = 0.0
+
+
+PartialCallback = Callable[[Transcript], None]
+
+
+class STTSession:
+    """Collects the utterance and transcribes it in one go when it ends."""
+
+    def __init__(self, backend: STTBackend, sample_rate: int, on_partial: Optional[PartialCallback] = None) -> None:
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        self._chunks: List[np.ndarray] = []
+
+    def feed(self, samples: np.ndarray) -> None:
+        self._chunks.append(samples)
+
+    def cancel(self) -> None:
+        """Drops the utterance without transcribing it."""
+
+    def finish(self, audio: Optional[np.ndarray] = None) -> Transcript:
+        """Final transcript; `audio` (the trimmed utterance) replaces what was fed."""
+        if audio is None:
+            audio = np.concatenate(self._chunks) if self._chunks else np.zeros(0, dtype=np.int16)
+        started = time.perf_counter()
+        text = self.backend.transcribe(audio, self.sample_rate)
+        return Transcript(text.strip(), final=True, latency=time.perf_counter() - started)
+
+
+class STTBackend:
+    name = "base"
+    streaming = False
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> str:
+        raise NotImplementedError
+
+    def session(self, sample_rate: int, on_partial: Optional[PartialCallback] = None) -> STTSession:
+        return STTSession(self, sample_rate, on_partial)
+
+
+class OpenAIBackend(STTBackend):
+    name = "openai"
+
+    def __init__(self, model: Optional[str] = None) -> None:
+        self.model = model or get_settings().stt_model
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> str:
+        from llm_client import get_client
+
+        from .wav import encode_wav
+
+        result = get_client().audio.transcriptions.create(
+            model=self.model,
+            file=encode_wav(audio, sample_rate),
+            response_format="json",
+        )
+        return getattr(result, "text", None) or ""
+
+
+class _StreamingSession(STTSession):
+    """
+    Decodes on a worker thread while audio is still arriving. Segments that
+    end more than `holdback` seconds before the newest audio are committed and
+    their audio dropped, so every pass (and the final one) only decodes the
+    uncommitted tail.
+    """
+
+    def __init__(
+        self,
+        backend: LocalWhisperBackend,
+        sample_rate: int,
+        on_partial: Optional[PartialCallback],
+        interval: float,
+        holdback: float = 1.0,
+    ) -> None:
+        super().__init__(backend, sample_rate, on_partial)
+        self.whisper = backend
+        self.interval = interval
+        self.holdback = holdback
+        self._audio = np.zeros(0, dtype=np.int16)
+        self._committed: List[str] = []
+        self._decoded_upto = 0
+        self._fed = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="jarvis-stt", daemon=True)
+        self._worker.start()
+
+    def feed(self, samples: np.ndarray) -> None:
+        with self._lock:
+            self._fed = True
+            self._audio = np.concatenate((self._audio, samples))
+            pending = len(self._audio) - self._decoded_upto
+        if pending >= self.interval * self.sample_rate:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            with self._lock:
+                audio = self._audio
+                self._decoded_upto = len(audio)
+            segments = self.whisper.segments(audio, self.sample_rate)
+            horizon = len(audio) / self.sample_rate - self.holdback
+            stable = [s for s in segments if s[1] <= horizon]
+            if stable:
+                cut = int(stable[-1][1] * self.sample_rate)
+                with self._lock:
+                    self._committed.extend(text for _start, _end, text in stable)
+                    self._audio = self._audio[cut:]
+                    self._decoded_upto = max(self._decoded_upto - cut, 0)
+            if self.on_partial:
+                text = " ".join(self._committed + [s[2] for s in segments if s not in stable])
+                self.on_partial(Transcript(text.strip(), final=False))
+
+    def cancel(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self._worker.join()
+
+    def finish(self, audio: Optional[np.ndarray] = None) -> Transcript:
+        # the trimmed utterance is only used when nothing was fed: otherwise
+        # the fed audio is already partly decoded
+        self.cancel()
+        if not self._fed and audio is not None:
+            self._audio = audio
+        started = time.perf_counter()
+        tail = [s[2] for s in self.whisper.segments(self._audio, self.sample_rate)] if len(self._audio) else []
+        text = " ".join(self._committed + tail)
+        return Transcript(text.strip(), final=True, latency=time.perf_counter() - started)
+
+
+class LocalWhisperBackend(STTBackend):
+    """faster-whisper on this machine (pip install faster-whisper); no upload."""
+
+    name = "local"
+    streaming = True
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        device: Optional[str] = None,
+        compute_type: Optional[str] = None,
+        partial_interval: Optional[float] = None,
+    ) -> None:
+        settings = get_settings()
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError("stt_backend 'local' needs the faster-whisper package") from e
+        self.partial_interval = partial_interval or settings.stt_partial_interval
+        self._model = WhisperModel(
+            model or settings.stt_local_model,
+            device=device or settings.stt_local_device,
+            compute_type=compute_type or settings.stt_local_compute_type,
+        )
+        # one decoder, shared by the streaming worker and one-shot calls
+        self._lock = threading.Lock()
+
+    def segments(self, audio: np.ndarray, sample_rate: int) -> List[tuple]:
+        if sample_rate != 16000:
+            raise ValueError("faster-whisper expects 16 kHz audio")
+        with self._lock:
+            segments, _info = self._model.transcribe(
+                audio.astype(np.float32) / 32768.0,
+                beam_size=1,
+                condition_on_previous_text=False,
+            )
+            return [(s.start, s.end, s.text.strip()) for s in segments]
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> str:
+        return " ".join(text for _start, _end, text in self.segments(audio, sample_rate))
+
+    def session(self, sample_rate: int, on_partial: Optional[PartialCallback] = None) -> STTSession:
+        return _StreamingSession(self, sample_rate, on_partial, self.partial_interval)
+
+
+class FakeBackend(STTBackend):
+    """
+    Deterministic stand-in for tests and offline benchmarks: cycles through
+    `transcripts`, reveals them word by word as audio arrives (one word per
+    `seconds_per_word`) and waits `latency` seconds for the final result.
+    """
+
+    name = "fake"
+    streaming = True
+
+    def __init__(
+        self,
+        transcripts: Sequence[str] = ("open firefox",),
+        latency: float = 0.0,
+        seconds_per_word: float = 0.3,
+    ) -> None:
+        self._transcripts = itertools.cycle(transcripts)
+        self.latency = latency
+        self.seconds_per_word = seconds_per_word
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return next(self._transcripts)
+
+    def session(self, sample_rate: int, on_partial: Optional[PartialCallback] = None) -> STTSession:
+        return _FakeSession(self, sample_rate, on_partial)
+
+
+class _FakeSession(STTSession):
+    def __init__(self, backend: FakeBackend, sample_rate: int, on_partial: Optional[PartialCallback]) -> None:
+        super().__init__(backend, sample_rate, on_partial)
+        self.fake = backend
+        self._text = next(backend._transcripts)
+        self._samples = 0
+        self._shown = 0
+
+    def feed(self, samples: np.ndarray) -> None:
+        self._samples += len(samples)
+        words = self._text.split()
+        spoken = self._samples / self.sample_rate / self.fake.seconds_per_word
+        shown = min(len(words), int(spoken + 1e-9))
+        if shown > self._shown:
+            self._shown = shown
+            if self.on_partial:
+                self.on_partial(Transcript(" ".join(words[:shown]), final=False))
+
+    def finish(self, audio: Optional[np.ndarray] = None) -> Transcript:
+        started = time.perf_counter()
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        return Transcript(self._text, final=True, latency=time.perf_counter() - started)
+
+
+BACKENDS: Dict[str, Callable[[], STTBackend]] = {
+    "openai": OpenAIBackend,
+    "local": LocalWhisperBackend,
+    "fake": FakeBackend,
+}
+
+_backend: Optional[STTBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> STTBackend:
+    """The backend named by `stt_backend`; falls back to OpenAI if it can't load."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = get_settings().stt_backend
+            factory = BACKENDS.get(name)
+            if factory is None:
+                print(f"[STT] Unknown stt_backend {name!r}; using openai.")
+                factory = OpenAIBackend
+            try:
+                _backend = factory()
+            except Exception as e:
+                print(f"[STT] Could not load the {name} backend ({e}); using openai.")
+                _backend = OpenAIBackend()
+        return _backend
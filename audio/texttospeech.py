@@ -1,90 +1,305 @@
-import hashlib
 import subprocess
 import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
 from pathlib import Path
-from typing import Optional
+from queue import Queue
+from typing import Callable, List, Optional, Set, Tuple
 
-from openai import OpenAI
-from config import load_settings
+from config import get_settings
+from llm_client import get_client
+from streaming import SentenceSplitter
 
+from .phrases import FIXED_PHRASES, PhraseBank
+from .player import PCMSink, flush_sink, get_sink
+from .tts_cache import TTSCache
 
-_settings = load_settings()
-client = OpenAI(api_key=_settings.openai_key)
-
-CACHE_DIR = Path(__file__).resolve().parent / "tts_cache"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 _current_proc_lock = threading.Lock()
 _current_proc: Optional[subprocess.Popen] = None
 
+# utterances are played one after another by a single worker; stop_speaking()
+# bumps the generation so everything queued before it is dropped
+_speech_queue: "Queue[Tuple[int, str, bool, Optional[List[Future]]]]" = Queue()
+_speech_generation = 0
+_speech_thread: Optional[threading.Thread] = None
+_speech_busy = threading.Event()
+
+# segments of pipelined replies are synthesized ahead of playback here
+_synth_pool: Optional[ThreadPoolExecutor] = None
+_synth_lock = threading.Lock()
+
+# formats whose clips can be concatenated into one player stream
+_PIPE_INPUT_ARGS = {
+    "mp3": [],
+    "pcm": ["-f", "s16le", "-ar", "24000", "-ac", "1"],
+}
+
+# speech downloads in flight; stop_speaking() closes them so the transfer stops too
+_open_streams: Set[object] = set()
+
+_cache: Optional[TTSCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = TTSCache(
+                Path(settings.cache_dir) / "tts",
+                max_bytes=settings.tts_cache_max_bytes,
+                max_age_days=settings.tts_cache_max_age_days,
+            )
+        return _cache
+
+
+def tts_cache_stats() -> dict:
+    return get_tts_cache().stats()
+
+
+_phrases: Optional[PhraseBank] = None
+
+
+def get_phrase_bank() -> PhraseBank:
+    global _phrases
+    with _cache_lock:
+        if _phrases is None:
+            settings = get_settings()
+            _phrases = PhraseBank(Path(settings.cache_dir) / "tts" / "phrases.json", top=settings.tts_phrase_top)
+        return _phrases
+
+
+def _phrase_clip(text: str, fmt: str) -> Optional[bytes]:
+    # not tied to a speech generation: stop_speaking() must not abort warm-up
+    settings = get_settings()
+    voice = (settings.tts_model, settings.tts_voice, fmt, text)
+    cache = get_tts_cache()
+    cached = cache.get(*voice)
+    if cached is not None:
+        return cached.read_bytes()
+    data = get_client().audio.speech.create(
+        model=settings.tts_model,
+        voice=settings.tts_voice,
+        input=text,
+        response_format=fmt,
+    ).read()
+    cache.put(*voice, data)
+    return data
 
-def _text_hash(text: str) -> str:
-    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def warm_phrases() -> Optional[threading.Thread]:
+    """Synthesizes the fixed acknowledgements and frequent replies in the background."""
+    if not get_settings().tts_phrase_bank:
+        return None
+
+    def _run() -> None:
+        bank = get_phrase_bank()
+        _sink, fmt = _output()
+        phrases = list(FIXED_PHRASES) + [p for p in bank.frequent() if p not in FIXED_PHRASES]
+        ready = bank.warm(fmt, lambda text: _phrase_clip(text, fmt), phrases)
+        print(f"[TTS] {ready} phrases ready for instant playback.")
+
+    thread = threading.Thread(target=_run, name="jarvis-phrases", daemon=True)
+    thread.start()
+    return thread
+
+
+def save_phrase_bank() -> None:
+    if _phrases is not None:
+        _phrases.save()
 
 
 def stop_speaking() -> None:
-    global _current_proc
+    global _current_proc, _speech_generation
     with _current_proc_lock:
+        _speech_generation += 1
         if _current_proc is not None:
             try:
                 _current_proc.terminate()
             except Exception:
                 pass
             _current_proc = None
+        streams = list(_open_streams)
+        _open_streams.clear()
+        # under the lock, so no stale _to_sink() write can land after it
+        flush_sink()
+    for stream in streams:
+        try:
+            stream.close()
+        except Exception:
+            pass
 
 
-def _tts_worker(text: str, streaming: bool) -> None:
+def _set_current_proc(proc: subprocess.Popen, gen: int) -> None:
     global _current_proc
+    with _current_proc_lock:
+        _current_proc = proc
+        if gen != _speech_generation:
+            # stop_speaking() ran while we were still fetching audio
+            proc.terminate()
 
-    key = _text_hash(text)
-    cache_path = CACHE_DIR / f"{key}.mp3"
 
-    # if cached file exists and we are not in streaming mode,
-    # just play it
-    if cache_path.exists() and not streaming:
-        proc = subprocess.Popen(
-            ["ffplay", "-nodisp", "-autoexit", str(cache_path)],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        with _current_proc_lock:
-            _current_proc = proc
-        proc.wait()
+def _play(proc: subprocess.Popen, gen: int) -> None:
+    global _current_proc
+    _set_current_proc(proc, gen)
+    proc.wait()
+    with _current_proc_lock:
+        if _current_proc is proc:
+            _current_proc = None
+
+
+def _play_file(path: Path, gen: int) -> None:
+    proc = subprocess.Popen(
+        ["ffplay", "-nodisp", "-autoexit", str(path)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    _play(proc, gen)
+
+
+def _play_bytes(data: bytes, gen: int) -> None:
+    # a clip the cache won't keep (empty or too big) plays from memory
+    proc = subprocess.Popen(
+        ["ffplay", "-nodisp", "-autoexit", "-"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # registered before writing so stop_speaking() can cut a long write short
+    _set_current_proc(proc, gen)
+    assert proc.stdin is not None
+    try:
+        proc.stdin.write(data)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            proc.stdin.close()
+        except Exception:
+            pass
+    _play(proc, gen)
+
+
+def _output() -> Tuple[Optional[PCMSink], str]:
+    """The persistent sink (which takes raw PCM) or None for ffplay, and the format to request."""
+    settings = get_settings()
+    sink = get_sink(settings.tts_output)
+    return sink, ("pcm" if sink is not None else settings.tts_format)
+
+
+def _to_sink(sink: PCMSink, data: bytes, gen: int) -> bool:
+    with _current_proc_lock:
+        if gen != _speech_generation:
+            return False
+        sink.write(data)
+        return True
+
+
+def _fetch_speech(text: str, fmt: str, gen: int, on_chunk: Callable[[bytes], bool]) -> bool:
+    """
+    Streams synthesized speech into `on_chunk` (which returns False to stop).
+    Returns True only if the whole clip arrived.
+    """
+    settings = get_settings()
+    resp = get_client().audio.speech.with_streaming_response.create(
+        model=settings.tts_model,
+        voice=settings.tts_voice,
+        input=text,
+        response_format=fmt,
+    )
+    with resp as r:
         with _current_proc_lock:
-            if _current_proc is proc:
-                _current_proc = None
+            if gen != _speech_generation:
+                return False
+            _open_streams.add(r)
+        try:
+            for chunk in r.iter_bytes():
+                if gen != _speech_generation:
+                    return False
+                if chunk and not on_chunk(chunk):
+                    return False
+        except Exception:
+            if gen != _speech_generation:
+                # stop_speaking() closed the response under us
+                return False
+            raise
+        finally:
+            with _current_proc_lock:
+                _open_streams.discard(r)
+    return gen == _speech_generation
+
+
+def _download(text: str, fmt: str, gen: int) -> Optional[bytes]:
+    chunks: List[bytes] = []
+
+    def _chunk(chunk: bytes) -> bool:
+        chunks.append(chunk)
+        return True
+
+    if not _fetch_speech(text, fmt, gen, _chunk):
+        return None
+    return b"".join(chunks)
+
+
+def _tts_worker(text: str, streaming: bool, gen: int) -> None:
+    global _current_proc
+
+    settings = get_settings()
+    sink, fmt = _output()
+    voice = (settings.tts_model, settings.tts_voice, fmt, text)
+    cache = get_tts_cache()
+    phrase = get_phrase_bank().get(fmt, text) if sink is not None else None
+    cached = cache.get(*voice) if phrase is None else None
+
+    if sink is not None:
+        # raw PCM goes straight to the open device as it arrives
+        if phrase is not None:
+            _to_sink(sink, phrase, gen)
+        elif cached is not None:
+            _to_sink(sink, cached.read_bytes(), gen)
+        else:
+            with cache.writer(*voice) as clip:
+                def _chunk(chunk: bytes) -> bool:
+                    clip.write(chunk)
+                    return _to_sink(sink, chunk, gen)
+
+                if _fetch_speech(text, fmt, gen, _chunk):
+                    clip.commit()
+        sink.drain(lambda: gen != _speech_generation)
         return
 
-    if streaming:
-        # request streaming response and stream bytes
-        # both into ffplay and into cache file 
-        resp = client.audio.speech.with_streaming_response.create(
-            model="gpt-4o-mini-tts",
-            voice="alloy",
-            input=text,
-        )
+    # cached clips play straight from disk in both modes
+    if cached is not None:
+        _play_file(cached, gen)
+        return
 
+    if streaming:
+        # stream bytes both into ffplay and into the cache
         proc = subprocess.Popen(
             ["ffplay", "-nodisp", "-autoexit", "-"],
             stdin=subprocess.PIPE,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
-        with _current_proc_lock:
-            _current_proc = proc
+        _set_current_proc(proc, gen)
 
         assert proc.stdin is not None
 
         try:
-            with resp as r, open(cache_path, "wb") as f:
-                for chunk in r.iter_bytes():
-                    if not chunk:
-                        continue
-                    f.write(chunk)
+            with cache.writer(*voice) as clip:
+                def _chunk(chunk: bytes) -> bool:
+                    clip.write(chunk)
                     try:
                         proc.stdin.write(chunk)
                     except BrokenPipeError:
-                        break
+                        return False
+                    return True
+
+                # a clip cut short by stop_speaking() must not be cached
+                if _fetch_speech(text, fmt, gen, _chunk):
+                    clip.commit()
         finally:
             try:
                 if proc.stdin:
@@ -97,26 +312,162 @@ def _tts_worker(text: str, streaming: bool) -> None:
                     _current_proc = None
     else:
         #non-streaming
-        speech = client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice="alloy",
-            input=text,
-        )
-        audio_bytes = speech.read()
-        with open(cache_path, "wb") as f:
-            f.write(audio_bytes)
+        data = _download(text, fmt, gen)
+        path = cache.put(*voice, data) if data else None
+        if path is not None:
+            _play_file(path, gen)
+        elif data:
+            _play_bytes(data, gen)
 
-        proc = subprocess.Popen(
-            ["ffplay", "-nodisp", "-autoexit", str(cache_path)],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        with _current_proc_lock:
-            _current_proc = proc
-        proc.wait()
-        with _current_proc_lock:
-            if _current_proc is proc:
-                _current_proc = None
+
+def split_for_speech(text: str, max_chars: int = 160) -> List[str]:
+    """Sentences, with overlong ones broken at clause boundaries."""
+    sentences: List[str] = []
+    splitter = SentenceSplitter(sentences.append)
+    splitter.feed(text)
+    splitter.flush()
+
+    out: List[str] = []
+    for sentence in sentences:
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(sep, 0, max_chars) for sep in (", ", "; ", ": ", " - ", " — "))
+            if cut <= 0:
+                cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                break
+            out.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            out.append(sentence)
+    return out
+
+
+def _synthesize(text: str, gen: int) -> Optional[bytes]:
+    if gen != _speech_generation:
+        return None
+    settings = get_settings()
+    _sink, fmt = _output()
+    voice = (settings.tts_model, settings.tts_voice, fmt, text)
+    cache = get_tts_cache()
+    cached = cache.get(*voice)
+    if cached is not None:
+        return cached.read_bytes()
+    data = _download(text, fmt, gen)
+    # every segment is its own cache entry, so common sentences are reused
+    if data:
+        cache.put(*voice, data)
+    return data
+
+
+def _pipeline_segments(text: str) -> Optional[List[str]]:
+    settings = get_settings()
+    _sink, fmt = _output()
+    if not settings.tts_pipeline or fmt not in _PIPE_INPUT_ARGS:
+        return None
+    return split_for_speech(text, settings.tts_segment_chars) or None
+
+
+def _submit_segments(segments: List[str], gen: int) -> List[Future]:
+    global _synth_pool
+    with _synth_lock:
+        if _synth_pool is None:
+            _synth_pool = ThreadPoolExecutor(
+                max_workers=get_settings().tts_workers,
+                thread_name_prefix="jarvis-tts",
+            )
+    return [_synth_pool.submit(_synthesize, segment, gen) for segment in segments]
+
+
+def _wait_segment(fut: Future, gen: int) -> Optional[bytes]:
+    while gen == _speech_generation:
+        try:
+            return fut.result(timeout=0.05) or b""
+        except FutureTimeout:
+            continue
+        except CancelledError:
+            return None
+        except Exception as e:
+            print(f"[TTS] Segment failed: {e}")
+            return b""
+    return None
+
+
+def _play_segments(futures: List[Future], gen: int) -> None:
+    """
+    Plays synthesized segments in order through the sink, or a single player
+    fed over a pipe, so there is no gap or process start between them.
+    """
+    global _current_proc
+    sink, fmt = _output()
+    proc: Optional[subprocess.Popen] = None
+    try:
+        for fut in futures:
+            data = _wait_segment(fut, gen)
+            if data is None:
+                break
+            if not data:
+                continue
+            if sink is not None:
+                if not _to_sink(sink, data, gen):
+                    break
+                continue
+            if proc is None:
+                proc = subprocess.Popen(
+                    ["ffplay", "-nodisp", "-autoexit", *_PIPE_INPUT_ARGS[fmt], "-"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                _set_current_proc(proc, gen)
+            try:
+                assert proc.stdin is not None
+                proc.stdin.write(data)
+                proc.stdin.flush()
+            except (BrokenPipeError, ValueError):
+                break
+    finally:
+        # stop_speaking() or a failure: nothing queued behind us is needed
+        for fut in futures:
+            fut.cancel()
+        if sink is not None:
+            sink.drain(lambda: gen != _speech_generation)
+        if proc is not None:
+            try:
+                if proc.stdin:
+                    proc.stdin.close()
+            except Exception:
+                pass
+            proc.wait()
+            with _current_proc_lock:
+                if _current_proc is proc:
+                    _current_proc = None
+
+
+def _speech_loop() -> None:
+    while True:
+        gen, text, streaming, futures = _speech_queue.get()
+        if gen != _speech_generation:
+            for fut in futures or []:
+                fut.cancel()
+            continue
+        _speech_busy.set()
+        try:
+            if futures is not None:
+                _play_segments(futures, gen)
+            else:
+                _tts_worker(text, streaming, gen)
+        except Exception as e:
+            print(f"[TTS] Speech failed: {e}")
+        finally:
+            _speech_busy.clear()
+
+
+def _ensure_speech_thread() -> None:
+    global _speech_thread
+    with _current_proc_lock:
+        if _speech_thread is None or not _speech_thread.is_alive():
+            _speech_thread = threading.Thread(target=_speech_loop, daemon=True)
+            _speech_thread.start()
 
 
 def looks_like_code(text: str) -> bool:
@@ -132,7 +483,11 @@ def looks_like_code(text: str) -> bool:
     return False
 
 
-def speak(text: str, streaming: bool = True) -> None:
+def speak(text: str, streaming: bool = True, interrupt: bool = True) -> None:
+    """
+    Speaks `text` in the background. With `interrupt=False` it is queued after
+    whatever is already playing (used for sentence-by-sentence replies).
+    """
     if not text.strip():
         return
 
@@ -142,11 +497,38 @@ def speak(text: str, streaming: bool = True) -> None:
         return
 
     # stop any current speech first, so we can interrupt
-    stop_speaking()
+    if interrupt:
+        stop_speaking()
 
-    thread = threading.Thread(
-        target=_tts_worker,
-        args=(text, streaming),
-        daemon=True,
-    )
-    thread.start()
+    if get_settings().tts_phrase_bank:
+        get_phrase_bank().note(text)
+
+    _ensure_speech_thread()
+    gen = _speech_generation
+    futures = None
+    segments = _pipeline_segments(text)
+    # synthesize ahead when there is more than one segment, or when something
+    # is still playing that this reply has to wait for anyway
+    if segments and (len(segments) > 1 or _speech_busy.is_set() or not _speech_queue.empty()):
+        futures = _submit_segments(segments, gen)
+    _speech_queue.put((gen, text, streaming, futures))
+
+
+def speak_blocking(text: str, streaming: bool = True) -> None:
+    """
+    Speaks `text` in the calling thread and returns once playback ends or
+    stop_speaking() interrupts it.
+    """
+    if not text.strip():
+        return
+
+    if looks_like_code(text):
+        print(text)
+        return
+
+    gen = _speech_generation
+    segments = _pipeline_segments(text)
+    if segments and len(segments) > 1:
+        _play_segments(_submit_segments(segments, gen), gen)
+    else:
+        _tts_worker(text, streaming, gen)
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+
+class TTSCache:
+    """
+    Synthesized speech on disk, indexed in sqlite by (model, voice, format,
+    text). Clips are written to a temp file and renamed into place only when
+    complete, so an interrupted stream never becomes a cache entry. Entries
+    unused for `max_age_days` are dropped, then least-recently-used ones until
+    the total size fits `max_bytes`.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 50_000_000, max_age_days: float = 30.0) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.directory / "index.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS clips ("
+            " key TEXT PRIMARY KEY, file TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.commit()
+        # leftovers of writes that never finished (crash, kill -9)
+        for stale in self.directory.glob(".tmp-*"):
+            stale.unlink(missing_ok=True)
+
+    @staticmethod
+    def make_key(model: str, voice: str, fmt: str, text: str) -> str:
+        return hashlib.sha1("\0".join((model, voice, fmt, text)).encode("utf-8")).hexdigest()
+
+    def get(self, model: str, voice: str, fmt: str, text: str) -> Optional[Path]:
+        key = self.make_key(model, voice, fmt, text)
+        with self._lock:
+            row = self._db.execute("SELECT file, size FROM clips WHERE key = ?", (key,)).fetchone()
+            path = self.directory / row[0] if row else None
+            if path is not None and (not path.exists() or path.stat().st_size != row[1]):
+                self._db.execute("DELETE FROM clips WHERE key = ?", (key,))
+                self._db.commit()
+                path = None
+            if path is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE clips SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return path
+
+    def writer(self, model: str, voice: str, fmt: str, text: str) -> "ClipWriter":
+        return ClipWriter(self, self.make_key(model, voice, fmt, text), fmt)
+
+    def put(self, model: str, voice: str, fmt: str, text: str, data: bytes) -> Optional[Path]:
+        with self.writer(model, voice, fmt, text) as clip:
+            clip.write(data)
+            return clip.commit()
+
+    def _add(self, key: str, tmp: Path, fmt: str) -> Optional[Path]:
+        size = tmp.stat().st_size
+        if size == 0 or size > self.max_bytes:
+            tmp.unlink(missing_ok=True)
+            return None
+        name = f"{key}.{fmt}"
+        path = self.directory / name
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO clips (key, file, size, created, last_used, hits) VALUES (?, ?, ?, ?, ?, 0)",
+                (key, name, size, now, now),
+            )
+            self._evict(keep=key)
+            self._db.commit()
+        return path
+
+    def _evict(self, keep: str) -> None:
+        cutoff = time.time() - self.max_age
+        doomed = self._db.execute(
+            "SELECT key, file FROM clips WHERE last_used < ? AND key != ?", (cutoff, keep)
+        ).fetchall()
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM clips WHERE last_used >= ?", (cutoff,)).fetchone()[0]
+        if total > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, file, size FROM clips WHERE last_used >= ? AND key != ? ORDER BY last_used ASC",
+                (cutoff, keep),
+            ).fetchall()
+            for key, name, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key, name))
+                total -= size
+        for key, name in doomed:
+            self._db.execute("DELETE FROM clips WHERE key = ?", (key,))
+            (self.directory / name).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM clips").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class ClipWriter:
+    """Temp file for one clip; only commit() turns it into a cache entry."""
+
+    def __init__(self, cache: TTSCache, key: str, fmt: str) -> None:
+        self.cache = cache
+        self.key = key
+        self.fmt = fmt
+        self.tmp = cache.directory / f".tmp-{key}-{uuid.uuid4().hex}"
+        self._file = open(self.tmp, "wb")
+        self.path: Optional[Path] = None
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def commit(self) -> Optional[Path]:
+        self._file.close()
+        self.path = self.cache._add(self.key, self.tmp, self.fmt)
+        return self.path
+
+    def __enter__(self) -> "ClipWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if not self._file.closed:
+            self._file.close()
+        if self.path is None:
+            self.tmp.unlink(missing_ok=True)
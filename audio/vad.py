@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Iterable, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .capture import RingReader
+
+FRAME_MS = 30
+
+
+def frame_features(frame: np.ndarray) -> tuple[float, float]:
+    """(level in dBFS, zero-crossing rate) of one int16 frame."""
+    if frame.size == 0:
+        return -100.0, 0.0
+    x = frame.astype(np.float32) / 32768.0
+    rms = float(np.sqrt(np.mean(x * x)))
+    signs = np.signbit(x)
+    zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / max(x.size - 1, 1)
+    return 20.0 * math.log10(max(rms, 1e-5)), zcr
+
+
+class EnergyVAD:
+    """
+    Frame classifier: speech is louder than the tracked noise floor by
+    `margin_db`. Frames with a noise-like zero-crossing rate (hiss, fans) only
+    count when they are clearly loud, which keeps fricatives but not static.
+    """
+
+    def __init__(
+        self,
+        min_dbfs: float = -50.0,
+        margin_db: float = 10.0,
+        max_zcr: float = 0.35,
+    ) -> None:
+        self.min_dbfs = min_dbfs
+        self.margin_db = margin_db
+        self.max_zcr = max_zcr
+        self.noise_db = min_dbfs - margin_db
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        db, zcr = frame_features(frame)
+        threshold = max(self.min_dbfs, self.noise_db + self.margin_db)
+        speech = db >= threshold and (zcr <= self.max_zcr or db >= threshold + self.margin_db)
+        if not speech:
+            # follow the floor down quickly and up slowly
+            rate = 0.3 if db < self.noise_db else 0.05
+            self.noise_db += rate * (db - self.noise_db)
+        return speech
+
+
+class Endpointer:
+    """
+    Cuts one utterance out of a stream of fixed-size frames: recording starts
+    at speech onset (a few consecutive speech frames) and ends after
+    `trailing_silence_ms` of silence, after `max_seconds` of audio, or after
+    `start_timeout` seconds without any speech. Leading and trailing silence
+    is trimmed down to `padding_ms`. `on_frame` receives every frame of the
+    utterance (untrimmed) as it joins it, from the onset on.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        trailing_silence_ms: int = 700,
+        max_seconds: float = 10.0,
+        start_timeout: float = 5.0,
+        onset_ms: int = 90,
+        padding_ms: int = 200,
+        vad: Optional[EnergyVAD] = None,
+        on_frame: Optional[Callable[[np.ndarray], None]] = None,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.on_frame = on_frame
+        self.frame_len = sample_rate * FRAME_MS // 1000
+        self.vad = vad or EnergyVAD()
+        self._onset = max(1, onset_ms // FRAME_MS)
+        self._padding = max(0, padding_ms // FRAME_MS)
+        self._trailing = max(1, trailing_silence_ms // FRAME_MS)
+        self._max_frames = max(1, int(max_seconds * 1000) // FRAME_MS)
+        self._start_timeout = max(1, int(start_timeout * 1000) // FRAME_MS)
+
+        self._preroll: Deque[np.ndarray] = deque(maxlen=self._padding + self._onset)
+        self._frames: List[np.ndarray] = []
+        self._speech_run = 0
+        self._silence_run = 0
+        self._last_speech = 0
+        self._seen = 0
+        self.started = False
+        self.capped = False
+        self.done = False
+
+    def feed(self, frame: np.ndarray) -> bool:
+        """Adds one frame; returns True once the utterance is complete."""
+        if self.done:
+            return True
+        self._seen += 1
+        speech = self.vad.is_speech(frame)
+
+        if not self.started:
+            self._preroll.append(frame.copy())
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self._onset:
+                self.started = True
+                self._frames = list(self._preroll)
+                self._last_speech = len(self._frames)
+                if self.on_frame:
+                    for f in self._frames:
+                        self.on_frame(f)
+            elif self._seen >= self._start_timeout:
+                self.done = True
+            return self.done
+
+        self._frames.append(frame.copy())
+        if self.on_frame:
+            self.on_frame(self._frames[-1])
+        if speech:
+            self._silence_run = 0
+            self._last_speech = len(self._frames)
+        else:
+            self._silence_run += 1
+        if self._silence_run >= self._trailing:
+            self.done = True
+        elif len(self._frames) >= self._max_frames:
+            self.capped = self.done = True
+        return self.done
+
+    def process(self, frames: Iterable[np.ndarray]) -> Optional[np.ndarray]:
+        for frame in frames:
+            if self.feed(frame):
+                break
+        return self.audio()
+
+    def audio(self) -> Optional[np.ndarray]:
+        """The trimmed utterance as int16 samples, or None if nobody spoke."""
+        if not self.started or not self._frames:
+            return None
+        end = min(len(self._frames), self._last_speech + self._padding)
+        return np.concatenate(self._frames[:end])
+
+
+def record_until_silence(
+    sample_rate: int = 16000,
+    trailing_silence_ms: int = 700,
+    max_seconds: float = 10.0,
+    start_timeout: float = 5.0,
+    min_dbfs: float = -50.0,
+    reader: Optional[RingReader] = None,
+    on_frame: Optional[Callable[[np.ndarray], None]] = None,
+) -> Optional[np.ndarray]:
+    """
+    Reads the shared microphone capture (or `reader`) until the speaker stops.
+    `on_frame` receives the utterance while it is recorded, from the onset on.
+    """
+    if reader is None:
+        from .capture import get_capture
+
+        reader = get_capture(sample_rate).reader()
+
+    endpointer = Endpointer(
+        sample_rate=sample_rate,
+        trailing_silence_ms=trailing_silence_ms,
+        max_seconds=max_seconds,
+        start_timeout=start_timeout,
+        vad=EnergyVAD(min_dbfs=min_dbfs),
+        on_frame=on_frame,
+    )
+    while True:
+        frame = reader.read(endpointer.frame_len, timeout=1.0)
+        if frame is None:
+            print("[STT] Microphone stopped delivering audio.")
+            break
+        if endpointer.feed(frame):
+            break
+    if endpointer.capped:
+        print(f"[STT] Stopped at the {max_seconds:.0f} s limit.")
+    return endpointer.audio()
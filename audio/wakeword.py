@@ -1,19 +1,25 @@
+from __future__ import annotations
+
 import os
 import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
 
-import pvporcupine as pv
 from dotenv import load_dotenv
-from pvporcupine import Porcupine
-from pvrecorder import PvRecorder
 
+from .capture import MicCapture, RingReader, get_capture
 from .speechtotext import transcribe_once
 
+if TYPE_CHECKING:
+    from pvporcupine import Porcupine
+
 load_dotenv()
 
 
 def _first_existing(pattern: str) -> Optional[str]:
+    import pvporcupine as pv
+
     base = Path(pv.__file__).resolve().parent
     for path in base.glob(pattern):
         if path.is_file():
@@ -21,19 +27,27 @@ def _first_existing(pattern: str) -> Optional[str]:
     return None
 
 
-PICOVOICE_ACCESS_KEY = os.environ.get("PICOVOICE_ACCESS_KEY")
+@lru_cache(maxsize=None)
+def _auto_lib() -> Optional[str]:
+    # recursive glob over the package; only done when Porcupine is first created
+    return _first_existing("lib/**/libpv_porcupine.*")
 
-_ENV_LIB = os.environ.get("PICOVOICE_LIBRARY_PATH")
-_AUTO_LIB = _first_existing("lib/**/libpv_porcupine.*")
-PICOVOICE_LIBRARY_PATH = _ENV_LIB if _ENV_LIB else _AUTO_LIB
 
-_ENV_MODEL = os.environ.get("PICOVOICE_MODEL_PATH")
-_AUTO_MODEL = _first_existing("lib/common/porcupine_params.pv")
-PICOVOICE_MODEL_PATH = _ENV_MODEL if _ENV_MODEL else _AUTO_MODEL
+@lru_cache(maxsize=None)
+def _auto_model() -> Optional[str]:
+    return _first_existing("lib/common/porcupine_params.pv")
+
+
+PICOVOICE_ACCESS_KEY = os.environ.get("PICOVOICE_ACCESS_KEY")
+PICOVOICE_LIBRARY_PATH = os.environ.get("PICOVOICE_LIBRARY_PATH")
+PICOVOICE_MODEL_PATH = os.environ.get("PICOVOICE_MODEL_PATH")
 PICOVOICE_KEYWORD_PATH = os.environ.get(
     "PICOVOICE_KEYWORD_PATH",
     os.path.join("audio", "wakewords", "Jarvis_en_linux_v3_0_0.ppn"),
 )
+# audio kept from just before the detection, so a command said without a
+# pause after "Jarvis" is not clipped
+WAKE_PREROLL_MS = int(os.environ.get("JARVIS_WAKE_PREROLL_MS", "300"))
 
 
 def _create_porcupine(
@@ -43,23 +57,25 @@ def _create_porcupine(
     if not PICOVOICE_ACCESS_KEY:
         raise RuntimeError("PICOVOICE_ACCESS_KEY is not set")
 
+    import pvporcupine as pv
+
     if sensitivities is None:
         sensitivities = [0.6] * len(keyword_paths)
 
-    lib_path = PICOVOICE_LIBRARY_PATH
-    if lib_path and not Path(lib_path).exists() and _AUTO_LIB:
-        print(f"[WAKE] Provided library path {lib_path!r} missing, using {_AUTO_LIB!r}")
-        lib_path = _AUTO_LIB
+    lib_path = PICOVOICE_LIBRARY_PATH or _auto_lib()
+    if lib_path and not Path(lib_path).exists() and _auto_lib():
+        print(f"[WAKE] Provided library path {lib_path!r} missing, using {_auto_lib()!r}")
+        lib_path = _auto_lib()
     if not lib_path or not Path(lib_path).exists():
         raise RuntimeError(
             f"PICOVOICE_LIBRARY_PATH not found at {lib_path!r}. "
             "Set it in .env or export it to point at libpv_porcupine.so."
         )
 
-    model_path = PICOVOICE_MODEL_PATH
-    if model_path and not Path(model_path).exists() and _AUTO_MODEL:
-        print(f"[WAKE] Provided model path {model_path!r} missing, using {_AUTO_MODEL!r}")
-        model_path = _AUTO_MODEL
+    model_path = PICOVOICE_MODEL_PATH or _auto_model()
+    if model_path and not Path(model_path).exists() and _auto_model():
+        print(f"[WAKE] Provided model path {model_path!r} missing, using {_auto_model()!r}")
+        model_path = _auto_model()
     if not model_path or not Path(model_path).exists():
         raise RuntimeError(
             f"PICOVOICE_MODEL_PATH not found at {model_path!r}. "
@@ -75,9 +91,28 @@ def _create_porcupine(
     )
 
 
+def _wait_for_wake_word(porcupine: Porcupine, reader: RingReader, stop_event: Optional[threading.Event] = None) -> bool:
+    frame_length = porcupine.frame_length
+    while stop_event is None or not stop_event.is_set():
+        pcm = reader.read(frame_length, timeout=0.5)
+        if pcm is None:
+            if reader.ring.closed:
+                return False
+            continue
+        if porcupine.process(pcm) >= 0:
+            return True
+    return False
+
+
+def _open_capture(porcupine: Porcupine) -> MicCapture:
+    # Porcupine needs the same rate the shared capture runs at (16 kHz)
+    return get_capture(porcupine.sample_rate)
+
+
 def listen_command_after_wake(
     keyword_paths: Optional[List[str]] = None,
     sensitivities: Optional[List[float]] = None,
+    preroll_ms: int = WAKE_PREROLL_MS,
 ) -> Optional[str]:
     """
     Blocking helper: waits for the wake word once, then records a short command.
@@ -85,34 +120,23 @@ def listen_command_after_wake(
     keyword_paths = keyword_paths or [PICOVOICE_KEYWORD_PATH]
     try:
         porcupine = _create_porcupine(keyword_paths, sensitivities)
+        reader = _open_capture(porcupine).reader()
     except Exception as exc:
         print(f"[WAKE] Could not initialise Porcupine: {exc}")
         return None
 
-    recorder = PvRecorder(device_index=-1, frame_length=porcupine.frame_length)
     print("[WAKE] Listening for wake word...")
-
     try:
-        recorder.start()
-        while True:
-            pcm = recorder.read()
-            result = porcupine.process(pcm)
-            if result >= 0:
-                print("[WAKE] Wake word detected.")
-                break
+        if not _wait_for_wake_word(porcupine, reader):
+            return None
     except Exception as exc:
         print(f"[WAKE] Wake word error: {exc}")
         return None
     finally:
-        try:
-            recorder.stop()
-        except Exception:
-            pass
-        recorder.delete()
         porcupine.delete()
 
-    print("[WAKE] Listening for command...")
-    cmd = transcribe_once()
+    print("[WAKE] Wake word detected.")
+    cmd = transcribe_once(preroll_ms=preroll_ms)
     if not cmd:
         print("[WAKE] Empty command after wake word.")
         return None
@@ -122,8 +146,9 @@ def listen_command_after_wake(
 class WakeWordEngine:
     """
     Runs a background Porcupine loop and triggers a callback with the transcribed
-    command once the wake word is heard. Stops/starts around STT so the mic
-    is not held by both Porcupine and sounddevice at the same time.
+    command once the wake word is heard. Porcupine is created once and reads the
+    shared microphone capture, so the command recording starts right at the
+    detection (plus `preroll_ms` of audio from just before it).
     """
 
     def __init__(
@@ -131,10 +156,12 @@ class WakeWordEngine:
         keyword_paths: Optional[List[str]] = None,
         sensitivities: Optional[List[float]] = None,
         on_command: Optional[Callable[[str], None]] = None,
+        preroll_ms: int = WAKE_PREROLL_MS,
     ) -> None:
         self.keyword_paths = keyword_paths or [PICOVOICE_KEYWORD_PATH]
         self.sensitivities = sensitivities
         self.on_command = on_command
+        self.preroll_ms = preroll_ms
 
         self.enabled = bool(PICOVOICE_ACCESS_KEY)
         self._stop_event = threading.Event()
@@ -162,57 +189,37 @@ class WakeWordEngine:
         self.enabled = False
 
     def _run_loop(self) -> None:
-        while not self._stop_event.is_set():
-            cmd = self._listen_once()
-            if not cmd:
-                continue
-
-            if self._stop_event.is_set():
-                break
-
-            if self.on_command:
-                try:
-                    self.on_command(cmd)
-                except Exception as exc:
-                    print(f"[WAKE] on_command callback failed: {exc}")
-                    break
-
-    def _listen_once(self) -> Optional[str]:
         try:
             porcupine = _create_porcupine(self.keyword_paths, self.sensitivities)
         except Exception as exc:
             print(f"[WAKE] Could not initialise Porcupine: {exc}")
             self._stop_event.set()
-            return None
-
-        recorder = PvRecorder(device_index=-1, frame_length=porcupine.frame_length)
-        print("[WAKE] Listening for wake word...")
+            return
 
         try:
-            recorder.start()
+            reader = _open_capture(porcupine).reader()
             while not self._stop_event.is_set():
-                pcm = recorder.read()
-                result = porcupine.process(pcm)
-                if result >= 0:
-                    print("[WAKE] Wake word detected.")
+                print("[WAKE] Listening for wake word...")
+                if not _wait_for_wake_word(porcupine, reader, self._stop_event):
                     break
+                print("[WAKE] Wake word detected.")
+
+                cmd = transcribe_once(preroll_ms=self.preroll_ms)
+                # don't scan the command we just recorded for the wake word again
+                reader.skip_to_live()
+                if not cmd:
+                    print("[WAKE] Empty command after wake word.")
+                    continue
+                if self._stop_event.is_set():
+                    break
+
+                if self.on_command:
+                    try:
+                        self.on_command(cmd)
+                    except Exception as exc:
+                        print(f"[WAKE] on_command callback failed: {exc}")
+                        break
         except Exception as exc:
             print(f"[WAKE] Wake word error: {exc}")
-            return None
         finally:
-            try:
-                recorder.stop()
-            except Exception:
-                pass
-            recorder.delete()
             porcupine.delete()
-
-        if self._stop_event.is_set():
-            return None
-
-        print("[WAKE] Listening for command...")
-        cmd = transcribe_once()
-        if not cmd:
-            print("[WAKE] Empty command after wake word.")
-            return None
-        return cmd
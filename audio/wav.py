@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import io
+import struct
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int, name: str = "speech.wav") -> io.BytesIO:
+    """
+    16-bit mono WAV in memory, ready to be passed as `file=` to the API. The
+    samples are copied exactly once, straight from the array's buffer.
+    """
+    pcm = np.ascontiguousarray(samples.reshape(-1), dtype="<i2")
+    data = memoryview(pcm).cast("B")
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data.nbytes, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", data.nbytes,
+    )
+    buf = io.BytesIO()
+    buf.write(header)
+    buf.write(data)
+    buf.seek(0)
+    # the SDK takes the upload file name (and so the format) from .name
+    buf.name = name
+    return buf
+
+
+def archive_recording(buf: io.BytesIO, directory: str | Path, max_files: int = 50) -> Optional[Path]:
+    """
+    Debug helper: stores a copy of the recording and keeps only the newest
+    `max_files` WAVs in the directory.
+    """
+    directory = Path(directory)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        ns = time.time_ns()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(ns // 1_000_000_000))
+        path = directory / f"{stamp}-{ns % 1_000_000_000:09d}.wav"
+        path.write_bytes(buf.getbuffer())
+        # names sort chronologically
+        old = sorted(directory.glob("*.wav"))
+        for stale in old[: max(len(old) - max_files, 0)]:
+            stale.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"[STT] Could not archive recording: {e}")
+        return None
+    return path
@@ -0,0 +1,253 @@
+import re
+from typing import List, Optional
+
+# Deterministic parser for the file-management commands described in
+# agent._EXTRA_RULES. It produces the same [{"tool": ..., "args": ...}] plans the
+# model would, or None when any part of the utterance is not understood, in which
+# case the request goes to the model as usual.
+
+_QUOTED = re.compile(r'"([^"]+)"|«([^»]+)»')
+
+_SPLIT = re.compile(
+    r"\s*[,;]\s*(?:and then |and |then |а потом |и затем |и потом |затем |потом |и )?"
+    r"|[.!?]\s+(?:and then |then |а потом |затем |потом )?"
+    r"|\s+(?:and then|and|then|а потом|и затем|и потом|затем|потом|и)\s+",
+    re.IGNORECASE,
+)
+
+_FILLER = re.compile(
+    r"^(?:(?:please|pls|jarvis|hey jarvis|could you|can you|пожалуйста|джарвис|эй джарвис)(?:[\s,]+|$))+",
+    re.IGNORECASE,
+)
+
+_IN_IT = r"(?:in it|inside it|in there|there|в ней|в нём|в нем|в него|внутри)"
+_ROOT = (
+    r"(?:in (?:the )?current (?:directory|folder|dir)|in (?:the )?project (?:root|directory|folder)|here"
+    r"|в текущей (?:директории|папке)|в корне проекта|здесь|тут)"
+)
+_DOCS = r"(?:in (?:the |my )?documents|в документах)"
+_IN_DIR = r"(?:in (?:the )?(?:folder|directory|dir)|в папке|в директории|в каталоге)\s+(?P<dir>\S+)"
+
+_LOCATION = re.compile(rf"^(?:(?P<it>{_IN_IT})|(?P<root>{_ROOT})|(?P<docs>{_DOCS})|{_IN_DIR})$", re.IGNORECASE)
+_LEAD_LOCATION = re.compile(rf"^(?:(?P<it>{_IN_IT})|(?P<root>{_ROOT})|(?P<docs>{_DOCS}))\s+", re.IGNORECASE)
+
+_MAKE_DIR = re.compile(
+    r"^(?:(?:create|make)(?: a| an| the)?(?: new| empty)? (?:folder|directory|dir)s?|mkdir"
+    r"|(?:создай|создайте|создать|сделай)(?: новую| новый| пустую)? (?:папку|папки|директорию|каталог))"
+    r"(?:\s+(?:called|named|с именем|под названием))?\s+(?P<rest>.+)$",
+    re.IGNORECASE,
+)
+_MAKE_FILE = re.compile(
+    r"^(?:(?:create|make)(?: a| an| the)?(?: new| empty)? files?|touch"
+    r"|(?:создай|создайте|создать|сделай)(?: новый| пустой| новые| пустые)? (?:файл|файлы))"
+    r"(?:\s+(?:called|named|с именем|под названием))?\s+(?P<rest>.+)$",
+    re.IGNORECASE,
+)
+_DELETE = re.compile(
+    r"^(?:delete|remove|удали|удалите|удалить)"
+    r"(?P<kind> (?:the )?(?:file|folder|directory|dir)| (?:файл|папку|директорию|каталог))?\s+(?P<rest>.+)$",
+    re.IGNORECASE,
+)
+_LAST = re.compile(
+    r"^(?:the last(?: one| file)?|last one|last file|последний(?: файл)?|последнюю|последнее)$",
+    re.IGNORECASE,
+)
+_TRANSFER = re.compile(
+    r"^(?P<verb>rename|move|copy|переименуй|переименовать|перемести|переместить|скопируй|скопировать)"
+    r"(?: (?:the )?(?:file|folder|directory)| (?:файл|папку|директорию))?"
+    r"\s+(?P<src>\S+)\s+(?:to|into|as|в|во|на)\s+(?P<dest>\S+)$",
+    re.IGNORECASE,
+)
+
+_VERB_TOOLS = {
+    "rename": "rename_path", "переименуй": "rename_path", "переименовать": "rename_path",
+    "move": "move_path", "перемести": "move_path", "переместить": "move_path",
+    "copy": "copy_path", "скопируй": "copy_path", "скопировать": "copy_path",
+}
+
+_PATH_TOKEN = re.compile(r"^[\w.~/\\-]+$", re.UNICODE)
+_NOT_NAMES = {
+    "it", "this", "that", "them", "all", "everything", "file", "files", "folder", "directory",
+    "его", "её", "ее", "это", "их", "все", "всё", "файл", "файлы", "папку", "папка",
+}
+_DOC_ALIASES = ("documents", "документы", "docs")
+
+
+class _ParseError(Exception):
+    pass
+
+
+class _State:
+    def __init__(self, quoted: List[str]) -> None:
+        self.quoted = quoted
+        self.calls: List[dict] = []
+        self.last_dir: Optional[str] = None
+        self.last_file: Optional[str] = None
+        self.base: Optional[str] = None
+        # what a verb-less continuation ("... и put.txt") adds more of
+        self.continuation: Optional[str] = None
+
+
+def _name(token: str, state: _State) -> str:
+    token = token.strip().rstrip(".,!?")
+    m = re.fullmatch(r"\x00(\d+)\x00", token)
+    if m:
+        return state.quoted[int(m.group(1))]
+    if not token or token.lower() in _NOT_NAMES or not _PATH_TOKEN.match(token):
+        raise _ParseError(token)
+    return token
+
+
+def _join(base: Optional[str], name: str) -> str:
+    lower = name.lower()
+    if not base or name.startswith(("~", "/")) or lower.split("/", 1)[0] in _DOC_ALIASES:
+        return name
+    return f"{base.rstrip('/')}/{name}"
+
+
+def _location(text: str, state: _State) -> Optional[str]:
+    m = _LOCATION.match(text)
+    if not m:
+        raise _ParseError(text)
+    if m.group("it"):
+        if state.last_dir is None:
+            raise _ParseError(text)
+        return state.last_dir
+    if m.group("docs"):
+        return "documents"
+    if m.group("dir"):
+        return _name(m.group("dir"), state)
+    return None
+
+
+def _looks_like_path(name: str) -> bool:
+    return any(c in name for c in "./\\~")
+
+
+def _names_with_location(
+    rest: str,
+    state: _State,
+    loose_first: bool = True,
+) -> tuple[List[str], Optional[str]]:
+    # "out.txt", "out.txt put.txt", "ii in the current directory", "notes в документах".
+    # Only the first name may be a plain word unless it is quoted; otherwise
+    # "create folder logs please" would also create "please".
+    words = rest.split()
+    names: List[str] = []
+    while words:
+        if names and _LOCATION.match(" ".join(words)):
+            break
+        word = words[0]
+        quoted = "\x00" in word
+        if not quoted and (names or not loose_first) and not _looks_like_path(word.rstrip(".,!?")):
+            break
+        names.append(_name(words.pop(0), state))
+    if not names:
+        raise _ParseError(rest)
+    base = state.base
+    if words:
+        base = _location(" ".join(words), state)
+    return names, base
+
+
+def _make(tool: str, rest: str, state: _State, continued: bool = False) -> None:
+    # a continuation of "create file a.txt" must itself look like a file name
+    names, base = _names_with_location(rest, state, loose_first=not continued or tool == "make_dir")
+    for name in names:
+        path = _join(base, name)
+        if tool == "make_dir":
+            state.calls.append({"tool": "make_dir", "args": {"path": path}})
+            state.last_dir = path
+        else:
+            state.calls.append({"tool": "write_file", "args": {"path": path, "content": ""}})
+            state.last_file = path
+    state.continuation = tool
+
+
+def _segment(seg: str, state: _State) -> None:
+    seg = _FILLER.sub("", seg.strip()).strip().rstrip(".!?")
+    if not seg:
+        return
+
+    # a leading "in it/в ней" applies to this segment and its continuations
+    prev_base = state.base
+    state.base = None
+    lead = _LEAD_LOCATION.match(seg)
+    if lead:
+        state.base = _location(lead.group(0).strip(), state)
+        seg = seg[lead.end():]
+
+    m = _MAKE_DIR.match(seg)
+    if m:
+        _make("make_dir", m.group("rest"), state)
+        return
+    m = _MAKE_FILE.match(seg)
+    if m:
+        _make("write_file", m.group("rest"), state)
+        return
+
+    m = _DELETE.match(seg)
+    if m:
+        rest = m.group("rest").strip()
+        if _LAST.match(rest):
+            if state.last_file is None:
+                raise _ParseError(seg)
+            path = state.last_file
+        else:
+            names, base = _names_with_location(rest, state)
+            if len(names) != 1:
+                raise _ParseError(seg)
+            # a bare "delete notes" is ambiguous; insist on a kind or a path-looking name
+            if not m.group("kind") and not any(c in names[0] for c in "./~"):
+                raise _ParseError(seg)
+            path = _join(base, names[0])
+        state.calls.append({"tool": "delete_path", "args": {"path": path}})
+        state.continuation = None
+        return
+
+    m = _TRANSFER.match(seg)
+    if m:
+        tool = _VERB_TOOLS[m.group("verb").lower()]
+        src = _join(state.base, _name(m.group("src"), state))
+        dest = _name(m.group("dest"), state)
+        if tool == "rename_path" and ("/" in dest or "\\" in dest):
+            tool = "move_path"
+        if tool == "rename_path":
+            state.calls.append({"tool": "rename_path", "args": {"path": src, "new_name": dest}})
+        else:
+            state.calls.append({"tool": tool, "args": {"src": src, "dest": dest}})
+        # after a copy "the last one" would be ambiguous (the original or the
+        # copy, which may land inside `dest`), so leave it to the model
+        state.last_file = None
+        state.continuation = None
+        return
+
+    if state.continuation and not lead:
+        state.base = prev_base
+        _make(state.continuation, seg, state, continued=True)
+        return
+
+    raise _ParseError(seg)
+
+
+def parse_command(text: str) -> Optional[List[dict]]:
+    """
+    Returns the tool plan for a file-management command, or None if the
+    utterance is not (entirely) understood and should go to the model.
+    """
+    if not text or not text.strip():
+        return None
+
+    quoted: List[str] = []
+
+    def _stash(m: re.Match) -> str:
+        quoted.append(m.group(1) or m.group(2))
+        return f"\x00{len(quoted) - 1}\x00"
+
+    state = _State(quoted)
+    try:
+        for seg in _SPLIT.split(_QUOTED.sub(_stash, text.strip())):
+            _segment(seg, state)
+    except _ParseError:
+        return None
+    return state.calls or None
@@ -1,11 +1,14 @@
 import json
 import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
+PROJECT_DIR = Path(__file__).resolve().parent
+
 
 @dataclass
 class Settings:
@@ -24,6 +27,57 @@ class Settings:
     brightness_step_percent: int = 5
     summarize_max_bytes: int = 16000
     summarize_head_lines: int = 20
+    summarize_tail_lines: int = 5
+    search_index: bool = True
+    search_index_refresh: float = 10.0
+    search_max_filesize: int = 200_000
+    search_workers: int = min(8, os.cpu_count() or 4)
+    history_token_budget: int = 6000
+    history_summary_tokens: int = 800
+    tool_workers: int = 4
+    local_command_parser: bool = True
+    tool_top_k: int = 6
+    async_pipeline: bool = False
+    cache_dir: str = str(PROJECT_DIR / "cache")
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 500
+    llm_cache_max_bytes: int = 2_000_000
+    http_max_connections: int = 10
+    http_max_keepalive: int = 5
+    http_keepalive_expiry: float = 120.0
+    http_timeout: float = 60.0
+    http_connect_timeout: float = 5.0
+    http_keepalive_interval: float = 45.0
+    vad_enabled: bool = True
+    vad_trailing_silence_ms: int = 700
+    vad_max_seconds: float = 10.0
+    vad_start_timeout: float = 5.0
+    vad_min_dbfs: float = -50.0
+    hotword_listener: bool = False
+    listen_window_sec: float = 3.0
+    listen_hop_sec: float = 1.5
+    listen_min_speech_ms: int = 150
+    barge_in: bool = True
+    barge_in_onset_ms: int = 60
+    barge_in_margin_db: float = 10.0
+    audio_archive_dir: str | None = None
+    audio_archive_max_files: int = 50
+    stt_backend: str = "openai"
+    stt_local_model: str = "base"
+    stt_local_device: str = "auto"
+    stt_local_compute_type: str = "int8"
+    stt_partial_interval: float = 1.0
+    tts_model: str = "gpt-4o-mini-tts"
+    tts_voice: str = "alloy"
+    tts_format: str = "mp3"
+    tts_cache_max_bytes: int = 50_000_000
+    tts_cache_max_age_days: float = 30.0
+    tts_pipeline: bool = True
+    tts_workers: int = 3
+    tts_segment_chars: int = 160
+    tts_output: str = "auto"
+    tts_phrase_bank: bool = True
+    tts_phrase_top: int = 20
 
 
 def _load_json_config() -> dict:
@@ -49,6 +103,18 @@ def _get_positive_int(cfg: dict, key: str, default: int) -> int:
     return val if val > 0 else default
 
 
+def _get_float(cfg: dict, key: str, default: float) -> float:
+    try:
+        return float(cfg.get(key, default))
+    except Exception:
+        return default
+
+
+def _get_positive_float(cfg: dict, key: str, default: float) -> float:
+    val = _get_float(cfg, key, default)
+    return val if val > 0 else default
+
+
 def load_settings() -> Settings:
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
@@ -83,4 +149,71 @@ def load_settings() -> Settings:
         brightness_step_percent=_get_int(cfg, "brightness_step_percent", 5),
         summarize_max_bytes=_get_positive_int(cfg, "summarize_max_bytes", 16000),
         summarize_head_lines=_get_positive_int(cfg, "summarize_head_lines", 20),
+        summarize_tail_lines=_get_int(cfg, "summarize_tail_lines", 5),
+        search_index=cfg.get("search_index", True),
+        search_index_refresh=_get_float(cfg, "search_index_refresh", 10.0),
+        search_max_filesize=_get_positive_int(cfg, "search_max_filesize", 200_000),
+        search_workers=_get_positive_int(cfg, "search_workers", min(8, os.cpu_count() or 4)),
+        history_token_budget=_get_positive_int(cfg, "history_token_budget", 6000),
+        history_summary_tokens=_get_positive_int(cfg, "history_summary_tokens", 800),
+        tool_workers=_get_positive_int(cfg, "tool_workers", 4),
+        local_command_parser=cfg.get("local_command_parser", True),
+        tool_top_k=max(_get_int(cfg, "tool_top_k", 6), 0),
+        async_pipeline=cfg.get("async_pipeline", os.getenv("JARVIS_ASYNC", "0") == "1"),
+        cache_dir=cfg.get("cache_dir", os.environ.get("JARVIS_CACHE_DIR", str(PROJECT_DIR / "cache"))),
+        llm_cache_enabled=cfg.get("llm_cache_enabled", True),
+        llm_cache_max_entries=_get_positive_int(cfg, "llm_cache_max_entries", 500),
+        llm_cache_max_bytes=_get_positive_int(cfg, "llm_cache_max_bytes", 2_000_000),
+        http_max_connections=_get_positive_int(cfg, "http_max_connections", 10),
+        http_max_keepalive=_get_positive_int(cfg, "http_max_keepalive", 5),
+        http_keepalive_expiry=_get_positive_float(cfg, "http_keepalive_expiry", 120.0),
+        http_timeout=_get_positive_float(cfg, "http_timeout", 60.0),
+        http_connect_timeout=_get_positive_float(cfg, "http_connect_timeout", 5.0),
+        # 0 turns the idle pings off
+        http_keepalive_interval=max(_get_float(cfg, "http_keepalive_interval", 45.0), 0.0),
+        vad_enabled=cfg.get("vad_enabled", os.getenv("JARVIS_VAD", "1") == "1"),
+        vad_trailing_silence_ms=_get_positive_int(cfg, "vad_trailing_silence_ms", 700),
+        vad_max_seconds=_get_positive_float(cfg, "vad_max_seconds", 10.0),
+        vad_start_timeout=_get_positive_float(cfg, "vad_start_timeout", 5.0),
+        vad_min_dbfs=_get_float(cfg, "vad_min_dbfs", -50.0),
+        hotword_listener=cfg.get("hotword_listener", os.getenv("JARVIS_HOTWORD_LISTENER", "0") == "1"),
+        listen_window_sec=_get_positive_float(cfg, "listen_window_sec", 3.0),
+        listen_hop_sec=_get_positive_float(cfg, "listen_hop_sec", 1.5),
+        listen_min_speech_ms=_get_int(cfg, "listen_min_speech_ms", 150),
+        barge_in=cfg.get("barge_in", os.getenv("JARVIS_BARGE_IN", "1") == "1"),
+        barge_in_onset_ms=_get_positive_int(cfg, "barge_in_onset_ms", 60),
+        barge_in_margin_db=_get_positive_float(cfg, "barge_in_margin_db", 10.0),
+        audio_archive_dir=cfg.get("audio_archive_dir", os.environ.get("JARVIS_AUDIO_ARCHIVE")),
+        audio_archive_max_files=_get_positive_int(cfg, "audio_archive_max_files", 50),
+        stt_model=cfg.get("stt_model", "whisper-1"),
+        stt_backend=cfg.get("stt_backend", os.environ.get("JARVIS_STT_BACKEND", "openai")),
+        stt_local_model=cfg.get("stt_local_model", "base"),
+        stt_local_device=cfg.get("stt_local_device", "auto"),
+        stt_local_compute_type=cfg.get("stt_local_compute_type", "int8"),
+        stt_partial_interval=_get_positive_float(cfg, "stt_partial_interval", 1.0),
+        tts_model=cfg.get("tts_model", "gpt-4o-mini-tts"),
+        tts_voice=cfg.get("tts_voice", "alloy"),
+        tts_format=cfg.get("tts_format", "mp3"),
+        tts_cache_max_bytes=_get_positive_int(cfg, "tts_cache_max_bytes", 50_000_000),
+        tts_cache_max_age_days=_get_positive_float(cfg, "tts_cache_max_age_days", 30.0),
+        tts_pipeline=cfg.get("tts_pipeline", True),
+        tts_workers=_get_positive_int(cfg, "tts_workers", 3),
+        tts_segment_chars=_get_positive_int(cfg, "tts_segment_chars", 160),
+        tts_output=cfg.get("tts_output", os.environ.get("JARVIS_TTS_OUTPUT", "auto")),
+        tts_phrase_bank=cfg.get("tts_phrase_bank", True),
+        tts_phrase_top=_get_int(cfg, "tts_phrase_top", 20),
     )
+
+
+_SETTINGS: Settings | None = None
+_SETTINGS_LOCK = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Process-wide settings snapshot; the config file is read on first use only."""
+    global _SETTINGS
+    if _SETTINGS is None:
+        with _SETTINGS_LOCK:
+            if _SETTINGS is None:
+                _SETTINGS = load_settings()
+    return _SETTINGS
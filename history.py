@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
+
+logger = logging.getLogger("jarvis.history")
+
+SUMMARY_HEADER = "Summary of the earlier conversation (oldest first):"
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token; close enough for budgeting without a tokenizer
+    return len(text) // 4 + 1
+
+
+def message_tokens(msg: ChatCompletionMessageParam) -> int:
+    return estimate_tokens(str(msg.get("content") or "")) + 4
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+class HistoryManager:
+    """
+    Keeps a chat history within a token budget. The system message and the most
+    recent turns are kept verbatim, older turns are rolled into a summary message
+    that is only rebuilt when something new is rolled into it.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 6000,
+        summary_tokens: int = 800,
+        keep_recent: int = 4,
+        digest_chars: int = 160,
+    ) -> None:
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.keep_recent = keep_recent
+        self.digest_chars = digest_chars
+        self.summarized_messages = 0
+        self.last_request_tokens = 0
+        self._summary_lines: List[str] = []
+        self._summary_msg: Optional[ChatCompletionMessageParam] = None
+
+    def _body_start(self, history: List[ChatCompletionMessageParam]) -> int:
+        start = 1 if history and history[0].get("role") == "system" else 0
+        if self._summary_msg is not None and len(history) > start and history[start] is self._summary_msg:
+            start += 1
+        return start
+
+    def _rebuild_summary(self) -> ChatCompletionMessageParam:
+        budget = self.summary_tokens * 4
+        size = sum(len(line) + 1 for line in self._summary_lines)
+        while len(self._summary_lines) > 1 and size > budget:
+            size -= len(self._summary_lines.pop(0)) + 1
+        content = SUMMARY_HEADER + "\n" + "\n".join(self._summary_lines)
+        return {"role": "system", "content": content}
+
+    def compact(self, history: List[ChatCompletionMessageParam]) -> int:
+        """
+        Shrinks `history` in place so it fits the budget and returns the
+        estimated size of the request in tokens.
+        """
+        start = self._body_start(history)
+        total = sum(message_tokens(m) for m in history)
+
+        # roll as if the summary were already at its cap, so adding to it
+        # cannot push the request back over the budget
+        summary_now = message_tokens(self._summary_msg) if start and history[start - 1] is self._summary_msg else 0
+        reserve = self.summary_tokens + 4 - summary_now
+
+        rolled: List[ChatCompletionMessageParam] = []
+        while total + reserve > self.token_budget and len(history) - start > self.keep_recent:
+            msg = history.pop(start)
+            total -= message_tokens(msg)
+            rolled.append(msg)
+
+        if rolled:
+            for msg in rolled:
+                content = str(msg.get("content") or "")
+                self._summary_lines.append(f"- {msg.get('role')}: {_clip(content, self.digest_chars)}")
+            self.summarized_messages += len(rolled)
+
+            has_summary = start > 0 and history[start - 1] is self._summary_msg
+            if has_summary:
+                total -= message_tokens(history[start - 1])
+            self._summary_msg = self._rebuild_summary()
+            total += message_tokens(self._summary_msg)
+            if has_summary:
+                history[start - 1] = self._summary_msg
+            else:
+                history.insert(start, self._summary_msg)
+                start += 1
+
+        # the recent window can still hold huge tool dumps (e.g. read_file);
+        # clip everything except the newest message
+        if total > self.token_budget:
+            limit = max(self.token_budget // (self.keep_recent + 1), 64) * 4
+            for i in range(start, len(history) - 1):
+                content = str(history[i].get("content") or "")
+                if len(content) > limit:
+                    clipped = content[:limit] + "\n... [trimmed]"
+                    total += estimate_tokens(clipped) - estimate_tokens(content)
+                    history[i] = {**history[i], "content": clipped}
+
+        self.last_request_tokens = total
+        logger.info(
+            "request ~%d tokens (%d messages, %d summarized)",
+            total, len(history), self.summarized_messages,
+        )
+        return total
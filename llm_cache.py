@@ -0,0 +1,122 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# words that make a request depend on earlier turns ("delete it", "open that again");
+# such requests are never answered from the cache
+CONTEXT_WORDS = {
+    "it", "its", "that", "this", "these", "those", "them", "they", "there",
+    "again", "same", "previous", "last", "above", "before", "earlier", "more",
+    "его", "её", "ее", "их", "него", "неё", "нее", "нём", "нем", "ней", "это",
+    "этот", "эту", "эти", "этого", "тот", "ту", "те", "там", "туда", "оттуда",
+    "снова", "опять", "ещё", "еще", "тоже", "последний", "последнюю", "предыдущий",
+}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_TRAILING_PUNCT = re.compile(r"[\s.!?…]+$")
+
+
+def normalize_utterance(text: str) -> str:
+    # only what can't change a tool argument goes: surrounding whitespace, runs
+    # of spaces and the sentence's closing punctuation. Anything inside the
+    # request may be file content or part of a name ("a, b", "c++", "x:y")
+    words = _TRAILING_PUNCT.sub("", text.strip()).split()
+    # only a sentence's leading capital is dropped: elsewhere case can name a
+    # different file or folder ("foo" and "Foo" on a case-sensitive filesystem)
+    if words and not any(c in words[0] for c in "/\\~"):
+        words[0] = words[0].lower()
+    return " ".join(words)
+
+
+def is_context_free(text: str) -> bool:
+    words = set(_WORD.findall(text.lower().replace("ё", "е")))
+    return bool(words) and not (words & CONTEXT_WORDS)
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw model replies keyed on the normalized utterance and a
+    hash of the system prompt. Entries are evicted least-recently-used first
+    once the entry count or total size goes over its limit.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 500, max_bytes: int = 2_000_000) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, reply TEXT NOT NULL, size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def make_key(system_prompt: str, user_text: str) -> str:
+        prompt_hash = hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()
+        return hashlib.sha1(f"{prompt_hash}\0{normalize_utterance(user_text)}".encode("utf-8")).hexdigest()
+
+    def get(self, system_prompt: str, user_text: str) -> Optional[str]:
+        key = self.make_key(system_prompt, user_text)
+        with self._lock:
+            row = self._db.execute("SELECT reply FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute(
+                "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+            self._db.commit()
+            return row[0]
+
+    def put(self, system_prompt: str, user_text: str, reply: str) -> None:
+        key = self.make_key(system_prompt, user_text)
+        size = len(reply.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, reply, size, last_used, hits) VALUES (?, ?, ?, ?, 0)",
+                (key, reply, size, time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used ASC").fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
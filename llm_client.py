@@ -1,16 +1,120 @@
-from typing import Sequence
-from openai import OpenAI
-from openai.types.chat import ChatCompletionMessageParam
-from config import load_settings
+from __future__ import annotations
 
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, Sequence
 
-_settings = load_settings()
-_client = OpenAI(api_key=_settings.openai_key)
+from config import get_settings
+from transport import get_async_http_client, get_http_client
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+    from openai.types.chat import ChatCompletionMessageParam
+
+logger = logging.getLogger("jarvis.llm")
+
+# importing openai alone takes most of a second, so the package is only
+# loaded (and the clients built) when the first request needs them
+_client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """The OpenAI client shared by chat, STT and TTS."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                _client = OpenAI(api_key=get_settings().openai_key, http_client=get_http_client())
+    return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                from openai import AsyncOpenAI
+
+                _async_client = AsyncOpenAI(
+                    api_key=get_settings().openai_key,
+                    http_client=get_async_http_client(),
+                )
+    return _async_client
+
+# token usage and latency of the most recent request
+last_usage: dict = {}
+
+
+def _record_usage(usage, started: float) -> None:
+    last_usage.clear()
+    last_usage["latency_s"] = round(time.perf_counter() - started, 3)
+    if usage is not None:
+        last_usage["prompt_tokens"] = usage.prompt_tokens
+        last_usage["completion_tokens"] = usage.completion_tokens
+    logger.info(
+        "chat request: prompt=%s completion=%s tokens, %.2fs",
+        last_usage.get("prompt_tokens"), last_usage.get("completion_tokens"), last_usage["latency_s"],
+    )
 
 
 def ask_llm(messages: Sequence[ChatCompletionMessageParam]) -> str:
-    response = _client.chat.completions.create(
-        model=_settings.chat_model,
+    started = time.perf_counter()
+    response = get_client().chat.completions.create(
+        model=get_settings().chat_model,
         messages=list(messages),
     )
+    _record_usage(response.usage, started)
     return response.choices[0].message.content or ""
+
+
+def ask_llm_stream(messages: Sequence[ChatCompletionMessageParam]) -> Iterator[str]:
+    """Yields content deltas of the reply as the model generates them."""
+    started = time.perf_counter()
+    stream = get_client().chat.completions.create(
+        model=get_settings().chat_model,
+        messages=list(messages),
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    usage = None
+    try:
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        stream.close()
+    _record_usage(usage, started)
+
+
+async def ask_llm_stream_async(messages: Sequence[ChatCompletionMessageParam]) -> AsyncIterator[str]:
+    """Async variant of ask_llm_stream; closing the generator aborts the HTTP stream."""
+    started = time.perf_counter()
+    stream = await get_async_client().chat.completions.create(
+        model=get_settings().chat_model,
+        messages=list(messages),
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    usage = None
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        await stream.close()
+    _record_usage(usage, started)
@@ -1,16 +1,33 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
 import threading
+from pathlib import Path
 from queue import Empty, Queue
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
-from openai.types.chat import ChatCompletionMessageParam
-from config import load_settings
+from config import Settings, get_settings
 from agent import handle_user_text, make_system_message
-from audio.texttospeech import speak, stop_speaking
-from audio.speechtotext import transcribe_once
+from history import HistoryManager
+from llm_cache import ResponseCache
+from transport import KeepAlive
+from audio.texttospeech import save_phrase_bank, speak, stop_speaking, tts_cache_stats, warm_phrases
+from audio.capture import stop_capture
+from audio.player import stop_sink
+from audio.phrases import GOODBYE, local_ack
 from cpp_assistant import CppAssistant
-from audio.wakeword import WakeWordEngine
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
+
+    from audio.barge_in import BargeInMonitor
+    from audio.listen import HotwordListener
+    from audio.wakeword import WakeWordEngine
+
 load_dotenv()
 EXIT_KEYWORDS = {
     "exit", "quit", "end", "stop", "bye", "пока" ,
@@ -25,35 +42,41 @@ def is_exit_phrase(text: str) -> bool:
     return any(word in lower for word in EXIT_KEYWORDS) or lower.strip() == "q"
 
 
-def _local_ack(text: str) -> str | None:
-    t = text.lower()
+def _start_wake(settings: Settings, on_command: Callable[[str], None]) -> WakeWordEngine | HotwordListener | None:
+    if not settings.use_wake_word:
+        return None
+    # the voice modules (and numpy with them) load with the first voice feature
+    from audio.listen import HotwordListener
+    from audio.wakeword import WakeWordEngine
+
+    wake = WakeWordEngine(on_command=on_command)
+    if wake.start() or not settings.hotword_listener:
+        return wake
+    # no Porcupine: spot the hotword in speech-gated STT windows instead
+    listener = HotwordListener(on_command=on_command)
+    listener.start()
+    return listener
 
-    if "unmute" in t or "turn on sound" in t:
-        return "Unmuted system audio."
-    if "mute" in t and any(k in t for k in ["sound", "audio", "volume"]):
-        return "Muted system audio."
 
-    if any(k in t for k in ["volume up", "turn up", "louder"]):
-        return "Volume increased."
-    if any(k in t for k in ["volume down", "turn down", "quieter", "softer"]):
-        return "Volume decreased."
+def _start_barge_in(settings: Settings, on_barge_in: Callable[[], None]) -> BargeInMonitor | None:
+    if not settings.barge_in:
+        return None
+    from audio.barge_in import BargeInMonitor
 
-    if any(k in t for k in ["brightness up", "brighter"]):
-        return "Brightness increased."
-    if any(k in t for k in ["brightness down", "dim", "dimmer"]):
-        return "Brightness decreased."
+    monitor = BargeInMonitor(
+        on_barge_in=on_barge_in,
+        sample_rate=settings.stt_sample_rate,
+        onset_ms=settings.barge_in_onset_ms,
+        margin_db=settings.barge_in_margin_db,
+    )
+    monitor.start()
+    return monitor
 
-    if "wifi off" in t or "turn off wifi" in t:
-        return "Wi-Fi turned off."
-    if "wifi on" in t or "turn on wifi" in t:
-        return "Wi-Fi turned on."
 
-    if "bluetooth off" in t or "turn off bluetooth" in t:
-        return "Bluetooth turned off."
-    if "bluetooth on" in t or "turn on bluetooth" in t:
-        return "Bluetooth turned on."
+def _transcribe(preroll_ms: int = 0) -> Optional[str]:
+    from audio.speechtotext import transcribe_once
 
-    return None
+    return transcribe_once(preroll_ms=preroll_ms)
 
 
 def _process_user_text(
@@ -61,37 +84,105 @@ def _process_user_text(
     cpp: CppAssistant,
     user_text: str,
     speak_back: bool = True,
+    history_manager: HistoryManager | None = None,
+    response_cache: ResponseCache | None = None,
 ) -> bool:
     if is_exit_phrase(user_text):
         stop_speaking()
         if speak_back:
-            speak("Goodbye.", streaming=True)
+            speak(GOODBYE, streaming=True)
         return True
 
     cpp.send_chunk(user_text)
 
-    ack = _local_ack(user_text)
+    ack = local_ack(user_text)
     if ack:
         print(f"AI: {ack}")
         if speak_back:
             speak(ack, streaming=True)
         return False
 
-    reply = handle_user_text(history, user_text)
-    print(f"AI: {reply}")
+    # replies are streamed: tools run as soon as they are parsed and text is
+    # spoken sentence by sentence while the model is still generating
+    on_sentence = None
     if speak_back:
-        speak(reply, streaming=True)
+        stop_speaking()
+        on_sentence = lambda s: speak(s, streaming=True, interrupt=False)
+    reply = handle_user_text(
+        history,
+        user_text,
+        stream=True,
+        on_sentence=on_sentence,
+        history_manager=history_manager,
+        response_cache=response_cache,
+    )
+    print(f"AI: {reply}")
     return False
 
 
+def _run_async_pipeline(
+    settings,
+    history: List[ChatCompletionMessageParam],
+    cpp: CppAssistant,
+    history_manager: HistoryManager,
+    response_cache: ResponseCache | None,
+) -> None:
+    from pipeline import VoicePipeline
+
+    pipeline = VoicePipeline(
+        history,
+        cpp,
+        is_exit_phrase=is_exit_phrase,
+        local_ack=local_ack,
+        history_manager=history_manager,
+        response_cache=response_cache,
+        keepalive_interval=settings.http_keepalive_interval,
+    )
+    wake = _start_wake(settings, lambda cmd: pipeline.submit("wake", cmd))
+    barge = _start_barge_in(settings, lambda: pipeline.submit("barge", None))
+    if barge:
+        pipeline.barge_in_preroll_ms = barge.preroll_ms
+    try:
+        asyncio.run(pipeline.run())
+    finally:
+        if wake:
+            wake.stop()
+        if barge:
+            barge.stop()
+        stop_capture()
+        stop_sink()
+        save_phrase_bank()
+        cpp.stop()
+        if response_cache:
+            response_cache.close()
+
+
 def main() -> None:
-    settings = load_settings()
+    settings = get_settings()
+    logging.basicConfig(level=os.environ.get("JARVIS_LOG_LEVEL", "WARNING").upper())
 
     history: List[ChatCompletionMessageParam] = [make_system_message()]
+    history_manager = HistoryManager(
+        token_budget=settings.history_token_budget,
+        summary_tokens=settings.history_summary_tokens,
+    )
+    response_cache = None
+    if settings.llm_cache_enabled:
+        response_cache = ResponseCache(
+            Path(settings.cache_dir) / "llm_responses.sqlite3",
+            max_entries=settings.llm_cache_max_entries,
+            max_bytes=settings.llm_cache_max_bytes,
+        )
 
     cpp = CppAssistant(binary_path="./assistant")
     cpp.start()
 
+    # opens the API connections in the background and keeps them warm while idle
+    keepalive = KeepAlive(settings.http_keepalive_interval)
+    keepalive.start()
+    # acknowledgements and frequent replies are synthesized ahead of time
+    warm_phrases()
+
     print("=== Local Assistant ===")
     print("Instructions:")
     print("  - Type a message and press ENTER to send text directly.")
@@ -101,15 +192,22 @@ def main() -> None:
     print("  - Say or type: exit / quit / стоп / выход (etc.) to quit.")
     print()
 
+    if settings.async_pipeline or "--async" in sys.argv[1:]:
+        try:
+            _run_async_pipeline(settings, history, cpp, history_manager, response_cache)
+        finally:
+            keepalive.stop()
+        return
+
     events: "Queue[Tuple[str, str | None]]" = Queue()
     stop_event = threading.Event()
 
-    wake = None
-    if settings.use_wake_word:
-        wake = WakeWordEngine(
-            on_command=lambda cmd: events.put(("wake", cmd)),
-        )
-        wake.start()
+    wake = _start_wake(settings, lambda cmd: events.put(("wake", cmd)))
+    # talking over a reply stops it and records what was said. The monitor
+    # keeps the microphone open, so it starts with the first voice feature:
+    # right away with a wake word, otherwise at the first voice command
+    on_barge_in = lambda: events.put(("barge", None))
+    barge = _start_barge_in(settings, on_barge_in) if wake else None
 
     def _stdin_reader() -> None:
         try:
@@ -133,25 +231,39 @@ def main() -> None:
             if source == "shutdown":
                 break
 
+            if source == "barge" and barge:
+                user_text = _transcribe(preroll_ms=barge.preroll_ms)
+                if not user_text:
+                    continue
+                print(f"[VOICE] {user_text}")
+                if _process_user_text(history, cpp, user_text, True, history_manager, response_cache):
+                    break
+                continue
+
             if source == "wake":
                 user_text = (payload or "").strip()
                 if not user_text:
                     print("[WAKE] Empty command after wake word.")
                     continue
                 print(f"[WAKE] {user_text}")
-                if _process_user_text(history, cpp, user_text):
+                if _process_user_text(
+                    history, cpp, user_text,
+                    history_manager=history_manager, response_cache=response_cache,
+                ):
                     break
                 continue
 
             user_input = payload or ""
             if is_exit_phrase(user_input):
                 stop_speaking()
-                speak("Goodbye.", streaming=True)
+                speak(GOODBYE, streaming=True)
                 break
 
             if user_input.strip() == "":
                 stop_speaking()
-                user_text = transcribe_once()
+                if barge is None:
+                    barge = _start_barge_in(settings, on_barge_in)
+                user_text = _transcribe()
                 if not user_text:
                     print("[MAIN] No transcription. Try again.")
                     continue
@@ -163,14 +275,24 @@ def main() -> None:
                 print(f"[TEXT] {user_text}")
                 speak_back = False
 
-            if _process_user_text(history, cpp, user_text, speak_back):
+            if _process_user_text(history, cpp, user_text, speak_back, history_manager, response_cache):
                 break
 
     finally:
         stop_event.set()
+        keepalive.stop()
         if wake:
             wake.stop()
+        if barge:
+            barge.stop()
+        stop_capture()
+        stop_sink()
         cpp.stop()
+        if response_cache:
+            logging.getLogger("jarvis.llm").info("response cache: %s", response_cache.stats())
+            response_cache.close()
+        logging.getLogger("jarvis.tts").info("tts cache: %s", tts_cache_stats())
+        save_phrase_bank()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from agent import handle_user_text_async
+from audio.phrases import GOODBYE
+from audio.speechtotext import transcribe_once
+from audio.texttospeech import speak_blocking, stop_speaking
+from cpp_assistant import CppAssistant
+from history import HistoryManager
+from llm_cache import ResponseCache
+from transport import keepalive_async
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
+
+
+class VoicePipeline:
+    """
+    asyncio version of the main loop. Capture, transcription, the agent and
+    speech run as separate stages joined by bounded queues:
+
+        stdin / wake word -> events -> transcribe -> utterances -> agent -> sentences -> speech
+
+    A new utterance cancels the reply in flight (model stream, pending tools
+    output and speech), so a slow request never blocks the next command.
+    """
+
+    def __init__(
+        self,
+        history: List[ChatCompletionMessageParam],
+        cpp: CppAssistant,
+        is_exit_phrase: Callable[[str], bool],
+        local_ack: Callable[[str], Optional[str]],
+        history_manager: Optional[HistoryManager] = None,
+        response_cache: Optional[ResponseCache] = None,
+        queue_size: int = 2,
+        keepalive_interval: float = 0.0,
+    ) -> None:
+        self.history = history
+        self.cpp = cpp
+        self.is_exit_phrase = is_exit_phrase
+        self.local_ack = local_ack
+        self.history_manager = history_manager
+        self.response_cache = response_cache
+        self.queue_size = queue_size
+        self.keepalive_interval = keepalive_interval
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._events: "asyncio.Queue[Tuple[str, Optional[str]]]"
+        self._utterances: "asyncio.Queue[Tuple[str, bool]]"
+        self._sentences: "asyncio.Queue[Tuple[int, str]]"
+        self._stopped: asyncio.Event
+        self._reply_task: Optional[asyncio.Task] = None
+        self._generation = 0
+        # set when a barge-in monitor feeds "barge" events
+        self.barge_in_preroll_ms = 0
+
+    def submit(self, source: str, payload: Optional[str]) -> None:
+        """
+        Thread-safe entry point for input threads (stdin, wake word). Blocks
+        while the pipeline is still busy with earlier input.
+        """
+        if self._loop is None or self._loop.is_closed():
+            return
+        fut = asyncio.run_coroutine_threadsafe(self._events.put((source, payload)), self._loop)
+        try:
+            fut.result()
+        except Exception:
+            pass
+
+    async def _interrupt(self) -> None:
+        self._generation += 1
+        stop_speaking()
+        task = self._reply_task
+        self._reply_task = None
+        if task and not task.done():
+            task.cancel()
+            # the cancelled turn still finishes its history writes; wait for
+            # them so the next turn's messages land after its own
+            await asyncio.gather(task, return_exceptions=True)
+        while not self._sentences.empty():
+            self._sentences.get_nowait()
+
+    async def _transcribe_stage(self) -> None:
+        while True:
+            source, payload = await self._events.get()
+            if source == "shutdown":
+                self._stopped.set()
+                return
+
+            if source == "wake":
+                text = (payload or "").strip()
+                if not text:
+                    print("[WAKE] Empty command after wake word.")
+                    continue
+                print(f"[WAKE] {text}")
+                await self._utterances.put((text, True))
+                continue
+
+            line = (payload or "").strip()
+            if line:
+                print(f"[TEXT] {line}")
+                await self._utterances.put((line, False))
+                continue
+
+            # voice input: whatever is being said or generated is now obsolete
+            await self._interrupt()
+            preroll_ms = self.barge_in_preroll_ms if source == "barge" else 0
+            text = await asyncio.to_thread(transcribe_once, preroll_ms)
+            if not text:
+                print("[MAIN] No transcription. Try again.")
+                continue
+            print(f"[VOICE] {text}")
+            await self._utterances.put((text, True))
+
+    async def _agent_stage(self) -> None:
+        while True:
+            text, speak_back = await self._utterances.get()
+            await self._interrupt()
+
+            if self.is_exit_phrase(text):
+                await asyncio.to_thread(speak_blocking, GOODBYE)
+                self._stopped.set()
+                return
+
+            self.cpp.send_chunk(text)
+
+            ack = self.local_ack(text)
+            if ack:
+                print(f"AI: {ack}")
+                if speak_back:
+                    await self._sentences.put((self._generation, ack))
+                continue
+
+            self._reply_task = asyncio.create_task(self._reply(text, speak_back, self._generation))
+
+    async def _reply(self, text: str, speak_back: bool, generation: int) -> None:
+        async def on_sentence(sentence: str) -> None:
+            await self._sentences.put((generation, sentence))
+
+        try:
+            reply = await handle_user_text_async(
+                self.history,
+                text,
+                on_sentence=on_sentence if speak_back else None,
+                history_manager=self.history_manager,
+                response_cache=self.response_cache,
+            )
+        except asyncio.CancelledError:
+            print("[MAIN] Reply interrupted.")
+            raise
+        except Exception as e:
+            print(f"[MAIN] Request failed: {type(e).__name__}: {e}")
+            return
+        print(f"AI: {reply}")
+
+    async def _speech_stage(self) -> None:
+        while True:
+            generation, sentence = await self._sentences.get()
+            if generation != self._generation:
+                continue
+            await asyncio.to_thread(speak_blocking, sentence)
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._events = asyncio.Queue(maxsize=self.queue_size)
+        self._utterances = asyncio.Queue(maxsize=self.queue_size)
+        self._sentences = asyncio.Queue(maxsize=self.queue_size * 4)
+        self._stopped = asyncio.Event()
+
+        def _stdin_reader() -> None:
+            try:
+                while not self._stopped.is_set():
+                    self.submit("text", input(">>> "))
+            except EOFError:
+                pass
+            finally:
+                self.submit("shutdown", None)
+
+        threading.Thread(target=_stdin_reader, daemon=True).start()
+
+        stages = [
+            asyncio.create_task(self._transcribe_stage()),
+            asyncio.create_task(self._agent_stage()),
+            asyncio.create_task(self._speech_stage()),
+            asyncio.create_task(keepalive_async(self.keepalive_interval)),
+        ]
+        try:
+            await self._stopped.wait()
+        finally:
+            await self._interrupt()
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
@@ -0,0 +1,164 @@
+import json
+import re
+from typing import Any, Callable, List, Optional
+
+
+class ToolCallStreamParser:
+    """
+    Single-pass scanner for tool calls in a model reply that may arrive in chunks.
+
+    Text outside of JSON goes to `on_text`. Every tool object is handed to `on_tool`
+    as soon as its closing brace arrives, including items of a top-level array,
+    so a multi-action plan can start executing before the reply is complete.
+    A plan wrapped in a single-key object ({"actions": [...]}) is unwrapped once
+    the object closes.
+    Each character is looked at once and each JSON span is decoded once.
+    """
+
+    def __init__(
+        self,
+        on_tool: Optional[Callable[[dict], None]] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.on_tool = on_tool
+        self.on_text = on_text
+        self.tool_calls: List[dict] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._cand: List[str] = []
+        self._stack: List[str] = []
+        self._in_str = False
+        self._esc = False
+        self._item_start: Optional[int] = None
+        self._items_emitted = 0
+
+    def _emit_text(self, text: List[str]) -> None:
+        if text and self.on_text:
+            self.on_text("".join(text))
+        text.clear()
+
+    def _emit_tool(self, obj: Any, text: List[str]) -> bool:
+        if not (isinstance(obj, dict) and "tool" in obj):
+            return False
+        self._emit_text(text)
+        self.tool_calls.append(obj)
+        if self.on_tool:
+            self.on_tool(obj)
+        return True
+
+    def _close_item(self, text: List[str]) -> None:
+        start = self._item_start
+        self._item_start = None
+        if start is None:
+            return
+        try:
+            obj = json.loads("".join(self._cand[start:]))
+        except json.JSONDecodeError:
+            return
+        if self._emit_tool(obj, text):
+            self._items_emitted += 1
+
+    def _close_candidate(self, text: List[str]) -> None:
+        if self._items_emitted:
+            self._reset()
+            return
+        raw = "".join(self._cand)
+        try:
+            data: Any = json.loads(raw)
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict) and "tool" not in data and len(data) == 1:
+            # a plan wrapped in one key, e.g. {"actions": [{"tool": ...}, ...]}
+            data = next(iter(data.values()))
+        found = self._emit_tool(data, text)
+        if isinstance(data, list):
+            for item in data:
+                found = self._emit_tool(item, text) or found
+        if not found:
+            text.append(raw)
+        self._reset()
+
+    def feed(self, chunk: str) -> None:
+        text: List[str] = []
+        for ch in chunk:
+            if not self._stack:
+                if ch in "{[":
+                    self._stack.append("}" if ch == "{" else "]")
+                    self._cand.append(ch)
+                else:
+                    text.append(ch)
+                continue
+
+            self._cand.append(ch)
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                continue
+
+            if ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                if ch == "{" and self._stack == ["]"]:
+                    self._item_start = len(self._cand) - 1
+                self._stack.append("}" if ch == "{" else "]")
+            elif ch in "}]":
+                if ch != self._stack[-1]:
+                    # not JSON after all (e.g. "[see note}"), give it back as text
+                    if not self._items_emitted:
+                        text.extend(self._cand)
+                    self._reset()
+                    continue
+                self._stack.pop()
+                if not self._stack:
+                    self._close_candidate(text)
+                elif self._stack == ["]"] and ch == "}":
+                    self._close_item(text)
+        self._emit_text(text)
+
+    def finish(self) -> None:
+        # an unterminated candidate is plain text unless it already yielded tools
+        text: List[str] = []
+        if self._stack and not self._items_emitted:
+            text.extend(self._cand)
+        self._reset()
+        self._emit_text(text)
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+class SentenceSplitter:
+    """
+    Buffers streamed text and hands out complete sentences to `on_sentence`.
+    Fenced code blocks are kept together so they can be recognised as code.
+    """
+
+    def __init__(self, on_sentence: Callable[[str], None]) -> None:
+        self.on_sentence = on_sentence
+        self._buf = ""
+
+    def feed(self, text: str) -> None:
+        if not text:
+            return
+        self._buf += text
+        last = 0
+        for m in _SENTENCE_END.finditer(self._buf):
+            if self._buf.count("```", 0, m.start()) % 2:
+                continue
+            self._emit(self._buf[last:m.start()])
+            last = m.end()
+        self._buf = self._buf[last:]
+
+    def flush(self) -> None:
+        self._emit(self._buf)
+        self._buf = ""
+
+    def _emit(self, sentence: str) -> None:
+        sentence = sentence.strip()
+        if sentence:
+            self.on_sentence(sentence)
@@ -1,4 +1,5 @@
 import importlib
+import time
 from pathlib import Path
 
 
@@ -66,3 +67,194 @@ def test_agent_extracts_embedded_json_array(monkeypatch, tmp_path):
     assert "Deleted file" in out
     assert not (Path(str(docs)) / "note.txt").exists()
 
+
+def test_agent_streaming_runs_tools_before_reply_finishes(monkeypatch, tmp_path):
+    root = tmp_path / "proj"
+    docs = tmp_path / "Docs"
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(root))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(docs))
+
+    core = importlib.import_module("tools.core")
+    importlib.reload(core)
+    agent = importlib.import_module("agent")
+    importlib.reload(agent)
+
+    def fake_stream(_history):
+        yield '[{"tool":"make_dir","args":{"path":"s"}},'
+        # the first tool must already be running before the rest arrives
+        for _ in range(100):
+            if (root / "s").is_dir():
+                break
+            time.sleep(0.01)
+        assert (root / "s").is_dir()
+        yield '{"tool":"write_file","args":{"path":"s/o.txt","content":"x"}}]'
+
+    monkeypatch.setattr(agent, "ask_llm_stream", fake_stream)
+
+    spoken = []
+    history = [agent.make_system_message()]
+    out = agent.handle_user_text(history, "make s and a file", stream=True, on_sentence=spoken.append)
+
+    assert "Directory ensured" in out
+    assert (root / "s" / "o.txt").read_text() == "x"
+    assert spoken == [out]
+
+
+def test_agent_streaming_speaks_text_sentence_by_sentence(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(tmp_path / "proj"))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+
+    agent = importlib.import_module("agent")
+    importlib.reload(agent)
+
+    spoken = []
+
+    def fake_stream(_history):
+        yield "First sentence. Sec"
+        assert spoken == ["First sentence."]
+        yield "ond one!"
+
+    monkeypatch.setattr(agent, "ask_llm_stream", fake_stream)
+
+    history = [agent.make_system_message()]
+    out = agent.handle_user_text(history, "hi", stream=True, on_sentence=spoken.append)
+
+    assert out == "First sentence. Second one!"
+    assert spoken == ["First sentence.", "Second one!"]
+    assert history[-1] == {"role": "assistant", "content": out}
+
+
+def test_agent_async_streams_and_can_be_cancelled(monkeypatch, tmp_path):
+    import asyncio
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(tmp_path / "proj"))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+
+    agent = importlib.import_module("agent")
+    importlib.reload(agent)
+
+    closed = []
+
+    async def fake_stream(_messages):
+        try:
+            yield "One. Two."
+            await asyncio.sleep(10)
+            yield " Never."
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(agent, "ask_llm_stream_async", fake_stream)
+
+    async def scenario():
+        spoken = []
+
+        async def on_sentence(s):
+            spoken.append(s)
+
+        history = [agent.make_system_message()]
+        task = asyncio.create_task(agent.handle_user_text_async(history, "count", on_sentence=on_sentence))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return spoken, history
+
+    spoken, history = asyncio.run(scenario())
+
+    assert spoken == ["One."]
+    assert closed == [True]
+    assert history[-1]["content"].endswith("[interrupted]")
+
+
+def test_agent_async_cancel_waits_for_history_writes(monkeypatch, tmp_path):
+    import asyncio
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(tmp_path / "proj"))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+
+    agent = importlib.import_module("agent")
+    importlib.reload(agent)
+
+    start_turn = agent._start_turn
+
+    def slow_start(*args):
+        time.sleep(0.3)
+        return start_turn(*args)
+
+    async def fake_stream(_messages):
+        yield '{"tool":"slow","args":{}}'
+
+    def slow_tool():
+        time.sleep(0.3)
+        return "slow done"
+
+    monkeypatch.setattr(agent, "_start_turn", slow_start)
+    monkeypatch.setattr(agent, "ask_llm_stream_async", fake_stream)
+    monkeypatch.setitem(agent.TOOLS, "slow", slow_tool)
+
+    async def cancel_after(delay):
+        history = [agent.make_system_message()]
+        task = asyncio.create_task(agent.handle_user_text_async(history, "do it"))
+        await asyncio.sleep(delay)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return [(m["role"], m["content"]) for m in history[1:]]
+
+    # cancelled while the user turn is being recorded: no orphan user message
+    assert asyncio.run(cancel_after(0.1)) == [("user", "do it"), ("assistant", " [interrupted]")]
+    # cancelled while a tool runs: its result is in the history once the task ends
+    roles = asyncio.run(cancel_after(0.45))
+    assert roles[0] == ("user", "do it") and roles[1][0] == "assistant" and "slow done" in roles[1][1]
+
+
+def test_agent_async_cancel_mid_plan_records_tools_that_ran(monkeypatch, tmp_path):
+    import asyncio
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(tmp_path / "proj"))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+
+    agent = importlib.import_module("agent")
+    importlib.reload(agent)
+    ran = []
+
+    async def fake_stream(_messages):
+        # the second call waits for the first (unknown tools run one at a time)
+        yield '[{"tool":"slow","args":{}},{"tool":"after","args":{}},'
+        await asyncio.sleep(10)
+        yield '{"tool":"never","args":{}}]'
+
+    def slow_tool():
+        time.sleep(0.3)
+        ran.append("slow")
+        return "slow done"
+
+    monkeypatch.setattr(agent, "ask_llm_stream_async", fake_stream)
+    monkeypatch.setitem(agent.TOOLS, "slow", slow_tool)
+    monkeypatch.setitem(agent.TOOLS, "after", lambda: ran.append("after") or "after done")
+
+    async def scenario():
+        history = [agent.make_system_message()]
+        task = asyncio.create_task(agent.handle_user_text_async(history, "do it"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return history
+
+    history = asyncio.run(scenario())
+
+    assert ran == ["slow"]
+    assert history[-1]["content"] == "1) slow done\n2) Skipped: the request was interrupted [interrupted]"
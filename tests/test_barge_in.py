@@ -0,0 +1,67 @@
+import numpy as np
+
+from audio.barge_in import BargeInMonitor
+from audio.player import PCMSink
+
+RATE = 16000
+FRAME = RATE * 20 // 1000
+
+
+def _tone(amplitude, freq=220, n=FRAME, phase=0):
+    t = np.arange(phase, phase + n) / RATE
+    return (np.sin(2 * np.pi * freq * t) * amplitude).astype(np.int16)
+
+
+def _monitor(stopped):
+    sink = PCMSink()
+    monitor = BargeInMonitor(stop=lambda: stopped.append(True), sink=lambda: sink, sample_rate=RATE)
+    return monitor, sink
+
+
+def _play(sink, at, rms=0.3):
+    sink.levels.append((at, rms))
+
+
+def test_own_playback_does_not_trigger():
+    stopped = []
+    monitor, sink = _monitor(stopped)
+    rng = np.random.default_rng(0)
+    for i in range(200):
+        at = i * 0.02
+        # the speaker comes back through the mic about 12 dB down, with some variation
+        level = 0.3 * (0.5 + rng.random())
+        _play(sink, at, level)
+        echo = _tone(level * 32768 * np.sqrt(2) / 4, phase=i * FRAME)
+        assert not monitor.process(echo, at, sink)
+    assert not stopped
+
+
+def test_user_talking_over_playback_stops_it_quickly():
+    stopped = []
+    monitor, sink = _monitor(stopped)
+    for i in range(50):
+        _play(sink, i * 0.02)
+        monitor.process(_tone(0.3 * 32768 * np.sqrt(2) / 4, phase=i * FRAME), i * 0.02, sink)
+
+    fired_after = None
+    for j in range(20):
+        at = (50 + j) * 0.02
+        _play(sink, at)
+        voice = _tone(0.3 * 32768 * np.sqrt(2) / 4, phase=(50 + j) * FRAME).astype(np.int32)
+        voice += _tone(12000, freq=140, phase=j * FRAME)
+        if monitor.process(np.clip(voice, -32768, 32767).astype(np.int16), at, sink):
+            fired_after = j + 1
+            break
+
+    assert fired_after == monitor.onset
+    monitor.barge_in(sink)
+    assert stopped == [True]
+    assert monitor.stats()["count"] == 1
+
+
+def test_silence_between_replies_resets_state():
+    stopped = []
+    monitor, sink = _monitor(stopped)
+    monitor._fired = True
+    monitor.reset()
+    assert monitor._frames == 0 and not monitor._fired
@@ -0,0 +1,62 @@
+import threading
+import time
+
+import numpy as np
+
+from audio.capture import RingBuffer, RingReader
+
+
+def _ramp(start, n):
+    return (np.arange(start, start + n) % 30000).astype(np.int16)
+
+
+def test_readers_see_the_same_stream_across_wraparound():
+    ring = RingBuffer(100)
+    a = RingReader(ring, 0)
+    b = RingReader(ring, 0)
+
+    got_a, got_b = [], []
+    for i in range(10):
+        ring.write(_ramp(i * 30, 30))
+        got_a.append(a.read(30, timeout=0))
+        if i % 2:
+            got_b.append(b.read(60, timeout=0))
+
+    assert np.array_equal(np.concatenate(got_a), _ramp(0, 300))
+    assert np.array_equal(np.concatenate(got_b), _ramp(0, 300))
+    assert a.dropped == b.dropped == 0
+
+
+def test_preroll_and_overrun():
+    ring = RingBuffer(100)
+    ring.write(_ramp(0, 250))
+
+    # starting 40 samples in the past
+    pre = RingReader(ring, ring.write_pos - 40)
+    assert np.array_equal(pre.read(40, timeout=0), _ramp(210, 40))
+
+    # a reader that fell behind skips to the oldest buffered sample
+    slow = RingReader(ring, 0)
+    slow.pos = 0
+    assert np.array_equal(slow.read(50, timeout=0), _ramp(150, 50))
+    assert slow.dropped == 150
+
+
+def test_read_blocks_until_enough_audio():
+    ring = RingBuffer(1000)
+    reader = RingReader(ring, 0)
+    assert reader.read(10, timeout=0.01) is None
+
+    def writer():
+        for i in range(5):
+            time.sleep(0.01)
+            ring.write(_ramp(i * 20, 20))
+
+    t = threading.Thread(target=writer)
+    t.start()
+    out = reader.read(100, timeout=2)
+    t.join()
+    assert np.array_equal(out, _ramp(0, 100))
+
+    ring.close()
+    assert reader.read(10, timeout=2) is None
@@ -0,0 +1,75 @@
+import importlib
+
+from command_parser import parse_command
+
+
+def test_parses_multi_action_russian_example():
+    calls = parse_command(
+        "создай папку ii в текущей директории, в ней создай файл out.txt и put.txt и удали последний"
+    )
+    assert calls == [
+        {"tool": "make_dir", "args": {"path": "ii"}},
+        {"tool": "write_file", "args": {"path": "ii/out.txt", "content": ""}},
+        {"tool": "write_file", "args": {"path": "ii/put.txt", "content": ""}},
+        {"tool": "delete_path", "args": {"path": "ii/put.txt"}},
+    ]
+
+
+def test_parses_english_commands():
+    assert parse_command("create folder ii, in it create files out.txt and put.txt and delete the last") == [
+        {"tool": "make_dir", "args": {"path": "ii"}},
+        {"tool": "write_file", "args": {"path": "ii/out.txt", "content": ""}},
+        {"tool": "write_file", "args": {"path": "ii/put.txt", "content": ""}},
+        {"tool": "delete_path", "args": {"path": "ii/put.txt"}},
+    ]
+    assert parse_command("delete file notes.txt") == [{"tool": "delete_path", "args": {"path": "notes.txt"}}]
+    assert parse_command("rename a.txt to b.txt") == [
+        {"tool": "rename_path", "args": {"path": "a.txt", "new_name": "b.txt"}}
+    ]
+    assert parse_command("copy a.txt to documents/") == [
+        {"tool": "copy_path", "args": {"src": "a.txt", "dest": "documents/"}}
+    ]
+    assert parse_command("перемести notes/a.txt в documents/") == [
+        {"tool": "move_path", "args": {"src": "notes/a.txt", "dest": "documents/"}}
+    ]
+    assert parse_command('create a file "my notes.txt" in documents') == [
+        {"tool": "write_file", "args": {"path": "documents/my notes.txt", "content": ""}}
+    ]
+
+
+def test_unsure_utterances_fall_through():
+    for text in [
+        "what's the weather",
+        "create folder logs please",
+        "delete notes",
+        "delete it",
+        "создай папку logs и открой её",
+        "in it create file a.txt",
+        "write then delete a doc note",
+        # the original or the copy? the model decides
+        "copy a.txt to documents/ and delete the last one",
+    ]:
+        assert parse_command(text) is None, text
+
+
+def test_agent_skips_llm_for_parsed_commands(monkeypatch, tmp_path):
+    root = tmp_path / "proj"
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(root))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+
+    core = importlib.import_module("tools.core")
+    importlib.reload(core)
+    agent = importlib.import_module("agent")
+    importlib.reload(agent)
+
+    def no_llm(_history):
+        raise AssertionError("LLM must not be called")
+
+    monkeypatch.setattr(agent, "ask_llm", no_llm)
+    history = [agent.make_system_message()]
+    out = agent.handle_user_text(history, "create folder ii, in it create file out.txt")
+
+    assert "Directory ensured" in out and "Wrote to" in out
+    assert (root / "ii" / "out.txt").exists()
+    assert history[-1]["content"] == out
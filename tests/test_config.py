@@ -47,3 +47,37 @@ def test_load_settings_defaults(monkeypatch, tmp_path):
     assert settings.brightness_step_percent == 5
     assert settings.app_commands["browser"] == "firefox"
     assert settings.app_commands["telegram"] == "telegram-desktop"
+
+
+def test_get_settings_is_cached(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    cfg_path = tmp_path / "jarvis.config.json"
+    monkeypatch.setenv("JARVIS_CONFIG", str(cfg_path))
+
+    config = importlib.import_module("config")
+    importlib.reload(config)
+    first = config.get_settings()
+
+    cfg_path.write_text(json.dumps({"tool_workers": 9}))
+    assert config.get_settings() is first
+    assert config.get_settings().tool_workers == 4
+    assert config.load_settings().tool_workers == 9
+
+
+def test_import_is_lazy(tmp_path):
+    # the agent must import without an API key and without loading openai
+    import subprocess
+    import sys
+
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    env["JARVIS_CONFIG"] = str(tmp_path / "nope.json")
+    code = "import sys, agent, llm_client; print('openai' in sys.modules)"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,70 @@
+import importlib
+import os
+
+import pytest
+
+from tools.dir_listing import decode_cursor, encode_cursor, list_entries
+
+
+def _tree(root):
+    for i in range(25):
+        f = root / f"f{i:02d}.txt"
+        f.write_bytes(b"x" * i)
+        os.utime(f, ns=(i * 10**9, i * 10**9))
+    (root / "notes.md").write_text("hi")
+    (root / "sub").mkdir()
+    (root / "other").mkdir()
+
+
+def _names(root, **kwargs):
+    names, cursor = [], None
+    while True:
+        page, cursor = list_entries(root, cursor=cursor, **kwargs)
+        names.extend(e.name for e in page)
+        if cursor is None:
+            return names
+
+
+def test_pages_cover_every_entry_in_order(tmp_path):
+    _tree(tmp_path)
+    everything = sorted(os.listdir(tmp_path))
+    assert _names(tmp_path, limit=4) == everything
+    assert _names(tmp_path, limit=100) == everything
+
+    by_size = _names(tmp_path, limit=3, sort="size", kind="file")
+    assert by_size[:3] == ["f24.txt", "f23.txt", "f22.txt"]
+    assert len(by_size) == 26
+    newest, cursor = list_entries(tmp_path, limit=2, sort="mtime", pattern="f*.txt")
+    assert [e.name for e in newest] == ["f24.txt", "f23.txt"] and cursor
+
+
+def test_filters_sizes_and_bad_arguments(tmp_path):
+    _tree(tmp_path)
+    page, cursor = list_entries(tmp_path, kind="dir")
+    assert [(e.name, e.is_dir) for e in page] == [("other", True), ("sub", True)] and cursor is None
+    page, _ = list_entries(tmp_path, pattern="*.md", sizes=True)
+    assert [(e.name, e.size) for e in page] == [("notes.md", 2)]
+
+    with pytest.raises(ValueError):
+        list_entries(tmp_path, sort="colour")
+    with pytest.raises(ValueError):
+        list_entries(tmp_path, cursor=encode_cursor("name", ("a",)), sort="size")
+    with pytest.raises(ValueError):
+        decode_cursor("!!not-a-cursor", "name")
+    assert decode_cursor(encode_cursor("size", (-3, "ż:x")), "size") == (-3, "ż:x")
+
+
+def test_list_dir_tool_pages(monkeypatch, tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    _tree(root)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(root))
+    core = importlib.reload(importlib.import_module("tools.core"))
+
+    first = core.list_dir(".", max_entries=2, kind="file", sizes=True).splitlines()
+    assert first[:2] == ["FILE f00.txt (0 bytes)", "FILE f01.txt (1 bytes)"]
+    cursor = first[2].split("cursor=")[1].split()[0]
+    assert core.list_dir(".", max_entries=1, kind="file", cursor=cursor).startswith("FILE f02.txt\n")
+    assert "DIR sub" in core.list_dir(".", kind="dir")
+    assert "Cannot list" in core.list_dir(".", sort="colour")
@@ -0,0 +1,114 @@
+import importlib
+import os
+import re
+
+import pytest
+
+from tools import edit_engine
+from tools.edit_engine import Edit, EditError, apply_edits
+
+
+def _expected(text, edits):
+    # what the edits do to the whole file at once
+    for e in edits:
+        if e.append:
+            text += e.new
+        elif e.regex:
+            text = re.sub(e.pattern, e.new, text, count=e.count)
+        else:
+            text = text.replace(e.pattern, e.new, e.count or -1)
+    return text
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 64, 1 << 20])
+def test_matches_across_chunk_boundaries(tmp_path, chunk):
+    f = tmp_path / "a.txt"
+    text = "".join(f"row {i}: needle-{i % 7} żółw\r\n" for i in range(200))
+    f.write_bytes(text.encode("utf-8"))
+    edits = [
+        Edit.replace("needle-3", "NEEDLE"),
+        Edit.replace(r"row (\d+)5:", r"ROW \g<1>5:", regex=True),
+        Edit.replace("żółw", "turtle", count=3),
+        Edit.insert("--top--\r\n", before="row 0:"),
+        Edit.insert("END\r\n"),
+    ]
+    counts = apply_edits(f, edits, chunk_bytes=chunk)
+    assert f.read_bytes() == _expected(text, edits).encode("utf-8")
+    assert counts == [29, 19, 3, 1, 1]
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 5])
+def test_self_overlapping_literal(tmp_path, chunk):
+    f = tmp_path / "a.txt"
+    f.write_text("abababa-aaaaa")
+    edits = [Edit.replace("aba", "X"), Edit.replace("aa", "Y")]
+    apply_edits(f, edits, chunk_bytes=chunk)
+    assert f.read_text() == _expected("abababa-aaaaa", edits)
+
+
+def test_regex_context_and_anchors(monkeypatch, tmp_path):
+    monkeypatch.setattr(edit_engine, "REGEX_OVERLAP", 8)
+    f = tmp_path / "a.txt"
+    text = "start\n" + "cat concat cat\n" * 50
+    f.write_text(text)
+    edits = [Edit.replace(r"\bcat\b", "dog", regex=True), Edit.replace(r"^s", "S", regex=True)]
+    apply_edits(f, edits, chunk_bytes=5)
+    assert f.read_text() == _expected(text, edits)
+
+
+@pytest.mark.parametrize("chunk", [1, 4, 1 << 20])
+def test_empty_regex_matches_like_re_sub(monkeypatch, tmp_path, chunk):
+    monkeypatch.setattr(edit_engine, "REGEX_OVERLAP", 8)
+    f = tmp_path / "a.txt"
+    text = "abxxd\nxy\n\nhello world\n"
+    edits = [Edit.replace("x*", "-", regex=True), Edit.replace(r"\b", "|", count=3, regex=True)]
+    for edit in edits:
+        f.write_text(text)
+        apply_edits(f, [edit], chunk_bytes=chunk)
+        assert f.read_text() == _expected(text, [edit])
+
+
+def test_failed_edits_leave_the_file_alone(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("one two\n")
+    os.chmod(f, 0o640)
+    assert apply_edits(f, [Edit.replace("one", "1"), Edit.replace("missing", "x")]) == [1, 0]
+    assert f.read_text() == "one two\n"
+    bad = tmp_path / "b.bin"
+    bad.write_bytes(b"ok \xff\xfe")
+    with pytest.raises(EditError):
+        apply_edits(bad, [Edit.replace("ok", "x")])
+    with pytest.raises(EditError):
+        apply_edits(f, [Edit.replace("(", "x", regex=True)])
+    assert apply_edits(f, [Edit.replace("two", "2")]) == [1]
+    assert f.read_text() == "one 2\n" and (f.stat().st_mode & 0o777) == 0o640
+    # no temp files left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.txt", "b.bin"]
+
+
+def test_edit_file_tool(monkeypatch, tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "conf.ini").write_text("[main]\nlevel = 1\nname = old\n")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(root))
+    core = importlib.reload(importlib.import_module("tools.core"))
+
+    res = core.edit_file("conf.ini", [
+        {"old": r"level = \d+", "new": "level = 2", "regex": True},
+        {"old": "old", "new": "new"},
+        {"insert": "debug = true\n", "after": "[main]\n"},
+    ])
+    assert "Applied 3 edit(s)" in res
+    assert (root / "conf.ini").read_text() == "[main]\ndebug = true\nlevel = 2\nname = new\n"
+    res = core.edit_file("conf.ini", '[{"old": "name", "new": "title"}, {"insert": "x", "after": "nope"}]')
+    assert "Edit(s) 2 did not match" in res
+    assert "name = new" in (root / "conf.ini").read_text()
+    assert core.replace_text("conf.ini", old=r"\d", new="N", count=0, regex=True) == f"Replaced 1 occurrence(s) in {root / 'conf.ini'}"
+    assert "Anchor not found" in core.insert_text("conf.ini", text="x", before="nope")
+
+    (root / "mail.txt").write_text("hi\nthere\n\nhello world\n")
+    assert core.replace_text("mail.txt", old="(?m)^", new="> ", count=0, regex=True) == f"Replaced 5 occurrence(s) in {root / 'mail.txt'}"
+    assert (root / "mail.txt").read_text() == "> hi\n> there\n> \n> hello world\n> "
+    assert core.insert_text("mail.txt", text="big ", after="(?=world)", regex=True) == f"Inserted text into {root / 'mail.txt'}"
+    assert (root / "mail.txt").read_text() == "> hi\n> there\n> \n> hello big world\n> "
@@ -0,0 +1,72 @@
+import importlib
+import threading
+import time
+
+
+def _reload(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(tmp_path / "proj"))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+    core = importlib.import_module("tools.core")
+    importlib.reload(core)
+    return importlib.import_module("tools.executor")
+
+
+def test_conflicts_follow_paths(monkeypatch, tmp_path):
+    ex = _reload(monkeypatch, tmp_path)
+
+    mk = ex.call_accesses({"tool": "make_dir", "args": {"path": "ii"}})
+    wr = ex.call_accesses({"tool": "write_file", "args": {"path": "ii/out.txt"}})
+    rd = ex.call_accesses({"tool": "read_file", "args": {"path": "other.txt"}})
+    rd2 = ex.call_accesses({"tool": "summarize_file", "args": {"path": "ii/out.txt"}})
+    weather = ex.call_accesses({"tool": "get_weather", "args": {}})
+
+    assert ex.conflicts(mk, wr)
+    assert ex.conflicts(wr, rd2)
+    assert not ex.conflicts(mk, rd)
+    assert not ex.conflicts(rd, rd2)
+    assert not ex.conflicts(weather, mk)
+    assert ex.call_accesses({"tool": "open_app", "args": {"name": "x"}}) is None
+    assert ex.conflicts(None, weather)
+
+
+def test_independent_calls_overlap_and_results_keep_plan_order(monkeypatch, tmp_path):
+    ex = _reload(monkeypatch, tmp_path)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def run(call):
+        with lock:
+            running.append(call["args"]["path"])
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(call["args"]["path"])
+        return call["args"]["path"]
+
+    plan = ex.PlanExecutor(run, max_workers=4)
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        plan.submit({"tool": "read_file", "args": {"path": name}})
+
+    assert plan.results() == ["a.txt", "b.txt", "c.txt"]
+    assert max(peak) > 1
+
+
+def test_dependent_calls_run_in_plan_order(monkeypatch, tmp_path):
+    ex = _reload(monkeypatch, tmp_path)
+    order = []
+
+    def run(call):
+        # make the earliest call the slowest one
+        time.sleep(0.05 if call["tool"] == "make_dir" else 0)
+        order.append(call["tool"])
+        return call["tool"]
+
+    plan = ex.PlanExecutor(run, max_workers=4)
+    plan.submit({"tool": "make_dir", "args": {"path": "ii"}})
+    plan.submit({"tool": "write_file", "args": {"path": "ii/out.txt"}})
+    plan.submit({"tool": "delete_path", "args": {"path": "ii/out.txt"}})
+
+    assert plan.results() == ["make_dir", "write_file", "delete_path"]
+    assert order == ["make_dir", "write_file", "delete_path"]
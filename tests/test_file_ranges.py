@@ -0,0 +1,83 @@
+import importlib
+
+from tools.file_ranges import LineIndex, head, line_range, mapped, read_range, tail
+
+
+def _numbered(path, n, trailing=True):
+    text = "\n".join(f"line {i}" for i in range(1, n + 1))
+    path.write_text(text + ("\n" if trailing else ""))
+
+
+def test_line_index_jumps_across_checkpoints(tmp_path):
+    f = tmp_path / "big.txt"
+    _numbered(f, 5000)
+    with mapped(f) as mm:
+        # tiny checkpoints so the lookup has to cross many of them
+        index = LineIndex(mm, step=256)
+        assert len(index.offsets) > 100
+        assert index.total_lines == 5000
+        for line in (1, 2, 999, 4321, 5000):
+            start = index.line_start(mm, line)
+            assert mm[start:mm.find(b"\n", start)] == f"line {line}".encode()
+        assert index.line_start(mm, 5001) == len(mm)
+
+
+def test_line_index_with_checkpoints_inside_lines(tmp_path):
+    f = tmp_path / "ragged.txt"
+    # line lengths that don't divide the step, so checkpoints land mid-line
+    lines = [f"{i}:" + "x" * (i * 7 % 41) for i in range(1, 800)]
+    f.write_text("\n".join(lines) + "\n")
+    with mapped(f) as mm:
+        index = LineIndex(mm, step=100)
+        for n, text in enumerate(lines, 1):
+            start = index.line_start(mm, n)
+            assert mm[start:mm.find(b"\n", start)] == text.encode()
+
+
+def test_line_range_head_and_tail(tmp_path):
+    f = tmp_path / "a.txt"
+    _numbered(f, 100, trailing=False)
+    data, total, cut = line_range(f, 10, 12, 8000)
+    assert data == b"line 10\nline 11\nline 12\n" and total == 100 and not cut
+    assert line_range(f, 99, None, 8000)[0] == b"line 99\nline 100"
+    assert line_range(f, 10, 12, 5)[2]
+
+    assert head(f, 2, 8000) == (b"line 1\nline 2\n", True)
+    assert tail(f, 2, 8000) == (b"line 99\nline 100", True)
+    assert tail(f, 500, 8000) == (f.read_bytes(), False)
+    # a byte budget smaller than the lines asked for
+    assert tail(f, 50, 10)[0] == b"line 100"
+
+
+def test_read_range_and_empty_file(tmp_path):
+    f = tmp_path / "a.bin"
+    f.write_bytes(b"0123456789")
+    assert read_range(f, 2, 3) == (b"234", 2, 10)
+    assert read_range(f, -4, 100) == (b"6789", 6, 10)
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert read_range(empty, 0, 10) == (b"", 0, 0)
+    assert head(empty, 5, 100) == (b"", False)
+    assert tail(empty, 5, 100) == (b"", False)
+    assert line_range(empty, 1, 3, 100) == (b"", 0, False)
+
+
+def test_read_file_modes(monkeypatch, tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    _numbered(root / "log.txt", 300)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(root))
+    core = importlib.reload(importlib.import_module("tools.core"))
+
+    assert core.read_file("log.txt", start_line=200, end_line=201) == "line 200\nline 201\n"
+    assert core.read_file("log.txt", head=1) == "line 1\n\n... [truncated]"
+    assert core.read_file("log.txt", tail=1) == "... [truncated]\nline 300\n"
+    assert core.read_file("log.txt", offset=0, length=4) == "line\n... [truncated]"
+    assert core.read_file("log.txt", offset=-9) == "line 300\n"
+    assert "only 300 lines" in core.read_file("log.txt", start_line=400)
+    assert core.read_file("log.txt", max_bytes=6).endswith("... [truncated]")
+
+    summary = core.summarize_file("log.txt", max_bytes=20, head_lines=5)
+    assert f"Size: {(root / 'log.txt').stat().st_size} bytes" in summary
+    assert "line 3\n... [truncated]" in summary
@@ -0,0 +1,93 @@
+import importlib
+import json
+
+from tools import file_stats as fs
+
+
+def test_counts_lines_longest_and_tail_across_chunks(monkeypatch, tmp_path):
+    # small chunks so lines and the longest one straddle chunk boundaries
+    monkeypatch.setattr(fs, "CHUNK_BYTES", 64)
+    f = tmp_path / "log.txt"
+    lines = [f"entry {i}" for i in range(1, 301)]
+    lines[149] = "x" * 500
+    f.write_text("\n".join(lines))
+    stats = fs.analyze(f, tail_lines=3)
+    assert (stats.kind, stats.encoding) == ("text", "utf-8")
+    assert stats.lines == 300
+    assert (stats.longest, stats.longest_at) == (500, 150)
+    assert stats.tail == ["entry 298", "entry 299", "entry 300"]
+
+
+def test_encodings_and_binary(tmp_path):
+    crlf = tmp_path / "win.txt"
+    crlf.write_bytes(b"abc\r\nde\r\n")
+    stats = fs.analyze(crlf)
+    assert (stats.lines, stats.longest, stats.tail) == (2, 3, ["abc", "de"])
+    utf16 = tmp_path / "u16.txt"
+    utf16.write_text("héllo\nwörld\n", encoding="utf-16")
+    stats = fs.analyze(utf16)
+    assert (stats.encoding, stats.lines, stats.tail) == ("utf-16", 2, ["héllo", "wörld"])
+    latin = tmp_path / "latin.txt"
+    latin.write_bytes("café\n".encode("latin-1") + "naïve\n".encode())
+    stats = fs.analyze(latin)
+    assert (stats.encoding, stats.codec) == ("utf-8 (with invalid bytes)", "utf-8")
+    assert stats.tail == ["caf\ufffd", "naïve"]
+    cut = tmp_path / "cut.txt"
+    cut.write_bytes("ok\né".encode()[:-1])
+    assert (fs.analyze(cut).encoding, fs.analyze(cut).tail) == ("utf-8 (with invalid bytes)", ["ok", "\ufffd"])
+    blob = tmp_path / "a.bin"
+    blob.write_bytes(b"\x89PNG\0\0\0")
+    assert fs.analyze(blob).kind == "binary"
+
+
+def test_structure_of_json_csv_and_python(monkeypatch, tmp_path):
+    monkeypatch.setattr(fs, "CHUNK_BYTES", 16)
+    obj = tmp_path / "conf.json"
+    obj.write_text(json.dumps({"name": "x", "esc\"aped": [1, {"deep": 2}], "items": {"a": 1}}, indent=2))
+    assert fs.analyze(obj).structure == 'JSON object with 3 keys: name, esc"aped, items'
+    arr = tmp_path / "list.json"
+    arr.write_text(json.dumps([{"a": [1, 2]}, "x,y", 3]))
+    assert fs.analyze(arr).structure == "JSON array of 3 items"
+    empty = tmp_path / "empty.json"
+    empty.write_text("[ ]")
+    assert fs.analyze(empty).structure == "JSON array of 0 items"
+    bad = tmp_path / "bad.json"
+    bad.write_text("{\"a\": 1")
+    assert fs.analyze(bad).structure.endswith("(incomplete)")
+
+    table = tmp_path / "t.csv"
+    table.write_text("id;name;\"city, country\"\n1;a;b\n2;c;d\n")
+    assert fs.analyze(table).structure == "CSV with 3 columns (id, name, city, country) and 2 rows"
+
+    code = tmp_path / "m.py"
+    code.write_text("import os\nfrom x import y\n\nclass A:\n    def method(self):\n        pass\n\nasync def run():\n    pass\n\ndef main():\n    pass\n")
+    assert fs.analyze(code).structure == "Python with 1 top-level classes (A), 2 functions (run, main), 2 imports"
+
+
+def test_file_stats_cache_follows_changes(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("one\n")
+    first = fs.file_stats(f)
+    assert fs.file_stats(f) is first
+    f.write_text("one\ntwo\n")
+    assert fs.file_stats(f).lines == 2
+
+
+def test_summarize_file_reports_stats(monkeypatch, tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "log.txt").write_text("".join(f"line {i}\n" for i in range(1, 51)))
+    (root / "img.bin").write_bytes(b"\0\1\2")
+    (root / "mixed.txt").write_bytes("naïve\n".encode() + b"\xff\n")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(root))
+    core = importlib.reload(importlib.import_module("tools.core"))
+
+    summary = core.summarize_file("log.txt", head_lines=2)
+    assert "Type: text (utf-8)" in summary
+    assert "Lines: 50 (longest: 7 characters, line 10)" in summary
+    assert "line 1\nline 2\n" in summary and "line 3\n" not in summary
+    assert summary.endswith("Last 5 lines:\nline 46\nline 47\nline 48\nline 49\nline 50")
+    assert core.summarize_file("img.bin").endswith("Type: binary")
+    mixed = core.summarize_file("mixed.txt")
+    assert "Type: text (utf-8 (with invalid bytes))" in mixed and "naïve\n\ufffd" in mixed
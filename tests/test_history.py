@@ -0,0 +1,57 @@
+from history import SUMMARY_HEADER, HistoryManager, message_tokens
+
+
+def _turns(n, size=400):
+    msgs = []
+    for i in range(n):
+        msgs.append({"role": "user", "content": f"question {i} " + "q" * size})
+        msgs.append({"role": "assistant", "content": f"answer {i} " + "a" * size})
+    return msgs
+
+
+def test_compact_keeps_system_and_recent_turns_within_budget():
+    system = {"role": "system", "content": "sys"}
+    history = [system] + _turns(20)
+    mgr = HistoryManager(token_budget=800, summary_tokens=200, keep_recent=4)
+
+    total = mgr.compact(history)
+
+    assert history[0] is system
+    assert history[1]["role"] == "system" and history[1]["content"].startswith(SUMMARY_HEADER)
+    assert history[-1]["content"].startswith("answer 19")
+    assert len(history) - 2 >= 4
+    assert total == sum(message_tokens(m) for m in history)
+    assert total <= 800
+    assert mgr.summarized_messages == 40 - (len(history) - 2)
+
+
+def test_compact_reuses_summary_and_stays_flat():
+    history = [{"role": "system", "content": "sys"}]
+    mgr = HistoryManager(token_budget=600, summary_tokens=100, keep_recent=2)
+
+    sizes = []
+    for turn in _turns(50):
+        history.append(turn)
+        sizes.append(mgr.compact(history))
+
+    summaries = [m for m in history if str(m["content"]).startswith(SUMMARY_HEADER)]
+    assert len(summaries) == 1
+    assert max(sizes[10:]) <= 600
+    assert "question 49" in history[-2]["content"]
+
+
+def test_compact_clips_large_tool_dumps_in_recent_window():
+    history = [
+        {"role": "system", "content": "sys"},
+        {"role": "user", "content": "read the log"},
+        {"role": "assistant", "content": "x" * 8000},
+        {"role": "user", "content": "and now?"},
+    ]
+    mgr = HistoryManager(token_budget=500, keep_recent=4)
+
+    total = mgr.compact(history)
+
+    assert len(history) == 4
+    assert history[2]["content"].endswith("[trimmed]")
+    assert history[3]["content"] == "and now?"
+    assert total < 2000
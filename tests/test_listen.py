@@ -0,0 +1,75 @@
+import importlib
+
+import numpy as np
+
+RATE = 16000
+HOP = int(1.5 * RATE)
+
+
+def _reload(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_CONFIG", str(tmp_path / "nope.json"))
+    importlib.reload(importlib.import_module("config"))
+    return importlib.reload(importlib.import_module("audio.listen"))
+
+
+class _Backend:
+    def __init__(self, *texts):
+        self.texts = list(texts)
+        self.calls = 0
+
+    def transcribe(self, audio, sample_rate):
+        self.calls += 1
+        return self.texts.pop(0)
+
+
+def _hop(speech_sec=0.0, trailing=False):
+    rng = np.random.default_rng(1)
+    hop = rng.standard_normal(HOP) * 30
+    n = int(speech_sec * RATE)
+    tone = np.sin(2 * np.pi * 180 * np.arange(n) / RATE) * 9000
+    if trailing:
+        hop[HOP - n:] = tone
+    else:
+        hop[:n] = tone
+    return hop.astype(np.int16)
+
+
+def test_silence_is_never_uploaded(monkeypatch, tmp_path):
+    listen = _reload(monkeypatch, tmp_path)
+    backend = _Backend()
+    listener = listen.HotwordListener(backend=backend, sample_rate=RATE, window_sec=3.0, hop_sec=1.5)
+
+    assert all(listener.step(_hop()) is None for _ in range(20))
+    assert backend.calls == 0
+    stats = listener.stats()
+    assert stats["listened_s"] == 30.0
+    assert stats["uploaded_s_per_hour"] == 0.0
+
+
+def test_hotword_split_across_windows_is_found_once(monkeypatch, tmp_path):
+    listen = _reload(monkeypatch, tmp_path)
+    backend = _Backend("hey jar", "hey jarvis open firefox")
+    listener = listen.HotwordListener(backend=backend, sample_rate=RATE, window_sec=3.0, hop_sec=1.5)
+
+    # still talking at the end of both windows: the command is held back
+    assert listener.step(_hop(1.5)) is None
+    assert listener.step(_hop(1.5)) is None
+    assert listener.step(_hop()) == "open firefox"
+    assert backend.calls == 2
+
+
+def test_overlapping_transcripts_report_a_command_once(monkeypatch, tmp_path):
+    listen = _reload(monkeypatch, tmp_path)
+    backend = _Backend("Jarvis, what time is it?", "what time is it? Thanks.")
+    listener = listen.HotwordListener(backend=backend, sample_rate=RATE, window_sec=3.0, hop_sec=1.5)
+
+    assert listener.step(_hop(0.8)) == "what time is it"
+    assert listener.step(_hop(0.5)) is None
+    assert listener.stats()["uploads"] == 2
+
+
+def test_merge_transcripts_ignores_case_and_punctuation(monkeypatch, tmp_path):
+    listen = _reload(monkeypatch, tmp_path)
+    assert listen.merge_transcripts("Jarvis, open the".split(), "open the door".split()) == 2
+    assert listen.merge_transcripts("a b".split(), "c d".split()) == 0
@@ -0,0 +1,78 @@
+import importlib
+
+from llm_cache import ResponseCache, is_context_free, normalize_utterance
+
+
+def test_normalize_and_context_detection():
+    assert normalize_utterance("  List   documents! ") == "list documents"
+    # paths keep their case: "Foo" and "foo" are different folders
+    assert normalize_utterance("create folder Foo") != normalize_utterance("create folder foo")
+    assert normalize_utterance("Docs/Notes.txt") == "Docs/Notes.txt"
+    assert normalize_utterance("Создай папку ii.") == normalize_utterance("создай папку ii")
+    # inner punctuation may be file content or part of a name
+    assert normalize_utterance('write "a, b" to notes.txt') != normalize_utterance("write a b to notes.txt")
+    assert normalize_utterance("create c++.txt") != normalize_utterance("create c.txt")
+    assert is_context_free("what's the weather")
+    assert not is_context_free("delete it")
+    assert not is_context_free("Delete It")
+    assert not is_context_free("удали его")
+
+
+def test_cache_hits_misses_and_lru_eviction(tmp_path):
+    cache = ResponseCache(tmp_path / "c.sqlite3", max_entries=2)
+
+    assert cache.get("sys", "list documents") is None
+    cache.put("sys", "list documents", '{"tool":"list_dir","args":{"path":"documents"}}')
+    assert cache.get("sys", "List documents.") is not None
+    assert cache.get("other system prompt", "list documents") is None
+
+    cache.put("sys", "weather", "w")
+    cache.get("sys", "list documents")
+    cache.put("sys", "open firefox", "f")
+
+    assert cache.get("sys", "weather") is None
+    assert cache.get("sys", "list documents") is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 3
+
+    cache.close()
+    reopened = ResponseCache(tmp_path / "c.sqlite3")
+    assert reopened.get("sys", "open firefox") == "f"
+
+
+def test_inner_punctuation_keeps_entries_apart(tmp_path):
+    cache = ResponseCache(tmp_path / "c.sqlite3")
+    cache.put("sys", 'write "a, b" to notes.txt', '{"tool":"write_file","args":{"path":"notes.txt","content":"a, b"}}')
+    assert cache.get("sys", "write a b to notes.txt") is None
+    assert cache.get("sys", 'Write "a, b" to notes.txt.') is not None
+
+
+def test_agent_answers_repeated_command_from_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(tmp_path / "proj"))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+
+    core = importlib.import_module("tools.core")
+    importlib.reload(core)
+    agent = importlib.import_module("agent")
+    importlib.reload(agent)
+
+    calls = []
+
+    def fake_llm(_history):
+        calls.append(1)
+        return '{"tool":"list_dir","args":{"path":"documents"}}'
+
+    monkeypatch.setattr(agent, "ask_llm", fake_llm)
+    cache = ResponseCache(tmp_path / "c.sqlite3")
+    history = [agent.make_system_message()]
+
+    (tmp_path / "Docs").mkdir()
+    first = agent.handle_user_text(history, "what is in my documents", response_cache=cache)
+    second = agent.handle_user_text(history, "What is in my documents?", response_cache=cache)
+    agent.handle_user_text(history, "show it again", response_cache=cache)
+
+    assert first == second
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,39 @@
+from audio.phrases import FIXED_PHRASES, GOODBYE, PhraseBank, local_ack
+
+
+def test_local_ack_matches_commands_in_order():
+    assert local_ack("please unmute the sound") == "Unmuted system audio."
+    assert local_ack("mute the audio") == "Muted system audio."
+    assert local_ack("mute") is None
+    assert local_ack("Turn off WiFi") == "Wi-Fi turned off."
+    assert local_ack("what's the weather") is None
+    assert GOODBYE in FIXED_PHRASES
+
+
+def test_frequent_replies_are_ranked_and_persisted(tmp_path):
+    path = tmp_path / "phrases.json"
+    bank = PhraseBank(path, top=2)
+    for _ in range(3):
+        bank.note("Done.")
+    for _ in range(2):
+        bank.note("Opening Firefox.")
+    bank.note("Only once.")
+    bank.note("x" * 200)
+    bank.save()
+
+    reloaded = PhraseBank(path, top=2)
+    assert reloaded.frequent() == ["Done.", "Opening Firefox."]
+
+
+def test_warm_keeps_clips_per_format_and_skips_failures(tmp_path):
+    bank = PhraseBank(tmp_path / "phrases.json")
+
+    def synthesize(text):
+        if text == "bad":
+            raise RuntimeError("offline")
+        return text.encode()
+
+    assert bank.warm("pcm", synthesize, ["Done.", "bad", "Goodbye."]) == 2
+    assert bank.get("pcm", "Done.") == b"Done."
+    assert bank.get("mp3", "Done.") is None
+    assert bank.get("pcm", "bad") is None
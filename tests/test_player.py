@@ -0,0 +1,43 @@
+import numpy as np
+
+from audio.player import PCMSink
+
+
+def _pull(sink, frames):
+    out = np.full((frames, 1), 7, dtype=np.int16)
+    sink._callback(out, frames, None, None)
+    return out[:, 0]
+
+
+def test_sink_plays_queued_pcm_in_order_and_pads_with_silence():
+    sink = PCMSink(sample_rate=1000)
+    samples = np.arange(1, 11, dtype="<i2")
+    data = samples.tobytes()
+    # network chunks can split a sample in half
+    sink.write(data[:5])
+    sink.write(data[5:])
+
+    assert sink.pending() == 10 / 1000
+    assert list(_pull(sink, 6)) == [1, 2, 3, 4, 5, 6]
+    assert list(_pull(sink, 6)) == [7, 8, 9, 10, 0, 0]
+    assert sink.played == 10
+    assert sink.drain(timeout=0.1)
+
+
+def test_flush_silences_immediately():
+    sink = PCMSink(sample_rate=1000)
+    sink.write(np.ones(100, dtype="<i2").tobytes())
+    _pull(sink, 10)
+    sink.flush()
+
+    assert sink.pending() == 0
+    assert not _pull(sink, 10).any()
+    assert sink.drain(timeout=0.1)
+
+
+def test_drain_stops_when_cancelled():
+    sink = PCMSink(sample_rate=1000)
+    sink.write(np.ones(100, dtype="<i2").tobytes())
+
+    assert not sink.drain(cancelled=lambda: True)
+    assert not sink.drain(timeout=0.05)
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from tools.search_engine import IgnoreRules, SearchEngine, search_file, walk
+
+
+def _tree(root: Path) -> None:
+    (root / "docs" / "build").mkdir(parents=True)
+    (root / "logs").mkdir()
+    (root / "docs" / "a.md").write_text("one\nneedle here\nthree\nneedle again\n")
+    (root / "docs" / "build" / "out.md").write_text("needle\n")
+    (root / "logs" / "x.log").write_text("needle\n")
+    (root / "logs" / "keep.log").write_text("needle\n")
+    (root / "blob.bin").write_bytes(b"needle\0\0\0")
+    (root / "big.txt").write_text("needle\n" + "x" * 500)
+    (root / ".gitignore").write_text("# comment\n*.log\n!keep.log\ndocs/build/\n")
+
+
+def test_walk_respects_gitignore_and_size(tmp_path):
+    _tree(tmp_path)
+    files = sorted(Path(p).relative_to(tmp_path).as_posix() for p, _s, _m in walk(tmp_path, max_filesize=100))
+    assert files == ["blob.bin", "docs/a.md", "logs/keep.log"]
+
+
+def test_ignore_rules_anchoring(tmp_path):
+    rules = IgnoreRules(IgnoreRules.parse(str(tmp_path), "build\n/top.txt\n"))
+    assert rules.ignored(str(tmp_path / "a" / "build"), True)
+    assert rules.ignored(str(tmp_path / "top.txt"), False)
+    assert not rules.ignored(str(tmp_path / "a" / "top.txt"), False)
+
+
+def test_search_file_reports_line_numbers_and_skips_binaries(tmp_path):
+    _tree(tmp_path)
+    assert search_file(str(tmp_path / "docs" / "a.md"), b"needle", 10) == [(2, "needle here"), (4, "needle again")]
+    assert search_file(str(tmp_path / "blob.bin"), b"needle", 10) == []
+
+
+def test_engine_finds_matches_with_any_worker_count(tmp_path):
+    _tree(tmp_path)
+    for i in range(100):
+        (tmp_path / "docs" / f"f{i:03d}.txt").write_text(f"line\nneedle {i}\n")
+    one = SearchEngine(workers=1, max_filesize=1000).search("needle", tmp_path, max_matches=500)
+    many = SearchEngine(workers=4, max_filesize=1000).search("needle", tmp_path, max_matches=500)
+    assert one == many
+    # a.md twice, keep.log and big.txt; build/, x.log and the binary are skipped
+    assert len(one) == 100 + 2 + 1 + 1
+
+
+def test_engine_stops_early(tmp_path):
+    for i in range(200):
+        (tmp_path / f"f{i:03d}.txt").write_text("needle\n")
+    found = SearchEngine(workers=4).search("needle", tmp_path, max_matches=5)
+    assert len(found) == 6
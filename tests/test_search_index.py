@@ -0,0 +1,92 @@
+import importlib
+import os
+
+from tools import search_index
+from tools.search_index import TrigramIndex, required_literals, trigrams
+
+
+def test_required_literals():
+    assert required_literals("hello") == ["hello"]
+    assert required_literals(r"def \w+_index\(") == ["def ", "_index("]
+    assert required_literals("^(foo)bar$") == ["foobar"]
+    assert required_literals("colou?r") == ["colo", "r"]
+    assert required_literals("cat|dog") == []
+    assert trigrams("AbCd") == {int.from_bytes(b"abc", "big"), int.from_bytes(b"bcd", "big")}
+
+
+def test_index_updates_incrementally(tmp_path):
+    root = tmp_path / "root"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_text("alpha beta\n")
+    (root / "sub" / "b.txt").write_text("one\ngamma delta\n")
+    (root / ".hidden.txt").write_text("gamma\n")
+    (root / "blob.bin").write_bytes(b"gamma\0\0")
+    index = TrigramIndex(tmp_path / "idx.sqlite3", [root], refresh_interval=3600)
+
+    assert index.refresh(force=True) == {"indexed": 2, "removed": 0}
+    assert index.search("gamma", root) == [f"{root / 'sub' / 'b.txt'}:2:gamma delta"]
+    assert index.refresh(force=True) == {"indexed": 0, "removed": 0}
+
+    (root / "a.txt").write_text("alpha gamma\n")
+    os.utime(root / "a.txt", ns=(1, 1))
+    (root / "sub" / "b.txt").unlink()
+    assert index.refresh(force=True) == {"indexed": 1, "removed": 1}
+    assert index.search("gam+a", root) == [f"{root / 'a.txt'}:1:alpha gamma"]
+    assert index.search("nothing here", root) == []
+
+    # the index persists across instances
+    reopened = TrigramIndex(tmp_path / "idx.sqlite3", [root])
+    assert reopened.ready
+    assert reopened.candidates(["alpha"], root) == [root / "a.txt"]
+    assert reopened.candidates(["alpha"], root / "sub") == []
+
+
+def test_blocks_and_subtree_refresh(monkeypatch, tmp_path):
+    monkeypatch.setattr(search_index, "BLOCK_FILES", 8)
+    root = tmp_path / "root"
+    for d in ("one", "two"):
+        (root / d).mkdir(parents=True)
+    (root / ".gitignore").write_text("skip/\n")
+    for i in range(40):
+        (root / ("one" if i % 2 else "two") / f"f{i}.txt").write_text(f"file {i} says {'even' if i % 2 == 0 else 'odd'}\n")
+    index = TrigramIndex(tmp_path / "idx.sqlite3", [root], refresh_interval=3600)
+    assert not index.ready
+    index.build_in_background()
+    assert index.wait(10)
+    assert len(index.candidates(["even"], root)) == 20
+    assert index.candidates(["file 7 says"], root) == [root / "one" / "f7.txt"]
+
+    # only the subtree asked about is looked at again
+    (root / "one" / "f7.txt").write_text("file 7 says even now\n")
+    (root / "two" / "f8.txt").unlink()
+    (root / "one" / "skip").mkdir()
+    (root / "one" / "skip" / "x.txt").write_text("even\n")
+    assert index.refresh(force=True, under=root / "one") == {"indexed": 1, "removed": 0}
+    assert index.candidates(["file 7 says even"], root) == [root / "one" / "f7.txt"]
+    assert index.candidates(["says odd"], root / "one") == [root / "one" / f"f{i}.txt" for i in sorted(range(1, 40, 2), key=str) if i != 7]
+    assert len(index.candidates(["even"], root)) == 21
+    assert index.refresh(force=True) == {"indexed": 0, "removed": 1}
+    assert len(index.candidates(["even"], root)) == 20
+
+
+def test_search_text_uses_index(monkeypatch, tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "notes.md").write_text("first\nthe answer is 42\n")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(root))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+    monkeypatch.setenv("JARVIS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("JARVIS_CONFIG", str(tmp_path / "nope.json"))
+    importlib.reload(importlib.import_module("config"))
+    core = importlib.reload(importlib.import_module("tools.core"))
+
+    # the first search starts building the index and is answered without it
+    assert core.search_text("answer is") == f"{root / 'notes.md'}:2:the answer is 42"
+    assert core._search_index().wait(10)
+    assert core.search_text("answer is (\\d+)") == f"{root / 'notes.md'}:2:the answer is 42"
+    assert core.search_text("unbalanced (") == "No matches"
+
+    core.write_file("new.txt", "another answer is here")
+    assert "new.txt:1:" in core.search_text("answer is")
+    assert (tmp_path / "cache" / "search_index.sqlite3").exists()
@@ -0,0 +1,14 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_import_main_leaves_audio_stack_unloaded(tmp_path):
+    # a fresh interpreter: the test session itself has numpy loaded long ago
+    code = "import sys, main; print(sorted(m for m in ('numpy', 'sounddevice', 'audio.barge_in') if m in sys.modules))"
+    env = dict(os.environ, OPENAI_API_KEY="sk-test", JARVIS_CONFIG=str(tmp_path / "nope.json"))
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,60 @@
+from streaming import SentenceSplitter, ToolCallStreamParser
+
+
+def test_parser_emits_array_items_as_they_close():
+    seen = []
+    parser = ToolCallStreamParser(on_tool=seen.append)
+
+    parser.feed('[{"tool":"make_dir","args":{"path":"a"}},')
+    assert [c["tool"] for c in seen] == ["make_dir"]
+
+    parser.feed('{"tool":"write_file","args":{"path":"a/x.txt","content":"} ]"}}')
+    assert [c["tool"] for c in seen] == ["make_dir", "write_file"]
+    assert seen[1]["args"]["content"] == "} ]"
+
+    parser.feed("]")
+    parser.finish()
+    assert len(parser.tool_calls) == 2
+
+
+def test_parser_passes_prose_through_as_text():
+    text = []
+    parser = ToolCallStreamParser(on_text=text.append)
+    for ch in "See [1] and {braces} here, or [a}. Done.":
+        parser.feed(ch)
+    parser.finish()
+
+    assert parser.tool_calls == []
+    assert "".join(text) == "See [1] and {braces} here, or [a}. Done."
+
+
+def test_parser_finds_embedded_object_and_unterminated_text():
+    text = []
+    parser = ToolCallStreamParser(on_text=text.append)
+    parser.feed('Sure: {"tool":"list_dir","args":{}} then [unterminated')
+    parser.finish()
+
+    assert parser.tool_calls == [{"tool": "list_dir", "args": {}}]
+    assert "".join(text) == "Sure:  then [unterminated"
+
+
+def test_parser_unwraps_a_single_key_wrapper():
+    text = []
+    parser = ToolCallStreamParser(on_text=text.append)
+    parser.feed('Plan: {"actions": [{"tool":"make_dir","args":{"path":"a"}}, {"tool":"list_dir","args":{}}]}')
+    parser.feed(' and {"call": {"tool":"read_file","args":{"path":"x"}}} {"note": [1, 2]}')
+    parser.finish()
+
+    assert [c["tool"] for c in parser.tool_calls] == ["make_dir", "list_dir", "read_file"]
+    assert "".join(text) == 'Plan:  and  {"note": [1, 2]}'
+
+
+def test_sentence_splitter_streams_sentences_and_keeps_code_fences():
+    out = []
+    splitter = SentenceSplitter(out.append)
+    for part in ["Hello there. How", " are you?", " Fine\n```py\nx = 1\n\ny = 2\n``` end"]:
+        splitter.feed(part)
+    assert out == ["Hello there.", "How are you?", "Fine"]
+
+    splitter.flush()
+    assert out[-1] == "```py\nx = 1\n\ny = 2\n``` end"
@@ -0,0 +1,67 @@
+import importlib
+
+import numpy as np
+
+from audio.stt_backends import FakeBackend, STTBackend, Transcript, _StreamingSession
+
+
+def test_fake_backend_streams_partials_then_final():
+    backend = FakeBackend(["open the browser please"], seconds_per_word=0.1)
+    partials = []
+    session = backend.session(16000, on_partial=partials.append)
+
+    for _ in range(10):
+        session.feed(np.zeros(480, dtype=np.int16))  # 30 ms frames
+    final = session.finish()
+
+    assert [p.text for p in partials] == ["open", "open the", "open the browser"]
+    assert all(not p.final for p in partials)
+    assert final == Transcript("open the browser please", final=True, latency=final.latency)
+
+
+def test_default_session_transcribes_trimmed_audio_once():
+    calls = []
+
+    class Recorder(STTBackend):
+        def transcribe(self, audio, sample_rate):
+            calls.append(len(audio))
+            return " hello "
+
+    session = Recorder().session(16000)
+    session.feed(np.zeros(100, dtype=np.int16))
+    assert session.finish(np.zeros(40, dtype=np.int16)).text == "hello"
+    assert calls == [40]
+
+
+def test_backend_selected_from_settings(monkeypatch, tmp_path):
+    cfg = tmp_path / "jarvis.config.json"
+    cfg.write_text('{"stt_backend": "fake"}')
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_CONFIG", str(cfg))
+    importlib.reload(importlib.import_module("config"))
+    stt = importlib.reload(importlib.import_module("audio.stt_backends"))
+
+    assert isinstance(stt.get_backend(), stt.FakeBackend)
+    assert stt.get_backend() is stt.get_backend()
+
+
+class _Segments:
+    # stands in for LocalWhisperBackend without loading a model
+    def __init__(self):
+        self.decoded = []
+
+    def segments(self, audio, sample_rate):
+        self.decoded.append(len(audio))
+        return [(0.0, len(audio) / sample_rate, f"{len(audio)} samples")] if len(audio) else []
+
+
+def test_streaming_session_transcribes_unfed_audio():
+    whisper = _Segments()
+    # a fixed-length recording is handed over whole, without feed()
+    session = _StreamingSession(whisper, 16000, None, interval=10.0, holdback=1.0)
+    assert session.finish(np.zeros(800, dtype=np.int16)).text == "800 samples"
+
+    session = _StreamingSession(whisper, 16000, None, interval=10.0, holdback=1.0)
+    session.feed(np.zeros(1600, dtype=np.int16))
+    # fed audio wins over the trimmed copy
+    assert session.finish(np.zeros(400, dtype=np.int16)).text == "1600 samples"
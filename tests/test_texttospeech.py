@@ -0,0 +1,185 @@
+import importlib
+import io
+import threading
+import time
+from types import SimpleNamespace
+
+from audio.player import PCMSink
+
+
+def _reload(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_CONFIG", str(tmp_path / "nope.json"))
+    monkeypatch.setenv("JARVIS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("JARVIS_TTS_OUTPUT", "ffplay")
+    importlib.reload(importlib.import_module("config"))
+    return importlib.reload(importlib.import_module("audio.texttospeech"))
+
+
+class _FakePlayer:
+    def __init__(self, *args, **kwargs):
+        self.stdin = io.BytesIO()
+        self.stdin.close = lambda: None
+        self.terminated = False
+
+    def terminate(self):
+        self.terminated = True
+
+    def wait(self):
+        return 0
+
+
+def test_split_for_speech(monkeypatch, tmp_path):
+    tts = _reload(monkeypatch, tmp_path)
+    text = "Done. " + "The first clause is here, " * 4 + "and it ends now! Ok?"
+    parts = tts.split_for_speech(text, max_chars=60)
+
+    assert parts[0] == "Done."
+    assert parts[-1] == "Ok?"
+    assert all(len(p) <= 60 for p in parts)
+    assert " ".join(parts).replace("  ", " ") == text
+
+
+def test_segments_play_in_order_through_one_player(monkeypatch, tmp_path):
+    tts = _reload(monkeypatch, tmp_path)
+    players = []
+
+    def fake_popen(*args, **kwargs):
+        players.append(_FakePlayer())
+        return players[-1]
+
+    def fake_synthesize(text, gen):
+        # later segments finish first
+        time.sleep(0.05 / len(text))
+        return text.encode()
+
+    monkeypatch.setattr(tts.subprocess, "Popen", fake_popen)
+    monkeypatch.setattr(tts, "_synthesize", fake_synthesize)
+
+    segments = ["one.", "two two.", "three three three."]
+    tts._play_segments(tts._submit_segments(segments, tts._speech_generation), tts._speech_generation)
+
+    assert len(players) == 1
+    assert players[0].stdin.getvalue() == b"one.two two.three three three."
+
+
+def test_stop_speaking_cancels_pending_segments(monkeypatch, tmp_path):
+    tts = _reload(monkeypatch, tmp_path)
+    monkeypatch.setattr(tts.subprocess, "Popen", lambda *a, **k: _FakePlayer())
+    release = threading.Event()
+    started = []
+
+    def slow_synthesize(text, gen):
+        started.append(text)
+        release.wait(2)
+        return text.encode()
+
+    monkeypatch.setattr(tts, "_synthesize", slow_synthesize)
+    gen = tts._speech_generation
+    futures = tts._submit_segments([f"s{i}." for i in range(10)], gen)
+
+    threading.Timer(0.05, tts.stop_speaking).start()
+    t0 = time.monotonic()
+    tts._play_segments(futures, gen)
+    release.set()
+
+    assert time.monotonic() - t0 < 1.0
+    assert sum(f.cancelled() for f in futures) >= 10 - tts.get_settings().tts_workers
+    assert len(started) <= tts.get_settings().tts_workers
+
+
+class _FakeStream:
+    def __init__(self, chunks, block_after=None):
+        self.chunks = chunks
+        self.block_after = block_after
+        self.closed = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed.set()
+
+    def iter_bytes(self):
+        for i, chunk in enumerate(self.chunks):
+            if i == self.block_after:
+                self.closed.wait(2)
+            if self.closed.is_set():
+                raise RuntimeError("stream closed")
+            yield chunk
+
+    def close(self):
+        self.closed.set()
+
+
+class _RecordingSink(PCMSink):
+    def drain(self, cancelled=None, timeout=None):
+        return True
+
+
+def _use_fakes(monkeypatch, tts, stream):
+    sink = _RecordingSink()
+    speech = SimpleNamespace(with_streaming_response=SimpleNamespace(create=lambda **kw: stream))
+    monkeypatch.setattr(tts, "get_client", lambda: SimpleNamespace(audio=SimpleNamespace(speech=speech)))
+    monkeypatch.setattr(tts, "get_sink", lambda mode: sink)
+    return sink
+
+
+def test_sink_gets_raw_pcm_and_clip_is_cached(monkeypatch, tmp_path):
+    tts = _reload(monkeypatch, tmp_path)
+    sink = _use_fakes(monkeypatch, tts, _FakeStream([b"\x01\x00\x02", b"\x00"]))
+
+    tts._tts_worker("hello", True, tts._speech_generation)
+
+    assert sink.pending() == 2 / sink.sample_rate
+    settings = tts.get_settings()
+    assert tts.get_tts_cache().get(settings.tts_model, settings.tts_voice, "pcm", "hello") is not None
+
+
+def test_stop_speaking_aborts_download_and_flushes_sink(monkeypatch, tmp_path):
+    tts = _reload(monkeypatch, tmp_path)
+    stream = _FakeStream([b"\x01\x00" * 100, b"\x02\x00" * 100], block_after=1)
+    sink = _use_fakes(monkeypatch, tts, stream)
+    monkeypatch.setattr(tts, "flush_sink", sink.flush)
+
+    threading.Timer(0.05, tts.stop_speaking).start()
+    t0 = time.monotonic()
+    tts._tts_worker("hello", True, tts._speech_generation)
+
+    assert time.monotonic() - t0 < 1.0
+    assert stream.closed.is_set()
+    assert sink.pending() == 0
+    settings = tts.get_settings()
+    assert tts.get_tts_cache().get(settings.tts_model, settings.tts_voice, "pcm", "hello") is None
+
+
+def test_phrase_bank_clip_plays_without_network(monkeypatch, tmp_path):
+    tts = _reload(monkeypatch, tmp_path)
+    sink = _RecordingSink()
+    monkeypatch.setattr(tts, "get_sink", lambda mode: sink)
+    monkeypatch.setattr(tts, "get_client", lambda: (_ for _ in ()).throw(AssertionError("network used")))
+    tts.get_phrase_bank().warm("pcm", lambda text: b"\x01\x00" * 240, ["Volume increased."])
+
+    tts._tts_worker("Volume increased.", True, tts._speech_generation)
+
+    assert sink.pending() == 240 / sink.sample_rate
+
+
+def test_clip_the_cache_refuses_still_plays(monkeypatch, tmp_path):
+    tts = _reload(monkeypatch, tmp_path)
+    players = []
+
+    def fake_popen(args, **kwargs):
+        players.append((args, _FakePlayer()))
+        return players[-1][1]
+
+    monkeypatch.setattr(tts, "get_sink", lambda mode: None)
+    monkeypatch.setattr(tts.subprocess, "Popen", fake_popen)
+    monkeypatch.setattr(tts, "_download", lambda text, fmt, gen: b"mp3 bytes")
+    monkeypatch.setattr(tts.get_tts_cache(), "put", lambda *a: None)
+
+    tts._tts_worker("hello", False, tts._speech_generation)
+
+    assert len(players) == 1
+    assert players[0][0][-1] == "-"
+    assert players[0][1].stdin.getvalue() == b"mp3 bytes"
@@ -27,3 +27,39 @@ def test_registry_discovers_tools(monkeypatch, tmp_path):
     prompt = registry.build_system_tools_description(extra_rules="EXTRA")
     assert "Tools:" in prompt
     assert "make_dir" in prompt
+
+
+def test_select_tools_ranks_relevant_tools(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_ROOT", str(tmp_path / "proj"))
+    monkeypatch.setenv("JARVIS_DOCUMENTS", str(tmp_path / "Docs"))
+
+    registry = importlib.import_module("tools.registry")
+    agent = importlib.import_module("agent")
+    importlib.reload(agent)
+
+    weather = registry.select_tools("what's the weather in Paris", 3, agent._EXTRA_RULES)
+    assert weather[0].name == "get_weather"
+
+    # Russian verbs are matched through the rule lines that mention the tool
+    delete = registry.select_tools("удали файл notes.txt", 3, agent._EXTRA_RULES)
+    assert delete[0].name == "delete_path"
+
+    assert registry.select_tools("привет как дела", 3, agent._EXTRA_RULES) is None
+
+    # the read-only core tools come with every scoped list
+    folder = [s.name for s in registry.select_tools("what is in the documents folder", 6, agent._EXTRA_RULES)]
+    assert set(registry.CORE_TOOLS) <= set(folder)
+    # a weak match offers everything rather than a destructive guess
+    assert registry.select_tools("find TODO in the project", 6, agent._EXTRA_RULES) is None
+
+    full = agent.make_system_message()["content"]
+    scoped = agent.make_system_message("what's the weather in Paris")["content"]
+    assert "get_weather(" in scoped and "replace_text(" not in scoped
+    # rules and examples for tools that weren't offered are left out too
+    assert "delete_path" not in scoped and "MULTI-ACTION EXAMPLE" not in scoped
+    assert "If no tool is needed" in scoped
+    delete = agent.make_system_message("удали файл notes.txt")["content"]
+    assert "call delete_path" in delete and "use replace_text" not in delete
+    assert len(scoped) < len(full)
+    assert agent.make_system_message("привет как дела")["content"] == full
@@ -0,0 +1,79 @@
+import importlib
+import time
+
+from config import Settings
+
+
+def _reload(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("JARVIS_CONFIG", str(tmp_path / "nope.json"))
+    config = importlib.import_module("config")
+    importlib.reload(config)
+    transport = importlib.import_module("transport")
+    return importlib.reload(transport)
+
+
+def test_clients_share_one_pool(monkeypatch, tmp_path):
+    transport = _reload(monkeypatch, tmp_path)
+    llm_client = importlib.reload(importlib.import_module("llm_client"))
+
+    http = transport.get_http_client()
+    assert transport.get_http_client() is http
+    assert llm_client.get_client()._client is http
+    assert llm_client.get_async_client()._client is transport.get_async_http_client()
+
+
+def test_weather_uses_shared_client(monkeypatch, tmp_path):
+    _reload(monkeypatch, tmp_path)
+    weather = importlib.reload(importlib.import_module("tools.weather"))
+
+    seen = {}
+
+    class _Resp:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {
+                "weather": [{"description": "clear sky"}],
+                "main": {"temp": 20.0, "feels_like": 19.5, "humidity": 40},
+            }
+
+    class _Client:
+        def get(self, url, params=None, timeout=None):
+            seen["url"] = url
+            seen["q"] = params["q"]
+            return _Resp()
+
+    monkeypatch.setattr(weather, "get_settings", lambda: Settings(openai_key="sk-test", openweather_api_key="k"))
+    monkeypatch.setattr(weather, "get_http_client", lambda: _Client())
+
+    out = weather.get_weather("Oslo")
+    assert "Weather in Oslo: clear sky" in out
+    assert seen == {"url": weather.WEATHER_URL, "q": "Oslo"}
+
+
+def test_keepalive_pings_only_when_idle(monkeypatch, tmp_path):
+    transport = _reload(monkeypatch, tmp_path)
+    pings = []
+
+    def fake_warm_up(urls=None):
+        pings.append(time.monotonic())
+        transport._touch()
+        return 1
+
+    monkeypatch.setattr(transport, "warm_up", fake_warm_up)
+    keepalive = transport.KeepAlive(interval=0.1)
+    assert keepalive.start()
+    time.sleep(0.35)
+    # steady traffic keeps the pool busy, so no pings are needed
+    busy_from = len(pings)
+    deadline = time.monotonic() + 0.3
+    while time.monotonic() < deadline:
+        transport._touch()
+        time.sleep(0.02)
+    keepalive.stop()
+
+    assert busy_from >= 3
+    assert len(pings) - busy_from <= 1
+    assert not transport.KeepAlive(interval=0).start()
@@ -0,0 +1,66 @@
+import os
+import time
+
+import pytest
+
+from audio.tts_cache import TTSCache
+
+VOICE = ("gpt-4o-mini-tts", "alloy", "mp3")
+
+
+def test_key_includes_model_voice_and_format(tmp_path):
+    cache = TTSCache(tmp_path)
+    cache.put(*VOICE, "hello", b"alloy-mp3")
+
+    assert cache.get(*VOICE, "hello").read_bytes() == b"alloy-mp3"
+    assert cache.get("gpt-4o-mini-tts", "verse", "mp3", "hello") is None
+    assert cache.get("gpt-4o-mini-tts", "alloy", "wav", "hello") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_uncommitted_clip_is_discarded(tmp_path):
+    cache = TTSCache(tmp_path)
+    with pytest.raises(RuntimeError):
+        with cache.writer(*VOICE, "interrupted") as clip:
+            clip.write(b"partial")
+            raise RuntimeError("stop_speaking")
+    with cache.writer(*VOICE, "cut short") as clip:
+        clip.write(b"partial")
+
+    assert cache.get(*VOICE, "interrupted") is None
+    assert cache.get(*VOICE, "cut short") is None
+    assert not list(tmp_path.glob(".tmp-*"))
+
+
+def test_truncated_or_missing_file_is_a_miss(tmp_path):
+    cache = TTSCache(tmp_path)
+    path = cache.put(*VOICE, "hello", b"0123456789")
+    path.write_bytes(b"01234")
+    assert cache.get(*VOICE, "hello") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used_and_old_entries(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=25, max_age_days=1)
+    cache.put(*VOICE, "a", b"x" * 10)
+    time.sleep(0.01)
+    cache.put(*VOICE, "b", b"x" * 10)
+    time.sleep(0.01)
+    cache.get(*VOICE, "a")
+    cache.put(*VOICE, "c", b"x" * 10)
+
+    assert cache.get(*VOICE, "b") is None
+    assert cache.get(*VOICE, "a") is not None
+    assert cache.get(*VOICE, "c") is not None
+
+    cache._db.execute("UPDATE clips SET last_used = ?", (time.time() - 3 * 86400,))
+    cache.put(*VOICE, "d", b"x")
+    assert cache.stats()["entries"] == 1
+    assert sorted(p.name for p in tmp_path.glob("*.mp3")) == [TTSCache.make_key(*VOICE, "d") + ".mp3"]
+
+
+def test_leftover_temp_files_are_removed(tmp_path):
+    (tmp_path / ".tmp-abc-123").write_bytes(b"junk")
+    TTSCache(tmp_path)
+    assert not os.path.exists(tmp_path / ".tmp-abc-123")
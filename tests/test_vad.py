@@ -0,0 +1,76 @@
+import numpy as np
+
+from audio.vad import FRAME_MS, EnergyVAD, Endpointer, frame_features
+
+SR = 16000
+FRAME = SR * FRAME_MS // 1000
+
+
+def _tone(seconds, freq=220.0, amp=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (np.sin(2 * np.pi * freq * t) * amp * 32767).astype(np.int16)
+
+
+def _noise(seconds, amp=0.002, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * SR)) * amp * 32767).astype(np.int16)
+
+
+def _frames(signal):
+    usable = len(signal) - len(signal) % FRAME
+    return list(signal[:usable].reshape(-1, FRAME))
+
+
+def test_frame_features():
+    db, zcr = frame_features(_tone(0.03, amp=0.5)[:FRAME])
+    assert -10 < db < 0
+    assert zcr < 0.05
+    _, noise_zcr = frame_features(_noise(0.03, amp=0.1)[:FRAME])
+    assert noise_zcr > 0.35
+
+
+def test_vad_rejects_quiet_noise_and_accepts_tone():
+    vad = EnergyVAD()
+    assert not any(vad.is_speech(f) for f in _frames(_noise(0.5)))
+    assert all(vad.is_speech(f) for f in _frames(_tone(0.3)))
+
+
+def test_endpointer_trims_and_stops_after_trailing_silence():
+    signal = np.concatenate([_noise(1.0), _tone(0.6), _noise(3.0, seed=1)])
+    ep = Endpointer(sample_rate=SR, trailing_silence_ms=300, padding_ms=90)
+    fed = 0
+    for frame in _frames(signal):
+        fed += 1
+        if ep.feed(frame):
+            break
+
+    audio = ep.audio()
+    assert ep.done and not ep.capped
+    # stopped ~300 ms after the speech ended, well before the input ran out
+    assert fed * FRAME / SR < 2.0
+    # 0.6 s of speech plus 90 ms of padding on either side (and frame rounding)
+    assert 0.55 <= len(audio) / SR <= 0.85
+
+
+def test_endpointer_reports_utterance_frames():
+    signal = np.concatenate([_noise(1.0), _tone(0.6), _noise(3.0, seed=1)])
+    seen = []
+    ep = Endpointer(sample_rate=SR, trailing_silence_ms=300, padding_ms=90, on_frame=seen.append)
+    ep.process(_frames(signal))
+    # every frame from the onset (with its preroll) on, before trimming
+    assert len(seen) > 0 and sum(map(len, seen)) >= len(ep.audio())
+    assert np.array_equal(np.concatenate(seen)[:len(ep.audio())], ep.audio())
+
+
+def test_endpointer_caps_length():
+    ep = Endpointer(sample_rate=SR, max_seconds=1.0)
+    audio = ep.process(_frames(_tone(5.0)))
+    assert ep.capped
+    assert abs(len(audio) / SR - 1.0) < 0.05
+
+
+def test_endpointer_gives_up_without_speech():
+    ep = Endpointer(sample_rate=SR, start_timeout=0.5)
+    frames = _frames(_noise(3.0))
+    assert ep.process(frames) is None
+    assert ep.done and not ep.started
@@ -0,0 +1,28 @@
+import wave
+
+import numpy as np
+
+from audio.wav import archive_recording, encode_wav
+
+
+def test_encode_wav_round_trip():
+    samples = (np.sin(np.arange(1600) / 10) * 10000).astype(np.int16).reshape(-1, 1)
+    buf = encode_wav(samples, 16000)
+
+    assert buf.name == "speech.wav"
+    assert buf.tell() == 0
+    with wave.open(buf, "rb") as wf:
+        assert wf.getnchannels() == 1
+        assert wf.getsampwidth() == 2
+        assert wf.getframerate() == 16000
+        decoded = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    assert np.array_equal(decoded, samples.reshape(-1))
+
+
+def test_archive_keeps_newest_files(tmp_path):
+    buf = encode_wav(np.zeros(160, dtype=np.int16), 16000)
+    paths = [archive_recording(buf, tmp_path / "rec", max_files=3) for _ in range(5)]
+
+    kept = sorted((tmp_path / "rec").glob("*.wav"))
+    assert kept == paths[-3:]
+    assert kept[0].read_bytes() == bytes(buf.getbuffer())
@@ -0,0 +1,76 @@
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# ensure project root is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def _run(code: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", code]
+    return subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def measure_wall(module: str, repeats: int) -> Dict[str, Any]:
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - t)\n"
+        "print('openai' in sys.modules)\n"
+        "print('numpy' in sys.modules)\n"
+    )
+    times: List[float] = []
+    openai_loaded = numpy_loaded = False
+    for _ in range(repeats):
+        lines = _run(code).stdout.split()
+        times.append(float(lines[0]))
+        openai_loaded = lines[1] == "True"
+        numpy_loaded = lines[2] == "True"
+    return {
+        "module": module,
+        "import_s_median": statistics.median(times),
+        "import_s_min": min(times),
+        "openai_loaded": openai_loaded,
+        "numpy_loaded": numpy_loaded,
+    }
+
+
+def top_imports(module: str, limit: int) -> List[Dict[str, Any]]:
+    # cumulative time of the top-level imports (and their direct children)
+    rows = []
+    for line in _run(f"import {module}", importtime=True).stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m and len(m.group(3)) <= 3:
+            rows.append({"module": m.group(4), "cumulative_ms": int(m.group(2)) / 1000})
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the assistant modules.")
+    parser.add_argument("modules", nargs="*", default=["main", "agent", "llm_client"])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="show the slowest imports of the first module")
+    args = parser.parse_args()
+
+    result: Dict[str, Any] = {"wall": [measure_wall(m, args.repeats) for m in args.modules]}
+    if args.top > 0:
+        result["slowest"] = top_imports(args.modules[0], args.top)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
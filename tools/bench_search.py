@@ -0,0 +1,100 @@
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# ensure project root is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+WORDS = "alpha beta gamma delta jarvis voice search index memory window thread buffer token".split()
+
+
+def make_tree(base: Path, dirs: int, files: int, lines: int, seed: int = 0) -> Dict[str, Any]:
+    """A synthetic documents folder: text files, some binaries and an ignored build dir."""
+    rng = random.Random(seed)
+    total = 0
+    for d in range(dirs):
+        folder = base / f"dir{d:03d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        for f in range(files):
+            if f % 10 == 9:
+                data = bytes(rng.getrandbits(8) for _ in range(4096)) + b"\0"
+                (folder / f"blob{f:03d}.bin").write_bytes(data)
+                continue
+            text = "\n".join(" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines))
+            (folder / f"notes{f:03d}.txt").write_text(text + "\n", encoding="utf-8")
+            total += 1
+    # one needle deep in the tree
+    (base / f"dir{dirs - 1:03d}" / "needle.txt").write_text("the quick brown fox\n", encoding="utf-8")
+    build = base / "build"
+    build.mkdir(exist_ok=True)
+    for f in range(files):
+        (build / f"out{f:03d}.txt").write_text("generated quick brown fox\n" * lines, encoding="utf-8")
+    (base / ".gitignore").write_text("build/\n", encoding="utf-8")
+    return {"text_files": total + 1, "dirs": dirs}
+
+
+def legacy_scan(target: Path, query: str, max_matches: int) -> List[str]:
+    # the old single-threaded fallback: rglob everything, decode every line
+    matches: List[str] = []
+    for f in target.rglob("*"):
+        if len(matches) >= max_matches:
+            break
+        if not f.is_file() or f.stat().st_size > 200_000:
+            continue
+        try:
+            with f.open("r", encoding="utf-8", errors="ignore") as fh:
+                for idx, line in enumerate(fh, start=1):
+                    if query in line:
+                        matches.append(f"{f}:{idx}:{line.rstrip()}")
+                        if len(matches) >= max_matches:
+                            break
+        except OSError:
+            continue
+    return matches
+
+
+def measure(fn: Callable[[], List[str]], repeats: int) -> Dict[str, Any]:
+    times = []
+    result: List[str] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(times) * 1000, 1), "matches": len(result)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search_text fallback on a synthetic tree.")
+    parser.add_argument("--dirs", type=int, default=40)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--workers", type=int, action="append", help="engine worker counts (default: 1 and 8)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--dir", help="existing tree to search instead of a synthetic one")
+    args = parser.parse_args()
+
+    from tools.search_engine import SearchEngine
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(args.dir) if args.dir else Path(tmp)
+        tree = {"path": str(base)} if args.dir else make_tree(base, args.dirs, args.files, args.lines)
+        results: Dict[str, Any] = {"tree": tree}
+        for query, label in (("quick brown fox", "rare"), ("zzz-not-there", "miss"), ("jarvis voice", "common")):
+            row: Dict[str, Any] = {"legacy": measure(lambda: legacy_scan(base, query, 20), args.repeats)}
+            for workers in args.workers or [1, 8]:
+                engine = SearchEngine(workers=workers)
+                row[f"engine_{workers}"] = measure(lambda: engine.search(query, base, 20), args.repeats)
+            results[label] = row
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, List
+
+# ensure project root is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SAMPLE_RATE = 16000
+
+
+def _synthetic_utterances(count: int) -> List[Any]:
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    out = []
+    for i in range(count):
+        speech = np.sin(2 * np.pi * 180 * np.arange(int((0.8 + 0.4 * i) * SAMPLE_RATE)) / SAMPLE_RATE) * 9000
+        silence = rng.standard_normal(SAMPLE_RATE) * 60
+        out.append(np.concatenate([silence[:8000], speech, silence]).astype(np.int16))
+    return out
+
+
+def _load_wav(path: str) -> Any:
+    import numpy as np
+
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise SystemExit(f"{path}: expected 16 kHz mono 16-bit WAV")
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+
+def run_backend(backend, utterances: List[Any], realtime: bool) -> Dict[str, Any]:
+    """Feeds each utterance through the VAD and a backend session like transcribe_once does."""
+    from audio.vad import Endpointer
+
+    finals, first_partials, partial_counts = [], [], []
+    for audio in utterances:
+        partials: List[float] = []
+        session = backend.session(SAMPLE_RATE, on_partial=lambda _p: partials.append(time.perf_counter()))
+        endpointer = Endpointer(sample_rate=SAMPLE_RATE, on_frame=session.feed if backend.streaming else None)
+        step = endpointer.frame_len
+        started = time.perf_counter()
+        for i in range(0, len(audio) - step + 1, step):
+            if realtime:
+                time.sleep(step / SAMPLE_RATE)
+            if endpointer.feed(audio[i:i + step]):
+                break
+        trimmed = endpointer.audio()
+        if trimmed is None:
+            session.cancel()
+            continue
+        result = session.finish(trimmed)
+        finals.append(result.latency)
+        partial_counts.append(len(partials))
+        if partials:
+            first_partials.append(partials[0] - started)
+    return {
+        "backend": backend.name,
+        "utterances": len(finals),
+        "final_latency_ms_median": statistics.median(finals) * 1000 if finals else None,
+        "first_partial_s_median": statistics.median(first_partials) if first_partials else None,
+        "partials_mean": statistics.mean(partial_counts) if partial_counts else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare STT backends on recorded or synthetic utterances.")
+    parser.add_argument("--backend", action="append", choices=["fake", "local", "openai"],
+                        help="backend to measure (repeatable; default: fake)")
+    parser.add_argument("--wav", action="append", help="16 kHz mono WAV file (repeatable)")
+    parser.add_argument("--count", type=int, default=5, help="number of synthetic utterances")
+    parser.add_argument("--realtime", action="store_true", help="feed audio at capture speed")
+    parser.add_argument("--fake-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    from audio import stt_backends
+
+    utterances = [_load_wav(p) for p in args.wav] if args.wav else _synthetic_utterances(args.count)
+    results = []
+    for name in args.backend or ["fake"]:
+        if name == "fake":
+            backend = stt_backends.FakeBackend(["open firefox", "what's the weather"], latency=args.fake_latency)
+        else:
+            backend = stt_backends.BACKENDS[name]()
+        results.append(run_backend(backend, utterances, args.realtime))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
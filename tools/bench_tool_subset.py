@@ -0,0 +1,95 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# ensure project root is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_UTTERANCES = [
+    "what's the weather in Warsaw",
+    "open firefox",
+    "read the file notes.txt",
+    "удали файл old.log",
+    "search for TODO in the project",
+    "replace foo with bar in config.txt",
+    "summarize documents/report.txt",
+    "перемести a.txt в documents",
+]
+
+
+def measure_prompts(utterances: List[str]) -> Dict[str, Any]:
+    from agent import make_system_message
+    from history import estimate_tokens
+
+    full_tokens = estimate_tokens(make_system_message()["content"])
+    rows = []
+    for text in utterances:
+        started = time.perf_counter()
+        scoped = make_system_message(text)["content"]
+        select_ms = (time.perf_counter() - started) * 1000
+        rows.append({
+            "text": text,
+            "full_tokens": full_tokens,
+            "subset_tokens": estimate_tokens(scoped),
+            "select_ms": round(select_ms, 3),
+        })
+    subset = [r["subset_tokens"] for r in rows]
+    return {
+        "full_tokens": full_tokens,
+        "subset_tokens_mean": statistics.mean(subset) if subset else 0,
+        "reduction": 1 - statistics.mean(subset) / full_tokens if subset else 0.0,
+        "rows": rows,
+    }
+
+
+def measure_latency(utterances: List[str], repeats: int) -> Dict[str, Any]:
+    import llm_client
+    from agent import make_system_message
+
+    out: Dict[str, Any] = {}
+    for variant in ("full", "subset"):
+        first_token, total, prompt_tokens = [], [], []
+        for text in utterances:
+            system = make_system_message() if variant == "full" else make_system_message(text)
+            messages = [system, {"role": "user", "content": text}]
+            for _ in range(repeats):
+                started = time.perf_counter()
+                first = None
+                for _chunk in llm_client.ask_llm_stream(messages):
+                    if first is None:
+                        first = time.perf_counter() - started
+                total.append(time.perf_counter() - started)
+                first_token.append(first if first is not None else total[-1])
+                if llm_client.last_usage.get("prompt_tokens") is not None:
+                    prompt_tokens.append(llm_client.last_usage["prompt_tokens"])
+        out[variant] = {
+            "first_token_s_median": statistics.median(first_token),
+            "total_s_median": statistics.median(total),
+            "prompt_tokens_mean": statistics.mean(prompt_tokens) if prompt_tokens else None,
+        }
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt size/latency with and without tool subset selection.")
+    parser.add_argument("--utterances", help="JSON file with a list of user utterances")
+    parser.add_argument("--live", action="store_true", help="also measure real model latency (needs OPENAI_API_KEY)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    utterances = json.loads(Path(args.utterances).read_text()) if args.utterances else DEFAULT_UTTERANCES
+
+    result: Dict[str, Any] = {"prompt": measure_prompts(utterances)}
+    if args.live:
+        result["latency"] = measure_latency(utterances, args.repeats)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
+import json
 import os
 import shutil
 import subprocess
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
-from config import load_settings
+from config import get_settings
 from .weather import get_weather as _get_weather
 from .registry import tool
+from . import file_ranges
+from .dir_listing import list_entries
+from .edit_engine import Edit, EditError, apply_edits
+from .file_stats import file_stats
+from .search_engine import SearchEngine
+from .search_index import get_index, mark_all_stale
 import logging
 
 logger = logging.getLogger("jarvis.core")
@@ -16,11 +23,10 @@ def _env_path(name: str, default: Path) -> Path:
     base = Path(val) if val is not None else default
     return base.expanduser().resolve()
 
-_settings = load_settings()
 ROOT_DIR = _env_path("JARVIS_ROOT", Path(__file__).resolve().parent.parent)
 DOCS_DIR = _env_path("JARVIS_DOCUMENTS", Path.home() / "Documents")
 
-APP_COMMANDS: Dict[str, str] = _settings.app_commands or {
+APP_COMMANDS: Dict[str, str] = {
     "firefox": "firefox",
     "browser": "firefox",
     "chrome": "google-chrome",
@@ -160,29 +166,71 @@ def close_app(name: str) -> str:
 
 
 @tool
-def read_file(path: str, max_bytes: int = 8000) -> str:
+def read_file(
+    path: str,
+    max_bytes: int = 8000,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    head: Optional[int] = None,
+    tail: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+) -> str:
+    """- Reads a file: all of it, `offset`/`length` bytes (negative offset counts from the end), the first `head` or last `tail` lines, or lines `start_line`..`end_line`."""
     p = _resolve_path(path)
-    data = p.read_bytes()
-    truncated = data[:max_bytes]
-    text = truncated.decode("utf-8", errors="replace")
-    if len(data) > max_bytes:
+    if p.is_dir():
+        return f"{p} is a directory; try list_dir instead"
+    if start_line is not None or end_line is not None:
+        first = max(1, start_line or 1)
+        if end_line is not None and end_line < first:
+            return f"Invalid line range {first}-{end_line}"
+        data, total, cut = file_ranges.line_range(p, first, end_line, max_bytes)
+        if first > total:
+            return f"{p} has only {total} lines"
+        text = data.decode("utf-8", errors="replace")
+        return text + "\n... [truncated]" if cut else text
+    if head is not None:
+        data, more = file_ranges.head(p, max(0, head), max_bytes)
+        text = data.decode("utf-8", errors="replace")
+        return text + "\n... [truncated]" if more else text
+    if tail is not None:
+        data, more = file_ranges.tail(p, max(0, tail), max_bytes)
+        text = data.decode("utf-8", errors="replace")
+        return "... [truncated]\n" + text if more else text
+    want = max_bytes if length is None else min(max(0, length), max_bytes)
+    data, start, size = file_ranges.read_range(p, offset or 0, want)
+    text = data.decode("utf-8", errors="replace")
+    if start + len(data) < size:
         text += "\n... [truncated]"
     return text
 
 
 @tool
-def list_dir(path: Optional[str] = None, max_entries: int = 50) -> str:
-    """- Lists files/directories at the given path."""
+def list_dir(
+    path: Optional[str] = None,
+    max_entries: int = 50,
+    sort: str = "name",
+    cursor: Optional[str] = None,
+    pattern: Optional[str] = None,
+    kind: Optional[str] = None,
+    sizes: bool = False,
+) -> str:
+    """- Lists files/directories at the given path: sorted by `name`, `mtime` (newest first) or `size` (largest first), filtered by a glob `pattern` and `kind` (file/dir), with `sizes` optional; pass the returned cursor to get the next page."""
     p = _resolve_path(path or ".")
     if not p.is_dir():
         return f"{p} is not a directory"
+    try:
+        page, next_cursor = list_entries(p, max_entries, sort, cursor, pattern, kind, sizes)
+    except ValueError as e:
+        return f"Cannot list {p}: {e}"
     entries = []
-    for i, child in enumerate(sorted(p.iterdir())):
-        if i >= max_entries:
-            entries.append("... (truncated)")
-            break
-        tag = "DIR" if child.is_dir() else "FILE"
-        entries.append(f"{tag} {child.name}")
+    for entry in page:
+        line = f"{'DIR' if entry.is_dir else 'FILE'} {entry.name}"
+        if entry.size is not None:
+            line += f" ({entry.size} bytes)"
+        entries.append(line)
+    if next_cursor:
+        entries.append(f"... (truncated; cursor={next_cursor} for the next page)")
     return "\n".join(entries)
 
 
@@ -199,61 +247,51 @@ def open_in_vscode(path: str) -> str:
 
 @tool
 def summarize_file(path: str, max_bytes: int = 16000, head_lines: int = 20) -> str:
-    """- Returns a short summary of a file (path, size, first N lines)."""
+    """- Returns a short summary of a file (path, size, type, line count, structure, first and last lines)."""
     if max_bytes is None or max_bytes <= 0:
-        max_bytes = getattr(_settings, "summarize_max_bytes", 16000)
+        max_bytes = getattr(get_settings(), "summarize_max_bytes", 16000)
         if max_bytes <= 0:
             logger.warning("summarize_max_bytes <= 0; therefore was set to 16k. change the parameter in config.")
             max_bytes = 16000
     if head_lines is None or head_lines <= 0:
-        head_lines = getattr(_settings, "summarize_head_lines", 20)
+        head_lines = getattr(get_settings(), "summarize_head_lines", 20)
         if head_lines <= 0:
             logger.warning("summarize_head_lines <= 0; therefore was set to 20. change the parameter in config.")
             head_lines = 20
     p = _resolve_path(path)
     if p.is_dir():
         return f"{p} is a directory; try list_dir instead"
-    data = p.read_bytes()
-    truncated = data[:max_bytes]
-    text = truncated.decode("utf-8", errors="replace")
+    stats = file_stats(p, getattr(get_settings(), "summarize_tail_lines", 5))
+    meta = [f"Path: {p}", f"Size: {stats.size} bytes"]
+    if stats.kind == "binary":
+        meta.append("Type: binary")
+        return "\n".join(meta)
+    meta.append(f"Type: {stats.kind} ({stats.encoding})")
+    meta.append(f"Lines: {stats.lines} (longest: {stats.longest} characters, line {stats.longest_at})")
+    if stats.structure:
+        meta.append(f"Structure: {stats.structure}")
+    # only the part that is shown is read, however big the file
+    data, _start, size = file_ranges.read_range(p, 0, max_bytes)
+    text = data.decode(stats.codec, errors="replace")
     lines = text.splitlines()
     head = "\n".join(lines[:head_lines])
-    meta = f"Path: {p}\nSize: {len(data)} bytes"
-    if len(data) > max_bytes:
+    if size > max_bytes:
         head += "\n... [truncated]"
-    return f"{meta}\n\n{head}"
+    out = "\n".join(meta) + f"\n\n{head}"
+    if stats.tail and stats.lines > head_lines:
+        tail = [line if len(line) <= 200 else "..." + line[-200:] for line in stats.tail]
+        out += f"\n\nLast {len(tail)} lines:\n" + "\n".join(tail)
+    return out
 
 
 def _search_text(target: Path, query: str, max_matches: int) -> str:
-    matches = []
-
-    def search_file(f: Path):
-        try:
-            if f.stat().st_size > 200_000:
-                return
-        except OSError:
-            return
-        try:
-            with f.open("r", encoding="utf-8", errors="ignore") as fh:
-                for idx, line in enumerate(fh, start=1):
-                    if query in line:
-                        matches.append(f"{f}:{idx}:{line.rstrip()}")
-                        if len(matches) >= max_matches:
-                            return True
-        except (OSError, UnicodeError):
-            return
-        return False
-
-    if target.is_file():
-        search_file(target)
-    else:
-        for f in target.rglob("*"):
-            if len(matches) >= max_matches:
-                break
-            if f.is_file():
-                if search_file(f):
-                    break
-
+    settings = get_settings()
+    engine = SearchEngine(
+        workers=settings.search_workers,
+        max_filesize=settings.search_max_filesize,
+        exclude=[Path(settings.cache_dir).expanduser().resolve()],
+    )
+    matches = engine.search(query, target, max_matches)
     if not matches:
         return "No matches"
     if len(matches) > max_matches:
@@ -261,13 +299,37 @@ def _search_text(target: Path, query: str, max_matches: int) -> str:
     return "\n".join(matches)
 
 
+def _search_index():
+    settings = get_settings()
+    cache_dir = Path(settings.cache_dir).expanduser().resolve()
+    return get_index(
+        cache_dir / "search_index.sqlite3",
+        [r for r in (ROOT_DIR, DOCS_DIR) if r],
+        max_filesize=settings.search_max_filesize,
+        refresh_interval=settings.search_index_refresh,
+        exclude=[cache_dir],
+    )
+
+
 @tool
 def search_text(query: str, path: Optional[str] = None, max_matches: int = 20) -> str:
     """- Grep-like search (ripgrep if available) under an allowed root."""
     target = _resolve_path(path or ".")
     if not query.strip():
         return "Empty query"
-    cmd = ["rg", "-n", "--with-filename", "--max-count", "1", "--max-filesize", "200K", query, str(target)]
+    if get_settings().search_index and target.is_dir():
+        # None while the index is still being built in the background
+        lines = _search_index().search(query, target, max_matches)
+        if lines is not None:
+            if not lines:
+                return "No matches"
+            if len(lines) > max_matches:
+                lines = lines[:max_matches] + ["... (truncated)"]
+            return "\n".join(lines)
+    cmd = [
+        "rg", "-n", "--with-filename", "--max-count", "1",
+        "--max-filesize", str(get_settings().search_max_filesize), query, str(target),
+    ]
     try:
         proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
     except FileNotFoundError:
@@ -276,7 +338,8 @@ def search_text(query: str, path: Optional[str] = None, max_matches: int = 20) -
         return f"rg error: {proc.stderr.strip()}"
     lines = proc.stdout.strip().splitlines()
     if not lines:
-        return _search_text(target, query, max_matches)
+        # rg already looked everywhere; scanning again would only find the same nothing
+        return "No matches"
     if len(lines) > max_matches:
         lines = lines[:max_matches] + ["... (truncated)"]
     return "\n".join(lines)
@@ -314,6 +377,7 @@ def write_file(path: str, content: str = "", append: bool = False) -> str:
             f.write(content)
         action = "Appended to" if append else "Wrote to"
         msg = f"{action} {p}"
+        mark_all_stale()
         print(f"Jarvis: {msg}")
         return msg
     except Exception as e:
@@ -338,11 +402,13 @@ def delete_path(path: str, recursive: bool = True) -> str:
             else:
                 p.rmdir()
             msg = f"Deleted directory: {p}"
+            mark_all_stale()
             print(f"Jarvis: {msg}")
             return msg
 
         p.unlink()
         msg = f"Deleted file: {p}"
+        mark_all_stale()
         print(f"Jarvis: {msg}")
         return msg
     except Exception as e:
@@ -383,6 +449,7 @@ def move_path(src: str, dest: str, overwrite: bool = False) -> str:
 
         shutil.move(str(src_p), str(dest_final))
         msg = f"Moved: {src_p} -> {dest_final}"
+        mark_all_stale()
         print(f"Jarvis: {msg}")
         return msg
     except Exception as e:
@@ -425,6 +492,7 @@ def copy_path(src: str, dest: str, overwrite: bool = False) -> str:
             dest_final.parent.mkdir(parents=True, exist_ok=True)
             shutil.copy2(src_p, dest_final)
             msg = f"Copied file: {src_p} -> {dest_final}"
+        mark_all_stale()
         print(f"Jarvis: {msg}")
         return msg
     except Exception as e:
@@ -452,8 +520,17 @@ def rename_path(path: str, new_name: str, overwrite: bool = False) -> str:
         return f"Failed to rename {p}: {e}"
 
 
+def _apply(p: Path, edits: List[Edit]) -> Optional[List[int]]:
+    counts = apply_edits(p, edits)
+    if not any(counts) or any(e.required and not c for e, c in zip(edits, counts)):
+        return None
+    mark_all_stale()
+    return counts
+
+
 @tool
-def replace_text(path: str, old: str, new: str, count: int = 1) -> str:
+def replace_text(path: str, old: str, new: str, count: int = 1, regex: bool = False) -> str:
+    """- Replaces `old` with `new` (the first `count` times; 0 for all). With regex=true `old` is a pattern and `new` may use \\1."""
     p = _resolve_path(path)
     try:
         if not p.exists():
@@ -463,33 +540,24 @@ def replace_text(path: str, old: str, new: str, count: int = 1) -> str:
         if not old:
             return "Old text is empty"
 
-        try:
-            text = p.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            return f"Failed to read {p}: not valid text"
-
-        occurrences = text.count(old)
-        if occurrences == 0:
-            return f"Text not found in {p}"
-
         if count is None:
             count = 1
-        if count <= 0:
-            count = -1
-
-        replaced = occurrences if count == -1 else min(count, occurrences)
-        new_text = text.replace(old, new, count)
-        p.write_text(new_text, encoding="utf-8")
+        counts = _apply(p, [Edit.replace(old, new, max(count, 0), regex)])
+        if counts is None:
+            return f"Text not found in {p}"
 
-        msg = f"Replaced {replaced} occurrence(s) in {p}"
+        msg = f"Replaced {counts[0]} occurrence(s) in {p}"
         print(f"Jarvis: {msg}")
         return msg
+    except EditError as e:
+        return str(e)
     except Exception as e:
         return f"Failed to edit {p}: {e}"
 
 
 @tool
-def insert_text(path: str, text: str, after: str | None = None, before: str | None = None) -> str:
+def insert_text(path: str, text: str, after: str | None = None, before: str | None = None, regex: bool = False) -> str:
+    """- Inserts `text` after the first `after` or before the first `before` (patterns with regex=true), or at the end of the file."""
     p = _resolve_path(path)
     try:
         if not p.exists():
@@ -499,31 +567,60 @@ def insert_text(path: str, text: str, after: str | None = None, before: str | No
         if after and before:
             return "Provide only one of 'after' or 'before'"
 
-        try:
-            content = p.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            return f"Failed to read {p}: not valid UTF-8 text"
-
-        insert_at = None
-        if after is not None:
-            idx = content.find(after)
-            if idx == -1:
-                return f"Anchor not found in {p}"
-            insert_at = idx + len(after)
-        elif before is not None:
-            idx = content.find(before)
-            if idx == -1:
-                return f"Anchor not found in {p}"
-            insert_at = idx
-        else:
-            insert_at = len(content)
-
-        updated = content[:insert_at] + (text or "") + content[insert_at:]
-        p.write_text(updated, encoding="utf-8")
+        if _apply(p, [Edit.insert(text or "", after, before, regex)]) is None:
+            return f"Anchor not found in {p}"
 
         msg = f"Inserted text into {p}"
         print(f"Jarvis: {msg}")
         return msg
+    except EditError as e:
+        return str(e)
+    except Exception as e:
+        return f"Failed to edit {p}: {e}"
+
+
+@tool
+def edit_file(path: str, edits: list) -> str:
+    """- Applies several edits to one file in a single pass, all or nothing. Each edit is either
+      {"old": ..., "new": ..., "count": 0, "regex": false} (count 0 replaces all) or
+      {"insert": ..., "after": ...} / {"insert": ..., "before": ...} (no anchor appends).
+    """
+    p = _resolve_path(path)
+    try:
+        if not p.exists():
+            return f"Path not found: {p}"
+        if p.is_dir():
+            return f"{p} is a directory"
+        if isinstance(edits, str):
+            edits = json.loads(edits)
+        if isinstance(edits, dict):
+            edits = [edits]
+        batch: List[Edit] = []
+        for i, item in enumerate(edits or [], start=1):
+            if not isinstance(item, dict):
+                return f"Edit {i} is not an object"
+            regex = bool(item.get("regex", False))
+            if "insert" in item:
+                batch.append(Edit.insert(item["insert"] or "", item.get("after"), item.get("before"), regex))
+            elif item.get("old"):
+                count = item.get("count", 0)
+                batch.append(Edit.replace(item["old"], item.get("new") or "", max(int(count or 0), 0), regex))
+            else:
+                return f"Edit {i} needs 'old' or 'insert'"
+
+        counts = apply_edits(p, batch)
+        missed = [i for i, (e, c) in enumerate(zip(batch, counts), start=1) if e.required and not c]
+        if missed:
+            return f"Edit(s) {', '.join(map(str, missed))} did not match in {p}; nothing was changed"
+        if not any(counts):
+            return f"Nothing to change in {p}"
+
+        msg = f"Applied {len(batch)} edit(s) to {p} ({sum(counts)} change(s))"
+        mark_all_stale()
+        print(f"Jarvis: {msg}")
+        return msg
+    except (EditError, json.JSONDecodeError) as e:
+        return str(e)
     except Exception as e:
         return f"Failed to edit {p}: {e}"
 
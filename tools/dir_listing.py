@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import base64
+import fnmatch
+import heapq
+import json
+import os
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+SORTS = ("name", "mtime", "size")
+KINDS = ("file", "dir")
+
+
+class Entry(NamedTuple):
+    key: tuple
+    name: str
+    is_dir: bool
+    size: Optional[int]
+
+
+def encode_cursor(sort: str, key: tuple) -> str:
+    raw = json.dumps([sort, *key], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """The sort key a cursor points after; ValueError if it's damaged or from another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid cursor: {e}") from None
+    if not isinstance(decoded, list) or not decoded or decoded[0] != sort:
+        raise ValueError("cursor belongs to a different sort order")
+    return tuple(decoded[1:])
+
+
+def _entries(path: Path, sort: str, pattern: Optional[str], kind: Optional[str], sizes: bool) -> Iterator[Entry]:
+    with os.scandir(path) as it:
+        for entry in it:
+            if pattern and not fnmatch.fnmatch(entry.name, pattern):
+                continue
+            try:
+                # the type comes from the directory entry, without a stat, unless it's a symlink
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if kind and (kind == "dir") != is_dir:
+                continue
+            size = mtime = 0
+            if sort != "name" or (sizes and not is_dir):
+                try:
+                    st = entry.stat()
+                    size, mtime = st.st_size, st.st_mtime_ns
+                except OSError:
+                    pass
+            # newest and largest first; the name breaks ties
+            key = (entry.name,) if sort == "name" else (-mtime if sort == "mtime" else -size, entry.name)
+            yield Entry(key, entry.name, is_dir, size if sizes and not is_dir else None)
+
+
+def list_entries(
+    path: Path,
+    limit: int = 50,
+    sort: str = "name",
+    cursor: Optional[str] = None,
+    pattern: Optional[str] = None,
+    kind: Optional[str] = None,
+    sizes: bool = False,
+) -> Tuple[List[Entry], Optional[str]]:
+    """
+    One page of `path`: the first `limit` entries after `cursor` in `sort`
+    order, and the cursor for the next page (None on the last one). The
+    directory is streamed with scandir into a heap of `limit` + 1 entries,
+    so memory follows the page size, not the directory size.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"unknown sort {sort!r} (use {', '.join(SORTS)})")
+    if kind not in (None, *KINDS):
+        raise ValueError(f"unknown kind {kind!r} (use {', '.join(KINDS)})")
+    after = decode_cursor(cursor, sort) if cursor else None
+    limit = max(1, limit)
+    entries = _entries(path, sort, pattern, kind, sizes)
+    if after is not None:
+        entries = (e for e in entries if e.key > after)
+    page = heapq.nsmallest(limit + 1, entries, key=lambda e: e.key)
+    if len(page) <= limit:
+        return page, None
+    return page[:limit], encode_cursor(sort, page[limit - 1].key)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import codecs
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+CHUNK_BYTES = 1 << 20
+# how far a regex match may reach across a chunk boundary
+REGEX_OVERLAP = 64 * 1024
+
+
+class EditError(ValueError):
+    pass
+
+
+@dataclass
+class Edit:
+    """
+    One change: `pattern` replaced by `new` at most `count` times (0 for all),
+    as a literal or, with `regex`, a pattern whose `new` may use \\1 or
+    \\g<name>. With `append` the text is added at the end of the file instead.
+    `required` edits must match, or the whole batch is dropped.
+    """
+
+    pattern: str = ""
+    new: str = ""
+    count: int = 0
+    regex: bool = False
+    append: bool = False
+    required: bool = True
+
+    @classmethod
+    def replace(cls, old: str, new: str, count: int = 0, regex: bool = False) -> Edit:
+        return cls(old, new, count, regex)
+
+    @classmethod
+    def insert(cls, text: str, after: Optional[str] = None, before: Optional[str] = None, regex: bool = False) -> Edit:
+        """`text` after the first `after` (or before the first `before`), or at the end of the file."""
+        if after is not None and before is not None:
+            raise EditError("Provide only one of 'after' or 'before'")
+        if after is None and before is None:
+            return cls(new=text, append=True)
+        anchor = after if after is not None else before
+        if regex:
+            escaped = text.replace("\\", "\\\\")
+            new = "\\g<0>" + escaped if after is not None else escaped + "\\g<0>"
+        else:
+            new = anchor + text if after is not None else text + anchor
+        return cls(anchor, new, 1, regex)
+
+
+class _Stage:
+    """
+    One edit applied to a stream of text. Text that could still be part of
+    a match is held back (a literal's length minus one, or REGEX_OVERLAP for
+    a pattern) until the next chunk or the end of the file, and the input just
+    before it is kept as context for lookbehinds and \\b.
+    """
+
+    def __init__(self, edit: Edit) -> None:
+        self.edit = edit
+        self.matches = 0
+        self.left = edit.count if edit.count > 0 else -1
+        if edit.append:
+            self.regex = None
+        elif edit.regex:
+            try:
+                self.regex = re.compile(edit.pattern)
+            except re.error as e:
+                raise EditError(f"Invalid pattern {edit.pattern!r}: {e}") from None
+        else:
+            if not edit.pattern:
+                raise EditError("Old text is empty")
+            self.regex = re.compile(re.escape(edit.pattern))
+        self.hold = REGEX_OVERLAP if edit.regex else len(edit.pattern) - 1
+        # occurrences of a literal that can't overlap itself are found with
+        # str.count/replace instead of one search per match
+        self.plain = not edit.regex and not edit.append and not any(
+            edit.pattern[:k] == edit.pattern[-k:] for k in range(1, len(edit.pattern))
+        )
+        self.context = ""
+        self.pending = ""
+        self.after_empty = False
+
+    def _replacement(self, m: re.Match) -> str:
+        return m.expand(self.edit.new) if self.edit.regex else self.edit.new
+
+    def feed(self, text: str, final: bool = False) -> str:
+        if self.regex is None:
+            return text + (self._appended() if final else "")
+        buf = self.pending + text
+        if self.left == 0:
+            self.pending = ""
+            return buf
+        if self.plain:
+            return self._feed_plain(buf, final)
+        scan = self.context + buf
+        base = len(self.context)
+        pos = base
+        # a match reaching into the held-back tail may grow with the next chunk
+        limit = len(scan) if final else len(scan) - self.hold
+        out: List[str] = []
+        deferred: Optional[int] = None
+        empty_at = None
+        # finditer follows re.sub on empty matches: each one is replaced, but
+        # never twice at the same spot
+        for m in self.regex.finditer(scan, pos):
+            if self.left == 0:
+                break
+            if m.start() == m.end() == base and self.after_empty:
+                # replaced at the end of the previous chunk
+                continue
+            if not final and self.edit.regex and m.end() > limit and m.end() - m.start() <= self.hold:
+                deferred = m.start()
+                break
+            out.append(scan[pos:m.start()])
+            out.append(self._replacement(m))
+            pos = m.end()
+            empty_at = pos if m.start() == m.end() else None
+            self.left -= 1
+            self.matches += 1
+        if final:
+            keep_from = len(scan)
+        else:
+            keep_from = max(pos, len(scan) - self.hold) if self.left != 0 else len(scan)
+            if deferred is not None:
+                keep_from = max(pos, min(keep_from, deferred))
+        out.append(scan[pos:keep_from])
+        self.pending = scan[keep_from:]
+        self.after_empty = empty_at == keep_from
+        if self.edit.regex:
+            self.context = scan[max(0, keep_from - REGEX_OVERLAP):keep_from]
+        return "".join(out)
+
+    def _feed_plain(self, buf: str, final: bool) -> str:
+        old = self.edit.pattern
+        cut = len(buf) if final else len(buf) - self.hold
+        # an occurrence straddling the cut goes out with this chunk
+        idx = buf.find(old, max(0, cut - self.hold))
+        if 0 <= idx < cut:
+            cut = idx + len(old)
+        cut = max(cut, 0)
+        region, self.pending = buf[:cut], buf[cut:]
+        found = region.count(old)
+        if self.left > 0:
+            found = min(found, self.left)
+            self.left -= found
+        self.matches += found
+        return region.replace(old, self.edit.new, found) if found else region
+
+    def _appended(self) -> str:
+        self.matches += 1
+        return self.edit.new
+
+
+def apply_edits(path: Path, edits: Sequence[Edit], chunk_bytes: int = CHUNK_BYTES) -> List[int]:
+    """
+    Applies `edits` in order to the UTF-8 file at `path` in one streaming pass;
+    each edit sees the output of the ones before it. The result goes to a temp
+    file beside the original that replaces it atomically, so the file is never
+    half-written and memory doesn't depend on its size. Returns how many times
+    each edit matched; when a required edit didn't match (or nothing changed)
+    the file is left alone.
+    """
+    if not edits:
+        raise EditError("No edits given")
+    stages = [_Stage(e) for e in edits]
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="strict")
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    tmp = Path(tmp_name)
+    try:
+        # newline="" keeps the file's own line endings
+        with open(path, "rb") as src, os.fdopen(fd, "w", encoding="utf-8", newline="") as dst:
+            while True:
+                chunk = src.read(chunk_bytes)
+                final = not chunk
+                try:
+                    text = decoder.decode(chunk, final=final)
+                except UnicodeDecodeError:
+                    raise EditError(f"Failed to read {path}: not valid UTF-8 text") from None
+                for stage in stages:
+                    text = stage.feed(text, final)
+                dst.write(text)
+                if final:
+                    break
+            dst.flush()
+            os.fsync(dst.fileno())
+        counts = [s.matches for s in stages]
+        if not any(counts) or any(e.required and not c for e, c in zip(edits, counts)):
+            tmp.unlink()
+            return counts
+        shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+        return counts
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from . import core
+
+# how each tool touches the filesystem: arg name -> "r" (reads) / "w" (writes).
+# Tools that are not listed here (open_app, unknown tools, ...) act as barriers
+# and keep their position relative to every other call of the plan.
+TOOL_ACCESS: dict[str, dict[str, str]] = {
+    "read_file": {"path": "r"},
+    "list_dir": {"path": "r"},
+    "summarize_file": {"path": "r"},
+    "search_text": {"path": "r"},
+    "open_in_vscode": {"path": "r"},
+    "make_dir": {"path": "w"},
+    "write_file": {"path": "w"},
+    "delete_path": {"path": "w"},
+    "replace_text": {"path": "w"},
+    "insert_text": {"path": "w"},
+    "edit_file": {"path": "w"},
+    "move_path": {"src": "w", "dest": "w"},
+    "copy_path": {"src": "r", "dest": "w"},
+    "rename_path": {"path": "w"},
+    "get_weather": {},
+}
+
+Access = list[tuple[Path, str]]
+
+
+def call_accesses(call: dict) -> Optional[Access]:
+    """Resolved (path, mode) pairs a call touches, or None if it must run exclusively."""
+    name = call.get("tool")
+    spec = TOOL_ACCESS.get(name) if isinstance(name, str) else None
+    args = call.get("args") or {}
+    if spec is None or not isinstance(args, dict):
+        return None
+
+    out: Access = []
+    try:
+        for arg, mode in spec.items():
+            out.append((core._resolve_path(args.get(arg) or "."), mode))
+        if name == "rename_path" and args.get("new_name"):
+            out.append((out[0][0].parent / str(args["new_name"]), "w"))
+    except Exception:
+        # the call will fail on its own; just keep it in order
+        return None
+    return out
+
+
+def _related(a: Path, b: Path) -> bool:
+    return a == b or a in b.parents or b in a.parents
+
+
+def conflicts(a: Optional[Access], b: Optional[Access]) -> bool:
+    if a is None or b is None:
+        return True
+    for pa, ma in a:
+        for pb, mb in b:
+            if (ma == "w" or mb == "w") and _related(pa, pb):
+                return True
+    return False
+
+
+class _Node:
+    def __init__(self, call: dict, accesses: Optional[Access]) -> None:
+        self.call = call
+        self.accesses = accesses
+        self.deps_left = 0
+        self.dependents: list[_Node] = []
+        self.result = ""
+        self.done = threading.Event()
+
+
+class PlanExecutor:
+    """
+    Runs the tool calls of a plan on a worker pool. A call waits for every
+    earlier call it conflicts with (overlapping paths with at least one write),
+    everything else overlaps. Calls can be submitted one by one while the plan
+    is still being streamed; results() returns them in plan order.
+    """
+
+    SKIPPED = "Skipped: the request was interrupted"
+
+    def __init__(self, run: Callable[[dict], str], max_workers: int = 4) -> None:
+        self._run = run
+        self._max_workers = max_workers
+        self._nodes: list[_Node] = []
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._cancelled = False
+
+    def submit(self, call: dict) -> None:
+        node = _Node(call, call_accesses(call))
+        with self._lock:
+            for prev in self._nodes:
+                if not prev.done.is_set() and conflicts(prev.accesses, node.accesses):
+                    node.deps_left += 1
+                    prev.dependents.append(node)
+            self._nodes.append(node)
+            ready = node.deps_left == 0
+        if ready:
+            self._start(node)
+
+    def _start(self, node: _Node) -> None:
+        if self._max_workers <= 1:
+            self._execute(node)
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="jarvis-tool")
+        self._pool.submit(self._execute, node)
+
+    def cancel(self) -> None:
+        """Calls that haven't started are skipped from now on; running ones finish."""
+        self._cancelled = True
+
+    def _execute(self, node: _Node) -> None:
+        try:
+            node.result = self.SKIPPED if self._cancelled else self._run(node.call)
+        except Exception as e:
+            node.result = f"Tool '{node.call.get('tool')}' failed: {type(e).__name__}: {e}"
+
+        ready: list[_Node] = []
+        with self._lock:
+            node.done.set()
+            for dep in node.dependents:
+                dep.deps_left -= 1
+                if dep.deps_left == 0:
+                    ready.append(dep)
+        for dep in ready:
+            self._start(dep)
+
+    def results(self) -> list[str]:
+        for node in self._nodes:
+            node.done.wait()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        return [node.result for node in self._nodes]
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+CHECKPOINT_BYTES = 1 << 20
+
+
+@contextmanager
+def mapped(path: Path) -> Iterator[Optional[mmap.mmap]]:
+    """Read-only map of the file; None for an empty one (which can't be mapped)."""
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            yield None
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+class LineIndex:
+    """
+    Sparse line offsets: the number of newlines before every 1 MB boundary.
+    Finding line N means one bisect and a forward scan of at most 1 MB, and
+    building it only counts newlines chunk by chunk, so memory stays flat.
+    """
+
+    def __init__(self, mm: Optional[mmap.mmap], step: int = CHECKPOINT_BYTES) -> None:
+        self.step = step
+        self.offsets: List[int] = [0]
+        self.lines_before: List[int] = [0]
+        self.size = len(mm) if mm is not None else 0
+        newlines = 0
+        for start in range(0, self.size, step):
+            newlines += mm[start:start + step].count(b"\n")
+            if start + step < self.size:
+                self.offsets.append(start + step)
+                self.lines_before.append(newlines)
+        self.newlines = newlines
+        # a last line without a trailing newline still counts
+        self.total_lines = newlines + (1 if self.size and mm[self.size - 1:] != b"\n" else 0)
+
+    def line_start(self, mm: mmap.mmap, line: int) -> int:
+        """Byte offset where 1-based `line` starts (the file size if past the end)."""
+        if line <= 1:
+            return 0
+        if line - 1 > self.newlines:
+            return self.size
+        # the last checkpoint with fewer newlines before it: one with exactly
+        # line - 1 may sit inside the line, past where it starts
+        i = bisect.bisect_left(self.lines_before, line - 1) - 1
+        pos = self.offsets[i]
+        for _ in range(line - 1 - self.lines_before[i]):
+            pos = mm.find(b"\n", pos) + 1
+        return pos
+
+
+_indexes: "OrderedDict[Tuple[str, int, int], LineIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def line_index(path: Path, mm: Optional[mmap.mmap], max_cached: int = 16) -> LineIndex:
+    """The LineIndex of `path`, reused until its size or mtime changes."""
+    st = path.stat()
+    key = (str(path), st.st_size, st.st_mtime_ns)
+    with _indexes_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+    index = LineIndex(mm)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > max_cached:
+            _indexes.popitem(last=False)
+    return index
+
+
+def read_range(path: Path, offset: int, length: int) -> Tuple[bytes, int, int]:
+    """`length` bytes from `offset` (negative counts from the end); returns (data, start, size)."""
+    with mapped(path) as mm:
+        size = len(mm) if mm is not None else 0
+        start = max(0, size + offset) if offset < 0 else min(offset, size)
+        return (mm[start:start + length] if mm is not None else b""), start, size
+
+
+def head(path: Path, lines: int, max_bytes: int) -> Tuple[bytes, bool]:
+    """The first `lines` lines, at most `max_bytes`; returns (data, more_follows)."""
+    with mapped(path) as mm:
+        if mm is None:
+            return b"", False
+        pos = 0
+        for _ in range(lines):
+            nl = mm.find(b"\n", pos, max_bytes)
+            if nl == -1:
+                pos = min(len(mm), max_bytes)
+                break
+            pos = nl + 1
+        return mm[:pos], pos < len(mm)
+
+
+def tail(path: Path, lines: int, max_bytes: int) -> Tuple[bytes, bool]:
+    """The last `lines` lines, at most `max_bytes`; returns (data, more_precedes)."""
+    with mapped(path) as mm:
+        if mm is None or lines <= 0:
+            return b"", False
+        size = len(mm)
+        floor = max(0, size - max_bytes)
+        # a trailing newline ends the last line rather than starting a new one
+        end = size - 1 if mm[size - 1:] == b"\n" else size
+        start = pos = end
+        for i in range(lines):
+            nl = mm.rfind(b"\n", floor, pos)
+            if nl == -1:
+                # the first line, or the byte budget cut the next one: only
+                # keep a partial line when there is nothing else to show
+                if floor == 0 or i == 0:
+                    start = floor
+                break
+            start, pos = nl + 1, nl
+        return mm[start:], start > 0
+
+
+def line_range(path: Path, first: int, last: Optional[int], max_bytes: int) -> Tuple[bytes, int, bool]:
+    """Lines `first`..`last` (1-based, inclusive); returns (data, total_lines, cut_short)."""
+    with mapped(path) as mm:
+        if mm is None:
+            return b"", 0, False
+        index = line_index(path, mm)
+        start = index.line_start(mm, first)
+        end = index.line_start(mm, last + 1) if last is not None else index.size
+        cut = end - start > max_bytes
+        return mm[start:min(end, start + max_bytes)], index.total_lines, cut
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import re
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+CHUNK_BYTES = 1 << 20
+SNIFF_BYTES = 8192
+# longer lines are still measured, but only their end is kept for the tail
+MAX_KEPT_LINE = 4096
+MAX_NAMES = 20
+
+_KINDS = {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".tsv": "csv", ".py": "python", ".pyw": "python"}
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass
+class FileStats:
+    size: int
+    kind: str = "text"
+    encoding: str = "utf-8"
+    # what to decode with; `encoding` also says whether bytes were invalid
+    codec: str = "utf-8"
+    lines: int = 0
+    longest: int = 0
+    longest_at: int = 0
+    tail: List[str] = field(default_factory=list)
+    structure: str = ""
+
+
+class _JsonShape:
+    """Top level of a JSON document, from a stream of text: kind, item count and first keys."""
+
+    _TOKEN = re.compile(r'[\\"{}\[\],:]')
+    _IN_STRING = re.compile(r'[\\"]')
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.top: Optional[str] = None
+        self.in_string = False
+        self.escaped = False
+        self.expect_key = False
+        self.key: Optional[List[str]] = None
+        self.keys: List[str] = []
+        self.key_count = 0
+        self.commas = 0
+        self.empty: Optional[bool] = None
+        self.broken = False
+
+    def _capture(self, text: str) -> None:
+        if self.key is not None and sum(map(len, self.key)) < 200:
+            self.key.append(text)
+
+    def feed(self, text: str) -> None:
+        i, n = 0, len(text)
+        if self.escaped and n:
+            self._capture(text[0])
+            self.escaped, i = False, 1
+        while i < n and not self.broken:
+            if self.in_string:
+                m = self._IN_STRING.search(text, i)
+                if m is None:
+                    self._capture(text[i:])
+                    return
+                k = m.start()
+                self._capture(text[i:k])
+                if text[k] == "\\":
+                    if k + 1 == n:
+                        self.escaped = True
+                        return
+                    self._capture(text[k + 1])
+                    i = k + 2
+                    continue
+                self.in_string = False
+                if self.key is not None:
+                    self.key_count += 1
+                    if len(self.keys) < MAX_NAMES:
+                        self.keys.append("".join(self.key))
+                    self.key = None
+                i = k + 1
+                continue
+            if self.top is None:
+                stripped = text[i:].lstrip()
+                if not stripped:
+                    return
+                if stripped[0] not in "{[":
+                    self.broken = True
+                    return
+            if self.empty is None and self.depth == 1:
+                stripped = text[i:].lstrip()
+                if not stripped:
+                    return
+                self.empty = stripped[0] in "]}"
+            m = self._TOKEN.search(text, i)
+            if m is None:
+                return
+            c, i = m.group(), m.end()
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1 and self.top == "object" and self.expect_key:
+                    self.key = []
+            elif c in "{[":
+                if self.depth == 0:
+                    if self.top is not None:
+                        # a second top-level value: not one JSON document
+                        self.broken = True
+                        return
+                    self.top = "object" if c == "{" else "array"
+                    self.expect_key = c == "{"
+                self.depth += 1
+            elif c in "}]":
+                self.depth -= 1
+                if self.depth < 0:
+                    self.broken = True
+            elif self.depth == 1:
+                if c == ",":
+                    self.commas += 1
+                    self.expect_key = self.top == "object"
+                elif c == ":":
+                    self.expect_key = False
+
+    def describe(self) -> str:
+        if self.broken or self.top is None:
+            return "not valid JSON"
+        if self.top == "object":
+            names = ", ".join(self.keys) + (", ..." if self.key_count > len(self.keys) else "")
+            text = f"JSON object with {self.key_count} keys" + (f": {names}" if names else "")
+        else:
+            items = 0 if self.empty else self.commas + 1
+            text = f"JSON array of {items} items"
+        return text + (" (incomplete)" if self.depth != 0 else "")
+
+
+class _PythonShape:
+    _DEF = re.compile(r"^(?:async\s+def|def|class)\s+(\w+)|^(?:import|from)\s+[\w.]", re.MULTILINE)
+
+    def __init__(self) -> None:
+        self.classes: List[str] = []
+        self.functions: List[str] = []
+        self.counts = {"class": 0, "def": 0, "import": 0}
+
+    def feed_lines(self, text: str) -> None:
+        for m in self._DEF.finditer(text):
+            word = m.group(0).split()[0]
+            if m.group(1) is None:
+                self.counts["import"] += 1
+            elif word == "class":
+                self.counts["class"] += 1
+                if len(self.classes) < MAX_NAMES:
+                    self.classes.append(m.group(1))
+            else:
+                self.counts["def"] += 1
+                if len(self.functions) < MAX_NAMES:
+                    self.functions.append(m.group(1))
+
+    def describe(self) -> str:
+        def names(found: List[str], total: int) -> str:
+            return f" ({', '.join(found)}{', ...' if total > len(found) else ''})" if found else ""
+
+        return (
+            f"Python with {self.counts['class']} top-level classes{names(self.classes, self.counts['class'])}, "
+            f"{self.counts['def']} functions{names(self.functions, self.counts['def'])}, "
+            f"{self.counts['import']} imports"
+        )
+
+
+def _csv_shape(header: str, rows: int) -> str:
+    delimiter = max(",;\t|", key=header.count)
+    try:
+        columns = next(csv.reader([header], delimiter=delimiter))
+    except (csv.Error, StopIteration):
+        columns = []
+    names = ", ".join(c.strip() for c in columns[:MAX_NAMES]) + (", ..." if len(columns) > MAX_NAMES else "")
+    return f"CSV with {len(columns)} columns ({names}) and {max(rows, 0)} rows"
+
+
+def _encoding(sample: bytes) -> str:
+    """The codec to decode with (its decoder drops the BOM), or "binary"."""
+    for bom, name in _BOMS:
+        if sample.startswith(bom):
+            return name
+    if b"\0" in sample[:SNIFF_BYTES]:
+        return "binary"
+    return "utf-8"
+
+
+def analyze(path: Path, tail_lines: int = 5) -> FileStats:
+    """
+    Statistics of a file in one pass over fixed-size chunks, so memory stays
+    flat however big it is: encoding, type, line count, the longest line,
+    the last `tail_lines` lines, and the top-level structure of JSON, CSV
+    and Python files.
+    """
+    with path.open("rb") as fh:
+        first = fh.read(CHUNK_BYTES)
+        stats = FileStats(size=path.stat().st_size)
+        encoding = stats.encoding = stats.codec = _encoding(first)
+        if encoding == "binary":
+            stats.kind = "binary"
+            return stats
+        stats.kind = _KINDS.get(path.suffix.lower(), "text")
+        if stats.kind == "text" and first.startswith(b"#!") and b"python" in first.split(b"\n", 1)[0]:
+            stats.kind = "python"
+
+        decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+        json_shape = _JsonShape() if stats.kind == "json" else None
+        py_shape = _PythonShape() if stats.kind == "python" else None
+        header: Optional[str] = None
+        tail: Deque[str] = deque(maxlen=max(tail_lines, 1))
+        carry, dropped = "", 0
+
+        crlf: Optional[int] = None
+        chunk = first
+        while True:
+            final = not chunk
+            try:
+                text = decoder.decode(chunk, final)
+            except UnicodeDecodeError:
+                # stray bytes in a text file: they count as U+FFFD from here on,
+                # picking up where the strict decoder left off
+                stats.encoding = f"{encoding} (with invalid bytes)"
+                lenient = codecs.getincrementaldecoder(encoding)(errors="replace")
+                lenient.setstate(decoder.getstate())
+                decoder = lenient
+                text = decoder.decode(chunk, final)
+            if crlf is None:
+                # lengths are reported without the "\r" of Windows line endings
+                crlf = 1 if "\r\n" in text else 0
+            if json_shape:
+                json_shape.feed(text)
+            buf = carry + text
+            cut = buf.rfind("\n")
+            if cut == -1:
+                carry = buf
+            else:
+                complete, carry = buf[:cut], buf[cut + 1:]
+                if py_shape:
+                    py_shape.feed_lines(complete)
+                parts = complete.split("\n")
+                if header is None:
+                    header = parts[0]
+                lengths = list(map(len, parts))
+                lengths[0] += dropped
+                dropped = 0
+                longest = max(lengths) - crlf
+                if longest > stats.longest:
+                    stats.longest = longest
+                    stats.longest_at = stats.lines + lengths.index(longest + crlf) + 1
+                stats.lines += len(parts)
+                tail.extend(parts[-tail.maxlen:])
+            if len(carry) > MAX_KEPT_LINE:
+                dropped += len(carry) - MAX_KEPT_LINE
+                carry = carry[-MAX_KEPT_LINE:]
+            if final:
+                break
+            chunk = fh.read(CHUNK_BYTES)
+
+    if carry or dropped:
+        # the last line has no newline after it
+        stats.lines += 1
+        if len(carry) + dropped > stats.longest:
+            stats.longest, stats.longest_at = len(carry) + dropped, stats.lines
+        if py_shape:
+            py_shape.feed_lines(carry)
+        if header is None:
+            header = carry
+        tail.append(carry)
+    stats.tail = [line.rstrip("\r") for line in tail][-tail_lines:] if tail_lines > 0 else []
+
+    if json_shape:
+        stats.structure = json_shape.describe()
+    elif py_shape:
+        stats.structure = py_shape.describe()
+    elif stats.kind == "jsonl":
+        stats.structure = f"JSON lines, {stats.lines} records"
+    elif stats.kind == "csv" and header is not None:
+        stats.structure = _csv_shape(header.rstrip("\r"), stats.lines - 1)
+    return stats
+
+
+_cache: "OrderedDict[Tuple[str, int, int, int], FileStats]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def file_stats(path: Path, tail_lines: int = 5, max_cached: int = 64) -> FileStats:
+    """analyze(), reused until the file's size or mtime changes."""
+    st = path.stat()
+    key = (str(path), st.st_size, st.st_mtime_ns, tail_lines)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    stats = analyze(path, tail_lines)
+    with _cache_lock:
+        _cache[key] = stats
+        while len(_cache) > max_cached:
+            _cache.popitem(last=False)
+    return stats
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import importlib
 import inspect
+import math
 import pkgutil
+import re
+from collections import Counter
 from dataclasses import dataclass
 from typing import Callable, Optional
 
@@ -66,8 +69,91 @@ def get_tool_specs() -> dict[str, ToolSpec]:
     return dict(_TOOLS)
 
 
-def build_tools_section() -> str:
-    specs = list(get_tool_specs().values())
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+_STOPWORDS = {
+    "the", "a", "an", "to", "of", "and", "or", "for", "in", "on", "at", "is", "it", "me", "my",
+    "please", "with", "this", "that", "you", "can", "what", "if", "use", "call", "any", "str",
+    "int", "bool", "none", "optional", "true", "false",
+    "и", "в", "на", "с", "по", "мне", "мой", "пожалуйста", "это", "что", "из", "для",
+}
+
+
+def _terms(text: str) -> list[str]:
+    # crude stemming: a 4-char prefix is enough to match "удали"/"удалить", "files"/"file"
+    return [w[:4] for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+class _ToolIndex:
+    """Okapi BM25 over tool names, signatures, descriptions and the rule lines that mention them."""
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, specs: list[ToolSpec], extra_rules: Optional[str] = None) -> None:
+        rule_lines = [ln for ln in (extra_rules or "").splitlines() if ln.strip().startswith("-")]
+        self.names: list[str] = []
+        self.docs: list[Counter] = []
+        for spec in specs:
+            text = " ".join([spec.name, spec.signature, spec.description])
+            text += " " + " ".join(ln for ln in rule_lines if spec.name in ln)
+            self.names.append(spec.name)
+            self.docs.append(Counter(_terms(text)))
+        n = len(self.docs)
+        self.avg_len = sum(sum(d.values()) for d in self.docs) / n if n else 0.0
+        df: Counter = Counter()
+        for d in self.docs:
+            df.update(d.keys())
+        self.idf = {t: math.log(1 + (n - c + 0.5) / (c + 0.5)) for t, c in df.items()}
+
+    def scores(self, query: str) -> dict[str, float]:
+        terms = set(_terms(query))
+        out: dict[str, float] = {}
+        for name, doc in zip(self.names, self.docs):
+            length = sum(doc.values())
+            score = 0.0
+            for t in terms:
+                tf = doc.get(t, 0)
+                if tf:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / (self.avg_len or 1))
+                    score += self.idf[t] * tf * (self.k1 + 1) / norm
+            out[name] = score
+        return out
+
+
+_INDEXES: dict[Optional[str], _ToolIndex] = {}
+
+# read-only tools that are cheap to describe and the usual way into a request;
+# offered with every scoped list so the model never has to guess around them
+CORE_TOOLS = ("list_dir", "read_file", "search_text", "summarize_file")
+# below this the best match is too weak to trust: every tool is offered
+MIN_BEST_SCORE = 2.5
+# tools scoring under this share of the best one are left out
+MIN_RELATIVE_SCORE = 0.3
+
+
+def select_tools(query: str, top_k: int, extra_rules: Optional[str] = None) -> Optional[list[ToolSpec]]:
+    """
+    Returns the `top_k` tools most relevant to `query` plus CORE_TOOLS, or
+    None when the match is weak (the caller should then offer every tool).
+    """
+    specs = get_tool_specs()
+    index = _INDEXES.get(extra_rules)
+    if index is None or set(index.names) != set(specs):
+        index = _INDEXES[extra_rules] = _ToolIndex(list(specs.values()), extra_rules)
+    scores = index.scores(query)
+    best = max(scores.values(), default=0.0)
+    if best < MIN_BEST_SCORE:
+        return None
+    ranked = sorted(
+        (n for n, sc in scores.items() if sc >= best * MIN_RELATIVE_SCORE),
+        key=lambda n: (-scores[n], n),
+    )[:top_k]
+    ranked += [n for n in CORE_TOOLS if n in specs and n not in ranked]
+    return [specs[n] for n in ranked]
+
+
+def build_tools_section(specs: Optional[list[ToolSpec]] = None) -> str:
+    specs = list(get_tool_specs().values()) if specs is None else list(specs)
     specs.sort(key=lambda s: s.name)
 
     lines: list[str] = ["Tools:"]
@@ -79,14 +165,49 @@ def build_tools_section() -> str:
     return "\n".join(lines).rstrip() + "\n"
 
 
-def build_system_tools_description(extra_rules: Optional[str] = None) -> str:
+def rules_for(extra_rules: str, selected: set[str]) -> str:
+    """
+    `extra_rules` without what only concerns tools outside `selected`: a "- "
+    line or a paragraph (such as an example) that names one is left out.
+    """
+    pattern = re.compile(r"\b(" + "|".join(map(re.escape, get_tool_specs())) + r")\b")
+
+    def fits(text: str) -> bool:
+        return all(m.group(1) in selected for m in pattern.finditer(text))
+
+    kept: list[str] = []
+    for para in extra_rules.strip().split("\n\n"):
+        lines = para.splitlines()
+        if any(ln.lstrip().startswith("-") for ln in lines):
+            lines = [ln for ln in lines if not ln.lstrip().startswith("-") or fits(ln)]
+            # a heading with none of its rules left goes too
+            if not any(ln.lstrip().startswith("-") for ln in lines):
+                continue
+        elif not fits(para):
+            continue
+        kept.append("\n".join(lines))
+    return "\n\n".join(kept)
+
+
+def build_system_tools_description(
+    extra_rules: Optional[str] = None,
+    query: Optional[str] = None,
+    top_k: int = 0,
+) -> str:
+    """
+    With a `query` and `top_k` > 0 only the most relevant tools are described,
+    along with only the rules that concern them.
+    """
+    specs = select_tools(query, top_k, extra_rules) if query and top_k > 0 else None
+    if specs is not None and extra_rules:
+        extra_rules = rules_for(extra_rules, {s.name for s in specs})
     base = (
         "You have access to the following tools. When you want to call a tool, you MUST respond\n"
         "ONLY with valid JSON:\n"
         "- Either a single object: {\"tool\": \"...\", \"args\": {...}}\n"
         "- Or an array of such objects, if the user asked for multiple actions (keep the order of execution).\n\n"
     )
-    txt = base + build_tools_section()
+    txt = base + build_tools_section(specs)
     if extra_rules:
         txt += "\n" + extra_rules.strip() + "\n"
     return txt
@@ -9,8 +9,6 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from openai import OpenAI
-
 from config import load_settings
 
 
@@ -81,6 +79,8 @@ def build_prompt(transcript: str) -> str:
 
 
 def run_cases(cases: List[Dict[str, Any]], model: str | None = None) -> Dict[str, Any]:
+    from openai import OpenAI
+
     settings = load_settings()
     client = OpenAI(api_key=settings.openai_key)
     use_model = model or settings.chat_model
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import fnmatch
+import mmap
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Set, Tuple
+
+SKIP_DIRS = {"__pycache__", "node_modules"}
+SNIFF_BYTES = 8192
+
+
+class IgnoreRules:
+    """
+    `.gitignore`-style excludes: `*` globs, `!` negation, a trailing `/` for
+    directories only, and patterns with a `/` anchored to the file they come
+    from. The last matching rule wins, as in git.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str, bool, bool]] = ()) -> None:
+        self.rules = list(rules)
+
+    @staticmethod
+    def parse(base: str, text: str) -> List[Tuple[str, str, bool, bool]]:
+        rules = []
+        for raw in text.splitlines():
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            # "build" matches at any depth, "docs/build" and "/build" only below `base`
+            anchored = "/" in line.rstrip("/")
+            line = line.strip("/")
+            if not line:
+                continue
+            rules.append((base, line if anchored else "**/" + line, negate, dir_only))
+        return rules
+
+    def with_file(self, directory: str) -> IgnoreRules:
+        try:
+            with open(os.path.join(directory, ".gitignore"), encoding="utf-8", errors="ignore") as fh:
+                extra = self.parse(directory, fh.read())
+        except OSError:
+            return self
+        return IgnoreRules(self.rules + extra)
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        result = False
+        for base, pattern, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            rel = os.path.relpath(path, base).replace(os.sep, "/")
+            if rel.startswith("../"):
+                continue
+            if fnmatch.fnmatchcase(rel, pattern) or (pattern.startswith("**/") and fnmatch.fnmatchcase(rel, pattern[3:])):
+                result = not negate
+        return result
+
+
+def walk(
+    root: Path,
+    max_filesize: int,
+    exclude: Sequence[Path] = (),
+    ignore: Optional[IgnoreRules] = None,
+) -> Iterator[Tuple[str, int, int]]:
+    """(path, size, mtime_ns) of the files under `root`, skipping hidden and ignored ones."""
+    excluded = {str(e) for e in exclude}
+    stack = [(str(root), ignore if ignore is not None else IgnoreRules())]
+    while stack:
+        top, rules = stack.pop()
+        rules = rules.with_file(top)
+        try:
+            with os.scandir(top) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith(".") or entry.path in excluded:
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS and not rules.ignored(entry.path, True):
+                        subdirs.append((entry.path, rules))
+                elif entry.is_file() and not rules.ignored(entry.path, False):
+                    st = entry.stat()
+                    if st.st_size <= max_filesize:
+                        yield entry.path, st.st_size, st.st_mtime_ns
+            except OSError:
+                continue
+        # depth first, in name order
+        stack.extend(reversed(subdirs))
+
+
+def search_file(path: str, needle: bytes, limit: int, stop: Optional[threading.Event] = None) -> List[Tuple[int, str]]:
+    """(line number, line) of up to `limit` lines containing `needle`; [] for binaries."""
+    out: List[Tuple[int, str]] = []
+    try:
+        with open(path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return out
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b"\0", 0, SNIFF_BYTES) != -1:
+                    return out
+                pos = mm.find(needle)
+                line_no, counted = 1, 0
+                while pos != -1 and len(out) < limit and not (stop and stop.is_set()):
+                    start = mm.rfind(b"\n", 0, pos) + 1
+                    end = mm.find(b"\n", pos)
+                    if end == -1:
+                        end = len(mm)
+                    line_no += mm[counted:start].count(b"\n")
+                    counted = start
+                    out.append((line_no, mm[start:end].decode("utf-8", errors="replace").rstrip()))
+                    pos = mm.find(needle, end)
+    except (OSError, ValueError):
+        pass
+    return out
+
+
+class SearchEngine:
+    """
+    Literal search for machines without rg: the tree is walked with scandir
+    while a thread pool searches the files it yields, each memory-mapped and
+    searched as bytes (lines are only decoded for matches). Binaries are
+    skipped after sniffing their first 8 KB, and everything stops once
+    `max_matches` lines are found.
+    """
+
+    def __init__(self, workers: int = 4, max_filesize: int = 200_000, exclude: Sequence[Path] = ()) -> None:
+        self.workers = max(1, workers)
+        self.max_filesize = max_filesize
+        self.exclude = list(exclude)
+
+    def files(self, target: Path) -> Iterator[str]:
+        if target.is_file():
+            yield str(target)
+            return
+        for path, _size, _mtime in walk(target, self.max_filesize, self.exclude):
+            yield path
+
+    def _batches(self, target: Path, size: int = 32) -> Iterator[List[str]]:
+        # a few dozen files per task keeps the pool's overhead off small files
+        batch: List[str] = []
+        for path in self.files(target):
+            batch.append(path)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def search(self, query: str, target: Path, max_matches: int = 20) -> List[str]:
+        needle = query.encode("utf-8")
+        stop = threading.Event()
+        found: List[Tuple[str, int, str]] = []
+        lock = threading.Lock()
+
+        def run(paths: List[str]) -> None:
+            for path in paths:
+                if stop.is_set():
+                    return
+                for line_no, line in search_file(path, needle, max_matches + 1, stop):
+                    with lock:
+                        found.append((path, line_no, line))
+                        # one past the limit, so the caller knows to say it was truncated
+                        if len(found) > max_matches:
+                            stop.set()
+                            return
+
+        if self.workers == 1:
+            for batch in self._batches(target):
+                run(batch)
+                if stop.is_set():
+                    break
+        else:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="jarvis-search") as pool:
+                pending: Set[Future] = set()
+                for batch in self._batches(target):
+                    if stop.is_set():
+                        break
+                    pending.add(pool.submit(run, batch))
+                    # keep the walk only a little ahead of the workers
+                    if len(pending) >= self.workers * 2:
+                        _done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                if stop.is_set():
+                    for fut in pending:
+                        fut.cancel()
+
+        found.sort()
+        return [f"{path}:{line_no}:{line}" for path, line_no, line in found[:max_matches + 1]]
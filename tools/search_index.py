@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import re._parser as _sre_parse  # type: ignore[import-not-found]
+    from re import _constants as _sre_constants  # type: ignore[attr-defined]
+except ImportError:  # Python < 3.11
+    import sre_constants as _sre_constants  # type: ignore[no-redef]
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+from .search_engine import SKIP_DIRS, IgnoreRules, walk
+
+logger = logging.getLogger("jarvis.search_index")
+
+SCHEMA_VERSION = 2
+# postings are bitmaps over blocks of this many consecutive file ids
+BLOCK_FILES = 256
+# how many postings a refresh holds in memory before writing them out
+FLUSH_POSTINGS = 2_000_000
+MAX_QUERY_TRIGRAMS = 500
+
+
+def trigrams(text: str) -> Set[int]:
+    """The byte trigrams of the lowercased UTF-8 text, as 24-bit integers."""
+    b = text.lower().encode("utf-8")
+    return {b[i] << 16 | b[i + 1] << 8 | b[i + 2] for i in range(len(b) - 2)}
+
+
+def _file_trigrams(path: Path):
+    """trigrams() of a file as a sorted numpy array."""
+    import numpy as np
+
+    data = path.read_text(encoding="utf-8", errors="ignore").lower().encode("utf-8")
+    b = np.frombuffer(data, np.uint8).astype(np.uint32)
+    return np.unique(b[:-2] << 16 | b[1:-1] << 8 | b[2:])
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Substrings every match of `pattern` must contain, from its top-level
+    sequence of literals; [] when nothing is certain (alternation, classes).
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except re.error:
+        return []
+    runs: List[str] = []
+    current: List[str] = []
+
+    def walk(items: Iterable) -> None:
+        for op, arg in items:
+            if op is _sre_constants.LITERAL:
+                current.append(chr(arg))
+            elif op is _sre_constants.SUBPATTERN and arg[-1] is not None:
+                # (group) only continues the sequence
+                walk(arg[-1])
+            elif op is _sre_constants.AT:
+                # anchors match no characters
+                continue
+            else:
+                if current:
+                    runs.append("".join(current))
+                    current.clear()
+
+    walk(parsed)
+    if current:
+        runs.append("".join(current))
+    return [r for r in runs if r]
+
+
+def _is_text(path: Path) -> bool:
+    try:
+        with path.open("rb") as fh:
+            return b"\0" not in fh.read(8192)
+    except OSError:
+        return False
+
+
+class TrigramIndex:
+    """
+    Trigram index of the text files under `roots`, kept in sqlite so it
+    survives restarts. A posting row holds one trigram for a block of
+    BLOCK_FILES file ids as a bitmap, so a refresh rewrites whole blocks in
+    bulk and the index stays a fraction of the size of the files. refresh()
+    only re-reads files whose size or mtime changed (and drops deleted ones);
+    a query looks up the trigrams of the literals it requires, and only the
+    files containing all of them are opened to check for real matches.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        roots: Sequence[Path],
+        max_filesize: int = 200_000,
+        refresh_interval: float = 10.0,
+        exclude: Sequence[Path] = (),
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.roots = [Path(r) for r in roots]
+        self.max_filesize = max_filesize
+        self.refresh_interval = refresh_interval
+        self.exclude = [Path(e) for e in exclude]
+        # when each subtree ("" for all roots) was last refreshed
+        self._refreshed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._builder: Optional[threading.Thread] = None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        # a lost index is rebuilt from the files, so durability isn't worth the fsyncs
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # an index in an older layout is simply built again
+            self._db.executescript(
+                "DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS meta;"
+                f"PRAGMA user_version = {SCHEMA_VERSION};"
+            )
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL,"
+            " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, binary INTEGER NOT NULL);"
+            # key = block << 24 | trigram, bits = one bit per file of the block
+            "CREATE TABLE IF NOT EXISTS postings (key INTEGER PRIMARY KEY, bits BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+        self._db.commit()
+        self._built = self._db.execute("SELECT 1 FROM meta WHERE name = 'built'").fetchone() is not None
+
+    @property
+    def ready(self) -> bool:
+        """Whether every root has been indexed once, so queries can be answered."""
+        return self._built
+
+    def build_in_background(self) -> None:
+        """Starts the first full refresh on a daemon thread, unless it is done or running."""
+        with self._lock:
+            if self._built or (self._builder is not None and self._builder.is_alive()):
+                return
+            self._builder = threading.Thread(target=self._build, name="jarvis-search-index", daemon=True)
+            self._builder.start()
+
+    def _build(self) -> None:
+        try:
+            self.refresh(force=True)
+        except Exception:
+            logger.exception("building the search index failed")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for a background build; returns whether the index is ready."""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+        return self._built
+
+    def mark_stale(self) -> None:
+        """Makes the next query refresh first (after the tools changed files)."""
+        self._refreshed.clear()
+
+    def refresh(self, force: bool = False, under: Optional[Path] = None) -> Dict[str, int]:
+        """Brings the files below `under` (all roots by default) up to date."""
+        key = str(under) if under is not None else ""
+        with self._lock:
+            last = max(self._refreshed.get(key, 0.0), self._refreshed.get("", 0.0))
+            if not force and last and time.monotonic() - last < self.refresh_interval:
+                return {"indexed": 0, "removed": 0}
+            stats = self._refresh(under)
+            self._refreshed[key] = time.monotonic()
+            if under is None and not self._built:
+                self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('built', '1')")
+                self._db.commit()
+                self._built = True
+            return stats
+
+    def _subtree_rules(self, root: Path, under: Path) -> Optional[IgnoreRules]:
+        """The ignore rules in force at `under` inside `root`; None if a full walk would skip it."""
+        rules = IgnoreRules()
+        current = root
+        for name in under.relative_to(root).parts:
+            rules = rules.with_file(str(current))
+            current = current / name
+            if name.startswith(".") or name in SKIP_DIRS or current in self.exclude or rules.ignored(str(current), True):
+                return None
+        return rules
+
+    def _files(self, under: Optional[Path]) -> Iterator[Tuple[str, int, int]]:
+        for root in self.roots:
+            if not root.is_dir():
+                continue
+            if under is None or under == root or under in root.parents:
+                yield from walk(root, self.max_filesize, self.exclude)
+            elif root in under.parents and under.is_dir():
+                rules = self._subtree_rules(root, under)
+                if rules is not None:
+                    yield from walk(under, self.max_filesize, self.exclude, rules)
+
+    def _refresh(self, under: Optional[Path] = None) -> Dict[str, int]:
+        seen: Dict[str, Tuple[int, int]] = {}
+        for path, size, mtime_ns in self._files(under):
+            seen[path] = (size, mtime_ns)
+        if under is None:
+            rows = self._db.execute("SELECT id, path, size, mtime_ns FROM files")
+        else:
+            prefix = str(under).rstrip(os.sep) + os.sep
+            # the range an index can answer; the prefix check below is exact
+            rows = self._db.execute(
+                "SELECT id, path, size, mtime_ns FROM files WHERE path >= ? AND path < ?",
+                (prefix, prefix[:-1] + chr(ord(os.sep) + 1)),
+            )
+        known = {path: (fid, size, mtime) for fid, path, size, mtime in rows}
+
+        removed = [known[p][0] for p in known if p not in seen]
+        changed = [p for p, meta in seen.items() if p not in known or known[p][1:] != meta]
+        # bits to clear and postings to add, by block
+        cleared: Dict[int, List[int]] = {}
+        added: Dict[int, list] = {}
+        pending = 0
+
+        def forget(fid: int) -> None:
+            self._db.execute("DELETE FROM files WHERE id = ?", (fid,))
+            cleared.setdefault(fid // BLOCK_FILES, []).append(fid)
+
+        for fid in removed:
+            forget(fid)
+        indexed = 0
+        for path in changed:
+            if path in known:
+                forget(known[path][0])
+            size, mtime_ns = seen[path]
+            grams = None
+            binary = not _is_text(Path(path))
+            if not binary:
+                try:
+                    grams = _file_trigrams(Path(path))
+                except OSError:
+                    continue
+                indexed += 1
+            # binary files are remembered too, so they aren't sniffed again
+            fid = self._db.execute(
+                "INSERT INTO files (path, size, mtime_ns, binary) VALUES (?, ?, ?, ?)",
+                (path, size, mtime_ns, binary),
+            ).lastrowid
+            if grams is not None and len(grams):
+                added.setdefault(fid // BLOCK_FILES, []).append((fid, grams))
+                pending += len(grams)
+            if pending > FLUSH_POSTINGS:
+                self._write_postings(cleared, added)
+                cleared, added, pending = {}, {}, 0
+        self._write_postings(cleared, added)
+        self._db.commit()
+        return {"indexed": indexed, "removed": len(removed)}
+
+    def _write_postings(self, cleared: Dict[int, List[int]], added: Dict[int, list]) -> None:
+        """Rewrites each touched block: bits of `cleared` files off, trigrams of `added` ones on."""
+        import numpy as np
+
+        width = BLOCK_FILES // 8
+        for block in sorted(set(cleared) | set(added)):
+            lo = block << 24
+            rows = self._db.execute(
+                "SELECT key, bits FROM postings WHERE key BETWEEN ? AND ?", (lo, lo | 0xFFFFFF)
+            ).fetchall()
+            grams = np.array([key & 0xFFFFFF for key, _ in rows], dtype=np.uint32)
+            bits = np.frombuffer(b"".join(b for _, b in rows), np.uint8).reshape(-1, width).copy()
+            for fid in cleared.get(block, ()):
+                slot = fid % BLOCK_FILES
+                bits[:, slot >> 3] &= np.uint8(~(1 << (slot & 7)) & 0xFF)
+            if block in added:
+                new = np.concatenate([g for _, g in added[block]])
+                slots = np.concatenate([np.full(len(g), fid % BLOCK_FILES, np.uint16) for fid, g in added[block]])
+                merged_grams = np.union1d(grams, new)
+                merged = np.zeros((len(merged_grams), width), np.uint8)
+                merged[np.searchsorted(merged_grams, grams)] = bits
+                np.bitwise_or.at(
+                    merged,
+                    (np.searchsorted(merged_grams, new), slots >> 3),
+                    (1 << (slots & 7)).astype(np.uint8),
+                )
+                grams, bits = merged_grams, merged
+            keep = bits.any(axis=1)
+            self._db.execute("DELETE FROM postings WHERE key BETWEEN ? AND ?", (lo, lo | 0xFFFFFF))
+            self._db.executemany(
+                "INSERT INTO postings (key, bits) VALUES (?, ?)",
+                ((lo | int(g), row.tobytes()) for g, row in zip(grams[keep], bits[keep])),
+            )
+
+    def candidates(self, literals: Sequence[str], under: Path) -> List[Path]:
+        """Indexed files below `under` that contain every trigram of `literals`."""
+        grams = sorted(set().union(*(trigrams(lit) for lit in literals))) if literals else []
+        # any of them narrows the search; a few hundred keep the query within sqlite's limits
+        grams = grams[:MAX_QUERY_TRIGRAMS]
+        prefix = str(under).rstrip(os.sep) + os.sep
+        with self._lock:
+            ids: Optional[Set[int]] = None
+            if grams:
+                ids = set()
+                last = self._db.execute("SELECT MAX(id) FROM files").fetchone()[0] or 0
+                marks = ", ".join("?" * len(grams))
+                for block in range(last // BLOCK_FILES + 1):
+                    lo = block << 24
+                    rows = self._db.execute(
+                        f"SELECT bits FROM postings WHERE key IN ({marks})", [lo | g for g in grams]
+                    ).fetchall()
+                    if len(rows) < len(grams):
+                        # some trigram is in no file of this block
+                        continue
+                    common = -1
+                    for (bits,) in rows:
+                        common &= int.from_bytes(bits, "little")
+                    while common:
+                        low = common & -common
+                        ids.add(block * BLOCK_FILES + low.bit_length() - 1)
+                        common ^= low
+                if not ids:
+                    return []
+            rows = self._db.execute("SELECT id, path FROM files WHERE binary = 0").fetchall()
+        return sorted(
+            Path(path) for fid, path in rows
+            if (ids is None or fid in ids) and (path.startswith(prefix) or path == str(under))
+        )
+
+    def search(self, query: str, under: Path, max_matches: int = 20) -> Optional[List[str]]:
+        """
+        `path:line:text` for the first matching line of each file, like
+        `rg --max-count 1`; None until the first build is done (which this
+        starts in the background), so the caller can search another way.
+        """
+        if not self._built:
+            self.build_in_background()
+            return None
+        try:
+            regex = re.compile(query)
+            literals = required_literals(query)
+        except re.error:
+            # not a valid pattern: look for the text itself
+            regex = re.compile(re.escape(query))
+            literals = [query]
+        self.refresh(under=under)
+        matches: List[str] = []
+        for path in self.candidates(literals, under):
+            line = first_match(path, regex)
+            if line is not None:
+                matches.append(f"{path}:{line[0]}:{line[1]}")
+                if len(matches) > max_matches:
+                    break
+        return matches
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def first_match(path: Path, regex: re.Pattern) -> Optional[Tuple[int, str]]:
+    try:
+        with path.open("r", encoding="utf-8", errors="ignore") as fh:
+            for idx, line in enumerate(fh, start=1):
+                if regex.search(line):
+                    return idx, line.rstrip()
+    except OSError:
+        pass
+    return None
+
+
+_indexes: Dict[Tuple[str, ...], TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(db_path: Path, roots: Sequence[Path], **kwargs) -> TrigramIndex:
+    key = (str(db_path), *map(str, roots))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = TrigramIndex(db_path, roots, **kwargs)
+        return _indexes[key]
+
+
+def mark_all_stale() -> None:
+    with _indexes_lock:
+        for index in _indexes.values():
+            index.mark_stale()
@@ -1,23 +1,22 @@
 from typing import Optional
-import requests
 
-from config import load_settings
-
-_settings = load_settings()
+from config import get_settings
+from transport import WEATHER_URL, get_http_client
 
 
 def get_weather(city: Optional[str] = None) -> str:
-    if not _settings.openweather_api_key:
+    settings = get_settings()
+    if not settings.openweather_api_key:
         return "Weather API key is not configured."
 
-    target_city = city or _settings.default_city
+    target_city = city or settings.default_city
 
     try:
-        resp = requests.get(
-            "https://api.openweathermap.org/data/2.5/weather",
+        resp = get_http_client().get(
+            WEATHER_URL,
             params={
                 "q": target_city,
-                "appid": _settings.openweather_api_key,
+                "appid": settings.openweather_api_key,
                 "units": "metric",
                 "lang": "en",
             },
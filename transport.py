@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, List, Optional
+
+from config import get_settings
+
+if TYPE_CHECKING:
+    from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+
+logger = logging.getLogger("jarvis.http")
+
+# One keep-alive connection pool for every outbound call (chat, STT, TTS,
+# weather), so repeated requests to the same host skip DNS, TCP and TLS.
+# Built lazily like the OpenAI client: openai pulls in the httpx stack.
+
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+_http_client: Optional[DefaultHttpxClient] = None
+_async_http_client: Optional[DefaultAsyncHttpxClient] = None
+_lock = threading.Lock()
+# time of the last request sent through each pool
+_last_activity = {"sync": 0.0, "async": 0.0}
+
+
+def _touch(*_args) -> None:
+    _last_activity["sync"] = time.monotonic()
+
+
+async def _touch_async(*_args) -> None:
+    _last_activity["async"] = time.monotonic()
+
+
+def idle_seconds(pool: str = "sync") -> float:
+    last = _last_activity[pool]
+    return time.monotonic() - last if last else float("inf")
+
+
+def _pool_options() -> dict:
+    import openai
+
+    settings = get_settings()
+    # openai re-exports the Timeout/Limits types of whichever httpx it is built on
+    limits_cls = type(openai.DEFAULT_CONNECTION_LIMITS)
+    return {
+        "limits": limits_cls(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        "timeout": openai.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+    }
+
+
+def get_http_client() -> DefaultHttpxClient:
+    """The pooled HTTP client shared by the OpenAI client and the tools."""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                from openai import DefaultHttpxClient
+
+                _http_client = DefaultHttpxClient(event_hooks={"request": [_touch]}, **_pool_options())
+    return _http_client
+
+
+def get_async_http_client() -> DefaultAsyncHttpxClient:
+    global _async_http_client
+    if _async_http_client is None:
+        with _lock:
+            if _async_http_client is None:
+                from openai import DefaultAsyncHttpxClient
+
+                _async_http_client = DefaultAsyncHttpxClient(
+                    event_hooks={"request": [_touch_async]},
+                    **_pool_options(),
+                )
+    return _async_http_client
+
+
+def warm_up_urls() -> List[str]:
+    urls = [os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/") + "/models"]
+    if get_settings().openweather_api_key:
+        urls.append(WEATHER_URL)
+    return urls
+
+
+def warm_up(urls: Optional[List[str]] = None) -> int:
+    """
+    Opens a pooled connection to each host with a cheap unauthenticated HEAD
+    request; the status code does not matter, only the finished handshake.
+    Returns the number of hosts reached.
+    """
+    client = get_http_client()
+    reached = 0
+    for url in urls or warm_up_urls():
+        started = time.perf_counter()
+        try:
+            client.head(url, timeout=get_settings().http_connect_timeout)
+        except Exception as e:
+            logger.info("warm-up of %s failed: %s: %s", url, type(e).__name__, e)
+            continue
+        reached += 1
+        logger.info("warm-up of %s took %.0f ms", url, (time.perf_counter() - started) * 1000)
+    return reached
+
+
+async def warm_up_async(urls: Optional[List[str]] = None) -> int:
+    client = get_async_http_client()
+    reached = 0
+    for url in urls or warm_up_urls():
+        try:
+            await client.head(url, timeout=get_settings().http_connect_timeout)
+        except Exception as e:
+            logger.info("async warm-up of %s failed: %s: %s", url, type(e).__name__, e)
+            continue
+        reached += 1
+    return reached
+
+
+class KeepAlive:
+    """
+    Background thread that re-warms the pool once it has been idle for
+    `interval` seconds, so connections are still open (or freshly reopened)
+    when the next command arrives.
+    """
+
+    def __init__(self, interval: float, urls: Optional[List[str]] = None) -> None:
+        self.interval = interval
+        self.urls = urls
+        self.pings = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        if self.interval <= 0:
+            return False
+        if self._thread and self._thread.is_alive():
+            return True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="jarvis-keepalive", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _run_loop(self) -> None:
+        # the first pass is the startup warm-up
+        warm_up(self.urls)
+        self.pings += 1
+        while not self._stop_event.wait(min(self.interval, max(self.interval - idle_seconds(), 0.05))):
+            if idle_seconds() >= self.interval:
+                warm_up(self.urls)
+                self.pings += 1
+
+
+async def keepalive_async(interval: float, urls: Optional[List[str]] = None) -> None:
+    """asyncio counterpart of KeepAlive for the async client's pool."""
+    if interval <= 0:
+        return
+    await warm_up_async(urls)
+    while True:
+        await asyncio.sleep(min(interval, max(interval - idle_seconds("async"), 0.05)))
+        if idle_seconds("async") >= interval:
+            await warm_up_async(urls)